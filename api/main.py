@@ -1,16 +1,37 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from api.routes import ingest, status, episode
+from api.routes import ingest, status, episode, lists, metrics
+from config.redis_config import close_async_redis_conn
+from db.aio import close_async_client
+from db.indexes import ensure_indexes
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create any missing MongoDB indexes on startup and close the async clients on shutdown."""
+    try:
+        await asyncio.to_thread(ensure_indexes)
+    except Exception as e:
+        print(f"Could not ensure indexes: {e}")
+    yield
+    await close_async_client()
+    await close_async_redis_conn()
+
 
 app = FastAPI(
     title="Newsletter to Podcast API",
     description="Service-based job queue architecture for converting newsletters to podcasts",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Include routers
 app.include_router(ingest.router, tags=["ingestion"])
 app.include_router(status.router, tags=["status"])
 app.include_router(episode.router, tags=["episodes"])
+app.include_router(lists.router, tags=["lists"])
+app.include_router(metrics.router, tags=["metrics"])
 
 
 @app.get("/")
@@ -21,8 +42,14 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "POST /ingest": "Ingest an article and enqueue normalization job",
+            "POST /ingest/batch": "Ingest many articles and enqueue their jobs in bulk",
             "GET /status/{article_id}": "Get pipeline status for an article",
-            "GET /episode/{article_id}": "Get final script and audio URL"
+            "GET /status/{article_id}/events": "Stream stage changes of an article (server-sent events)",
+            "GET /episode/{article_id}": "Get final script and audio URL",
+            "GET /articles": "List articles, filtered by status or stage status (cursor-paginated)",
+            "GET /episodes": "List episodes, filtered by status (cursor-paginated)",
+            "GET /jobs": "List ingestion and generation jobs, filtered by status or type (cursor-paginated)",
+            "GET /metrics": "Prometheus metrics of the queues, stages and workers"
         }
     }
 
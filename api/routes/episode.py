@@ -5,10 +5,14 @@ GET /episode/{article_id} endpoint - returns final script and audio URL.
 from fastapi import APIRouter, HTTPException
 from bson import ObjectId
 from api.schemas.requests import EpisodeResponse
-from db import db
+from db.aio import get_async_db
+from db.blob_store import decode_text_async
 
 router = APIRouter()
 
+# Skip raw_text and other large fields the response does not use
+EPISODE_PROJECTION = {"script": 1, "audio_url": 1, "status": 1, "published_at": 1}
+
 
 @router.get("/episode/{article_id}", response_model=EpisodeResponse)
 async def get_episode(article_id: str):
@@ -33,7 +37,8 @@ async def get_episode(article_id: str):
             )
         
         # Get article from database
-        article = db.articles.find_one({"_id": article_object_id})
+        adb = get_async_db()
+        article = await adb.articles.find_one({"_id": article_object_id}, EPISODE_PROJECTION)
         
         if not article:
             raise HTTPException(
@@ -42,7 +47,7 @@ async def get_episode(article_id: str):
             )
         
         # Extract episode data
-        script = article.get("script")
+        script = await decode_text_async(article.get("script"), adb)
         audio_url = article.get("audio_url")
         status = article.get("status", "unknown")
         published_at = article.get("published_at")
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from db import db
+from db.aio import get_async_db
 from datetime import datetime
 
 router = APIRouter(prefix="/generate")
@@ -13,5 +13,5 @@ async def generate_script(payload: dict):
         "email_sent": False,
         "created_at": datetime.now()
     }
-    result = db["jobs"].insert_one(job)
+    result = await get_async_db()["jobs"].insert_one(job)
     return {"job_id": str(result.inserted_id)}
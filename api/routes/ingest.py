@@ -1,77 +1,120 @@
 """
-POST /ingest endpoint - accepts article data and enqueues normalization job.
+POST /ingest endpoint - accepts article data and enqueues the pipeline jobs.
+POST /ingest/batch - the same for many articles, in bulk.
 """
 
+import asyncio
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List, Optional
 from fastapi import APIRouter, HTTPException
 from bson import ObjectId
 from datetime import datetime
-from api.schemas.requests import IngestRequest, IngestResponse
-from db import db
-from config.redis_config import normalize_queue
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from api.schemas.requests import (
+    IngestRequest, IngestResponse, BatchIngestRequest, BatchIngestResult, BatchIngestResponse
+)
+from db.aio import get_async_db
+from db.blob_store import encode_text
+from services.pipeline.stages import enqueue_pipeline, enqueue_pipelines
+from services.supervisor import admission
+from utils.idempotency import content_hash
+from utils.tracing import current_span, start_trace
+# Normalize jobs enqueued before the stage workers existed reference this path
+from services.pipeline.jobs import normalize_article_job  # noqa: F401
 
 router = APIRouter()
 
 
-def normalize_article_job(article_id: str):
-    """
-    Placeholder function for normalization job.
-    
-    This will be implemented by the Normalizer service worker.
-    For now, it's just a placeholder to enqueue the job.
-    
-    Args:
-        article_id: ID of the article to normalize
-    """
-    # This function will be called by the RQ worker
-    # Actual implementation will be in the Normalizer service
-    pass
-
-
 @router.post("/ingest", response_model=IngestResponse)
 async def ingest_article(request: IngestRequest):
     """
-    Ingest an article and enqueue a normalization job.
+    Ingest an article and enqueue its pipeline jobs.
     
     This endpoint:
     1. Stores the raw article data in MongoDB
     2. Creates an article document with status 'ingested'
-    3. Enqueues a normalization job to the normalize queue
+    3. Enqueues the normalization job, with the later stages chained on it
     4. Returns the article_id
     
+    Resubmitting the same article (same url, title and text) returns the
+    existing article_id instead of ingesting it again; its pipeline jobs
+    collapse into the ones already in flight.
+    
+    The request starts the article's trace, which its pipeline jobs carry
+    through every stage.
+    
+    When the pipeline backlog is too deep for a new article to get through
+    in time (see services/supervisor/admission.py), it is refused with 429
+    or 503 and a Retry-After header, or a scheduled article is moved to the
+    backfill lane. Resubmissions add no work and are always answered.
+    
     No heavy processing is done here - all work is delegated to workers.
     """
+    with start_trace("ingest_article", source=request.source, priority=request.priority):
+        article_hash = content_hash(request.url, request.title, request.raw_text)
+        try:
+            existing = await get_async_db().articles.find_one({"content_hash": article_hash},
+                                                              {"pipeline_status.normalize": 1})
+            if existing is not None:
+                return await _resubmitted(existing, request)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to ingest article: {str(e)}"
+            )
+
+        decision = _admitted(await admission.admit(request.priority))
+        if decision.priority != request.priority:
+            request = request.model_copy(update={"priority": decision.priority})
+        response = await _ingest_article(request, article_hash)
+        if decision.reason:
+            response.message = f"{response.message}. {decision.reason}"
+        return response
+
+
+def _admitted(decision: admission.Decision) -> admission.Decision:
+    """An admission decision; raises the HTTP error that refuses the articles."""
+    if not decision.admitted:
+        current_span().attributes["rejected"] = decision.status_code
+        raise HTTPException(
+            status_code=decision.status_code,
+            detail=decision.reason,
+            headers={"Retry-After": str(decision.retry_after)}
+        )
+    return decision
+
+
+async def _admit_batch(counts: Dict[str, int]) -> Dict[str, str]:
+    """Admit a batch's new articles, all or none; returns the lane each priority class goes to."""
+    decisions = await admission.admit_all(counts)
+    return {priority: _admitted(decision).priority for priority, decision in decisions.items()}
+
+
+async def _ingest_article(request: IngestRequest, article_hash: str) -> IngestResponse:
+    """Store a new article (not a resubmission) and enqueue its pipeline."""
     try:
+        articles = get_async_db().articles
+        
         # Create article document
-        article_doc = {
-            "title": request.title,
-            "url": request.url,
-            "raw_text": request.raw_text,
-            "source": request.source,
-            "status": "ingested",
-            "pipeline_status": {
-                "normalize": "pending",
-                "summarize": "pending",
-                "assemble": "pending",
-                "text_to_speech": "pending",
-                "publish": "pending"
-            },
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
-        }
+        # Large texts are compressed (or moved to GridFS) off the event loop
+        article_doc = _article_doc(request, article_hash, await asyncio.to_thread(encode_text, request.raw_text))
         
         # Insert article into database
-        result = db.articles.insert_one(article_doc)
+        try:
+            result = await articles.insert_one(article_doc)
+        except DuplicateKeyError:
+            # A concurrent request with the same content won the insert
+            existing = await articles.find_one({"content_hash": article_hash}, {"pipeline_status.normalize": 1})
+            return await _resubmitted(existing, request)
         article_id = str(result.inserted_id)
+        current_span().attributes["article_id"] = article_id
         
-        # Enqueue normalization job
-        # Note: The normalize job function will be implemented by the Normalizer service
-        # For now, we enqueue with article_id as the argument
-        normalize_queue.enqueue(
-            normalize_article_job,
-            article_id,
-            job_id=f"normalize_{article_id}",
-            job_timeout=600  # 10 minutes timeout
-        )
+        # Enqueue normalize and the later stages, each depending on the one before,
+        # in the request's priority lane (interactive unless the client asks otherwise)
+        # The Redis client is blocking, so keep it off the event loop
+        await asyncio.to_thread(enqueue_pipeline, article_id, priority=request.priority,
+                                deadline=request.deadline)
         
         return IngestResponse(
             article_id=article_id,
@@ -84,3 +127,190 @@ async def ingest_article(request: IngestRequest):
             status_code=500,
             detail=f"Failed to ingest article: {str(e)}"
         )
+
+
+def _article_doc(request: IngestRequest, article_hash: str, raw_text) -> dict:
+    """New article document for a request, with its raw_text already encoded."""
+    return {
+        "title": request.title,
+        "url": request.url,
+        "raw_text": raw_text,
+        "source": request.source,
+        "content_hash": article_hash,
+        "priority": request.priority,
+        "status": "ingested",
+        "pipeline_status": {
+            "normalize": "pending",
+            "summarize": "pending",
+            "assemble": "pending",
+            "text_to_speech": "pending",
+            "publish": "pending"
+        },
+        "created_at": datetime.now(),
+        "updated_at": datetime.now()
+    }
+
+
+async def _resubmitted(existing: dict, request: IngestRequest) -> IngestResponse:
+    """Answer a resubmission with the article already ingested."""
+    article_id = str(existing["_id"])
+    if existing.get("pipeline_status", {}).get("normalize") == "pending":
+        # Not started yet: re-enqueueing collapses into the in-flight jobs, and
+        # recovers an article whose first enqueue never reached Redis
+        await asyncio.to_thread(enqueue_pipeline, article_id, priority=request.priority,
+                                deadline=request.deadline)
+    return IngestResponse(
+        article_id=article_id,
+        status="duplicate",
+        message="Article already ingested; returning the existing article"
+    )
+
+
+@router.post("/ingest/batch", response_model=BatchIngestResponse)
+async def ingest_batch(request: BatchIngestRequest):
+    """
+    Ingest many articles and enqueue their pipeline jobs, in bulk.
+    
+    This endpoint:
+    1. Validates each article on its own, as POST /ingest would
+    2. Inserts the new articles with one unordered insert_many
+    3. Enqueues every stage of every new article in one Redis transaction
+    4. Returns the article_id or the error of each article, in request order
+    
+    Articles already ingested (same url, title and text, also within the
+    batch) are returned as duplicates of the existing article. One invalid
+    or failing article does not fail the rest.
+    
+    Admission control applies to the new articles of the batch as a whole:
+    if those of any priority class are refused, so is the batch (429 or 503
+    with a Retry-After header). Duplicates are not counted.
+    """
+    with start_trace("ingest_batch", articles=len(request.articles)):
+        try:
+            results = await _ingest_batch(request.articles, _admit_batch)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to ingest batch: {str(e)}"
+            )
+    return BatchIngestResponse(
+        ingested=sum(result.status == "ingested" for result in results),
+        duplicates=sum(result.status == "duplicate" for result in results),
+        failed=sum(result.status in ("invalid", "failed") for result in results),
+        results=results
+    )
+
+
+def _validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'article'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+async def _ingest_batch(raw_articles: List[Dict],
+                        admit: Callable[[Dict[str, int]], Awaitable[Dict[str, str]]]) -> List[BatchIngestResult]:
+    """
+    Ingest a batch. `admit` gets the number of new articles per priority
+    class, once duplicates are known, and returns the lane each class goes to.
+    """
+    results: List[Optional[BatchIngestResult]] = [None] * len(raw_articles)
+    valid = []
+    for index, raw_article in enumerate(raw_articles):
+        try:
+            item = IngestRequest.model_validate(raw_article)
+        except ValidationError as e:
+            results[index] = BatchIngestResult(index=index, status="invalid", error=_validation_error(e))
+            continue
+        valid.append((index, item, content_hash(item.url, item.title, item.raw_text)))
+
+    articles = get_async_db().articles
+    hashes = list({article_hash for _, _, article_hash in valid})
+    existing = {
+        doc["content_hash"]: doc
+        for doc in await articles.find(
+            {"content_hash": {"$in": hashes}}, {"content_hash": 1, "pipeline_status.normalize": 1}
+        ).to_list(None)
+    }
+
+    # The first article with each new content is inserted; repeats within the batch follow it
+    new, repeats, resubmitted = [], [], []
+    first_with_hash = {}
+    for index, item, article_hash in valid:
+        if article_hash in existing:
+            resubmitted.append((index, item, existing[article_hash]))
+        elif article_hash in first_with_hash:
+            repeats.append((index, first_with_hash[article_hash]))
+        else:
+            first_with_hash[article_hash] = index
+            new.append((index, item, article_hash))
+
+    # Only new articles add work; a refusal raises before anything is stored
+    lanes = await admit(Counter(item.priority for _, item, _ in new)) if new else {}
+    for position, (index, item, article_hash) in enumerate(new):
+        if lanes[item.priority] != item.priority:
+            new[position] = (index, item.model_copy(update={"priority": lanes[item.priority]}), article_hash)
+
+    # Large texts are compressed (or moved to GridFS) off the event loop
+    raw_texts = await asyncio.to_thread(lambda: [encode_text(item.raw_text) for _, item, _ in new])
+    docs = [
+        {"_id": ObjectId(), **_article_doc(item, article_hash, raw_text)}
+        for (_, item, article_hash), raw_text in zip(new, raw_texts)
+    ]
+    inserted = list(range(len(docs)))
+    if docs:
+        try:
+            await articles.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            errors = {error["index"]: error for error in e.details.get("writeErrors", [])}
+            inserted = [position for position in inserted if position not in errors]
+            raced = [position for position, error in errors.items() if error.get("code") == 11000]
+            # Concurrent requests with the same content won these inserts
+            won = {
+                doc["content_hash"]: doc
+                for doc in await articles.find(
+                    {"content_hash": {"$in": [docs[position]["content_hash"] for position in raced]}},
+                    {"content_hash": 1, "pipeline_status.normalize": 1}
+                ).to_list(None)
+            } if raced else {}
+            for position, error in errors.items():
+                index, item, article_hash = new[position]
+                if article_hash in won:
+                    resubmitted.append((index, item, won[article_hash]))
+                else:
+                    results[index] = BatchIngestResult(index=index, status="failed",
+                                                       error=error.get("errmsg", "insert failed"))
+
+    if inserted:
+        try:
+            # The Redis client is blocking, so keep it off the event loop
+            await asyncio.to_thread(enqueue_pipelines, [
+                (str(docs[position]["_id"]), new[position][1].priority, new[position][1].deadline)
+                for position in inserted
+            ])
+            status, error = "ingested", None
+        except Exception as e:
+            # Resubmitting the articles enqueues them (see _resubmitted)
+            status, error = "failed", f"Article stored but its jobs were not enqueued: {e}"
+        for position in inserted:
+            index = new[position][0]
+            results[index] = BatchIngestResult(index=index, article_id=str(docs[position]["_id"]),
+                                               status=status, error=error)
+
+    for index, item, doc in resubmitted:
+        try:
+            response = await _resubmitted(doc, item)
+            results[index] = BatchIngestResult(index=index, article_id=response.article_id, status="duplicate")
+        except Exception as e:
+            results[index] = BatchIngestResult(index=index, article_id=str(doc["_id"]), status="failed",
+                                               error=f"Could not re-enqueue the existing article: {e}")
+
+    for index, first in repeats:
+        result = results[first]
+        if result.article_id is not None:
+            results[index] = BatchIngestResult(index=index, article_id=result.article_id, status="duplicate")
+        else:
+            results[index] = result.model_copy(update={"index": index})
+    return results
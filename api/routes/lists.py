@@ -0,0 +1,154 @@
+"""
+GET /articles, /episodes and /jobs endpoints - list documents, newest first.
+
+Lists are paginated on _id (keyset pagination): ObjectIds grow with the
+time they were created, so sorting on _id descending lists the newest
+documents first, and the next page is simply the documents with an _id
+below the last one returned. Unlike skip/offset, a page costs the same
+however deep it is, and documents inserted meanwhile do not shift it.
+
+Every filter is backed by an index on (filter field, _id descending) in
+db/indexes.py, so a filtered page is read straight off the index, without
+a sort in memory. Responses only carry small fields (never raw_text or
+script); `fields` picks among them.
+"""
+
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from bson import ObjectId
+from pymongo import DESCENDING
+from api.schemas.requests import ListResponse
+from config.settings import LIST_PAGE_SIZE_DEFAULT, LIST_PAGE_SIZE_MAX
+from db.aio import get_async_db
+from services.pipeline.stages import STAGES
+
+router = APIRouter()
+
+# Fields each list may return, and the ones it returns by default
+ARTICLE_FIELDS = ["title", "url", "source", "status", "priority", "pipeline_status", "episode_id",
+                  "message_id", "error", "audio_url", "published_at", "created_at", "updated_at"]
+ARTICLE_DEFAULT_FIELDS = ["title", "url", "source", "status", "pipeline_status", "created_at"]
+EPISODE_FIELDS = ["episode_name", "episode_num", "newsletter", "date", "status"]
+EPISODE_DEFAULT_FIELDS = EPISODE_FIELDS
+JOB_FIELDS = ["job_id", "type", "source", "status", "metrics", "output", "error", "email_sent", "created_at"]
+JOB_DEFAULT_FIELDS = ["job_id", "type", "status", "metrics", "error", "created_at"]
+
+
+def _projection(fields: Optional[str], allowed: List[str], default: List[str]) -> Dict:
+    if not fields:
+        return {field: 1 for field in default}
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Available fields: {allowed}"
+        )
+    return {field: 1 for field in requested}
+
+
+def _jsonable(value):
+    """Document values with ObjectIds as strings."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_jsonable(item) for item in value]
+    return value
+
+
+async def _list_page(collection_name: str, query: Dict, projection: Dict,
+                     cursor: Optional[str], limit: int) -> ListResponse:
+    """One page of a collection, newest first, starting below the cursor."""
+    limit = min(limit, LIST_PAGE_SIZE_MAX)
+    if cursor:
+        try:
+            query = {**query, "_id": {"$lt": ObjectId(cursor)}}
+        except Exception:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid cursor: {cursor}"
+            )
+    try:
+        # One extra document tells whether there is a next page
+        docs = await get_async_db()[collection_name].find(query, projection) \
+            .sort("_id", DESCENDING).limit(limit + 1).to_list(None)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to list {collection_name}: {str(e)}"
+        )
+    page = docs[:limit]
+    next_cursor = str(page[-1]["_id"]) if len(docs) > limit else None
+    return ListResponse(
+        items=[{"id": str(doc.pop("_id")), **_jsonable(doc)} for doc in page],
+        next_cursor=next_cursor,
+        limit=limit
+    )
+
+
+@router.get("/articles", response_model=ListResponse)
+async def list_articles(
+    status: Optional[str] = Query(None, description="Article status, e.g. ingested or published"),
+    stage: Optional[str] = Query(None, description=f"Pipeline stage to filter on: {', '.join(STAGES)}"),
+    stage_status: Optional[str] = Query(None, description="Status of that stage, e.g. failed"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(LIST_PAGE_SIZE_DEFAULT, ge=1, description=f"Page size, at most {LIST_PAGE_SIZE_MAX}")
+):
+    """
+    List articles, newest first.
+    
+    Filter by article status, and/or by the status of one pipeline stage
+    (e.g. stage=summarize&stage_status=failed).
+    """
+    if (stage is None) != (stage_status is None):
+        raise HTTPException(
+            status_code=400,
+            detail="stage and stage_status must be given together"
+        )
+    if stage is not None and stage not in STAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown stage: {stage}. Available stages: {STAGES}"
+        )
+    query = {}
+    if status is not None:
+        query["status"] = status
+    if stage is not None:
+        query[f"pipeline_status.{stage}"] = stage_status
+    projection = _projection(fields, ARTICLE_FIELDS, ARTICLE_DEFAULT_FIELDS)
+    return await _list_page("articles", query, projection, cursor, limit)
+
+
+@router.get("/episodes", response_model=ListResponse)
+async def list_episodes(
+    status: Optional[str] = Query(None, description="Episode status, e.g. in production"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(LIST_PAGE_SIZE_DEFAULT, ge=1, description=f"Page size, at most {LIST_PAGE_SIZE_MAX}")
+):
+    """List episodes, newest first."""
+    query = {"status": status} if status is not None else {}
+    projection = _projection(fields, EPISODE_FIELDS, EPISODE_DEFAULT_FIELDS)
+    return await _list_page("episodes", query, projection, cursor, limit)
+
+
+@router.get("/jobs", response_model=ListResponse)
+async def list_jobs(
+    status: Optional[str] = Query(None, description="Job status, e.g. failed"),
+    type: Optional[str] = Query(None, description="Job type, e.g. ingestion"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(LIST_PAGE_SIZE_DEFAULT, ge=1, description=f"Page size, at most {LIST_PAGE_SIZE_MAX}")
+):
+    """List ingestion and generation job records, newest first."""
+    query = {}
+    if status is not None:
+        query["status"] = status
+    if type is not None:
+        query["type"] = type
+    projection = _projection(fields, JOB_FIELDS, JOB_DEFAULT_FIELDS)
+    return await _list_page("jobs", query, projection, cursor, limit)
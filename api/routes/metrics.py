@@ -0,0 +1,30 @@
+"""
+GET /metrics endpoint - Prometheus metrics of the queues, stages and workers.
+"""
+
+import asyncio
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+
+from utils.metrics import CONTENT_TYPE, metrics_text
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=Response)
+async def get_metrics():
+    """
+    Metrics in the Prometheus text format (see utils/metrics.py).
+
+    Everything is read from Redis in a few pipelined round trips, so
+    scraping is cheap.
+    """
+    try:
+        text = await asyncio.to_thread(metrics_text)
+    except Exception as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Could not collect metrics: {str(e)}"
+        )
+    return Response(content=text, media_type=CONTENT_TYPE)
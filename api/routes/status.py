@@ -1,15 +1,29 @@
 """
 GET /status/{article_id} endpoint - returns current pipeline status.
+GET /status/{article_id}/events - pushes stage changes as server-sent events.
 """
 
-from fastapi import APIRouter, HTTPException
-from bson import ObjectId
+import json
+import time
 from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from bson import ObjectId
+from redis.exceptions import RedisError
 from api.schemas.requests import StatusResponse, PipelineStatus
-from db import db
+from config.redis_config import get_async_redis_conn
+from config.settings import STATUS_EVENTS_KEEPALIVE_SEC, STATUS_EVENTS_MAX_SEC
+from db.aio import get_async_db
+from services.pipeline import status_cache
+from services.pipeline.stages import STAGES
 
 router = APIRouter()
 
+# Status polling only needs stage fields and timestamps, never raw_text or script
+STATUS_PROJECTION = {"pipeline_status": 1, "created_at": 1}
+
 
 def get_overall_status(pipeline_status: dict) -> str:
     """
@@ -33,30 +47,68 @@ def get_overall_status(pipeline_status: dict) -> str:
         return "pending"
 
 
+def _parse_article_id(article_id: str) -> ObjectId:
+    try:
+        return ObjectId(article_id)
+    except Exception:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid article_id format: {article_id}"
+        )
+
+
+async def _load_status(article_id: str) -> Optional[dict]:
+    """The article's status fields, from the Redis cache or else from MongoDB."""
+    article_object_id = _parse_article_id(article_id)
+    redis_client = get_async_redis_conn()
+    try:
+        article = await status_cache.read_status(redis_client, article_id)
+        if article is not None:
+            return article
+    except RedisError as e:
+        print(f"Status cache unavailable, reading MongoDB: {e}")
+        redis_client = None
+
+    article = await get_async_db().articles.find_one({"_id": article_object_id}, STATUS_PROJECTION)
+    if article is not None and redis_client is not None:
+        try:
+            await status_cache.seed_status(redis_client, article_id, article)
+        except RedisError as e:
+            print(f"Could not seed status cache for {article_id}: {e}")
+    return article
+
+
+def _status_response(article_id: str, article: dict) -> StatusResponse:
+    pipeline_status = article.get("pipeline_status", {})
+    return StatusResponse(
+        article_id=article_id,
+        overall_status=get_overall_status({stage: pipeline_status.get(stage, "pending") for stage in STAGES}),
+        stages=[
+            PipelineStatus(
+                stage=stage,
+                status=pipeline_status.get(stage, "pending"),
+                updated_at=pipeline_status.get(f"{stage}_updated_at")
+            )
+            for stage in STAGES
+        ],
+        created_at=article.get("created_at")
+    )
+
+
 @router.get("/status/{article_id}", response_model=StatusResponse)
 async def get_status(article_id: str):
     """
     Get the current pipeline status for an article.
     
     This endpoint:
-    1. Retrieves the article from MongoDB
-    2. Extracts pipeline status for each stage
+    1. Reads the article's cached stage statuses from Redis
+    2. Falls back to the article's stage fields in MongoDB, and caches them
     3. Returns structured status information
     
-    No heavy processing - only database reads.
+    No heavy processing - workers write every transition through to the cache.
     """
     try:
-        # Validate ObjectId format
-        try:
-            article_object_id = ObjectId(article_id)
-        except Exception:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid article_id format: {article_id}"
-            )
-        
-        # Get article from database
-        article = db.articles.find_one({"_id": article_object_id})
+        article = await _load_status(article_id)
         
         if not article:
             raise HTTPException(
@@ -64,47 +116,7 @@ async def get_status(article_id: str):
                 detail=f"Article not found: {article_id}"
             )
         
-        # Extract pipeline status
-        pipeline_status = article.get("pipeline_status", {})
-        
-        # Build stage status list
-        stage_statuses = [
-            PipelineStatus(
-                stage="normalize",
-                status=pipeline_status.get("normalize", "pending"),
-                updated_at=pipeline_status.get("normalize_updated_at")
-            ),
-            PipelineStatus(
-                stage="summarize",
-                status=pipeline_status.get("summarize", "pending"),
-                updated_at=pipeline_status.get("summarize_updated_at")
-            ),
-            PipelineStatus(
-                stage="assemble",
-                status=pipeline_status.get("assemble", "pending"),
-                updated_at=pipeline_status.get("assemble_updated_at")
-            ),
-            PipelineStatus(
-                stage="text_to_speech",
-                status=pipeline_status.get("text_to_speech", "pending"),
-                updated_at=pipeline_status.get("text_to_speech_updated_at")
-            ),
-            PipelineStatus(
-                stage="publish",
-                status=pipeline_status.get("publish", "pending"),
-                updated_at=pipeline_status.get("publish_updated_at")
-            )
-        ]
-        
-        # Determine overall status
-        overall_status = get_overall_status(pipeline_status)
-        
-        return StatusResponse(
-            article_id=article_id,
-            overall_status=overall_status,
-            stages=stage_statuses,
-            created_at=article.get("created_at")
-        )
+        return _status_response(article_id, article)
         
     except HTTPException:
         raise
@@ -113,3 +125,85 @@ async def get_status(article_id: str):
             status_code=500,
             detail=f"Failed to get status: {str(e)}"
         )
+
+
+def _event(name: str, data: str) -> str:
+    return f"event: {name}\ndata: {data}\n\n"
+
+
+async def _status_events(request: Request, pubsub, article_id: str, article: dict):
+    """
+    Current status, then each stage change, then the status the stream ends on:
+    once the pipeline completes, a stage fails with no retries left, or after
+    STATUS_EVENTS_MAX_SEC.
+    """
+    try:
+        yield _event("status", _status_response(article_id, article).model_dump_json())
+        pipeline_status = dict(article.get("pipeline_status") or {})
+        article = {**article, "pipeline_status": pipeline_status}
+        deadline = time.monotonic() + STATUS_EVENTS_MAX_SEC
+        last_sent = time.monotonic()
+        stopped = False
+        while not stopped and _status_response(article_id, article).overall_status != "completed":
+            if await request.is_disconnected():
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            message = await pubsub.get_message(ignore_subscribe_messages=True,
+                                               timeout=min(STATUS_EVENTS_KEEPALIVE_SEC, remaining))
+            if message is None:
+                if time.monotonic() - last_sent >= STATUS_EVENTS_KEEPALIVE_SEC:
+                    yield ": keep-alive\n\n"
+                    last_sent = time.monotonic()
+                continue
+            change = json.loads(message["data"])
+            pipeline_status[change["stage"]] = change["status"]
+            pipeline_status[f"{change['stage']}_updated_at"] = \
+                datetime.fromisoformat(change["updated_at"]) if change["updated_at"] else None
+            yield _event("stage", message["data"])
+            last_sent = time.monotonic()
+            # A stage that failed with retries left runs again
+            stopped = change["status"] == "failed" and change.get("final", False)
+        yield _event("status", _status_response(article_id, article).model_dump_json())
+    finally:
+        await pubsub.aclose()
+
+
+@router.get("/status/{article_id}/events")
+async def stream_status(article_id: str, request: Request):
+    """
+    Push an article's stage changes as server-sent events.
+    
+    Sends a `status` event with the full current status (as GET
+    /status/{article_id} returns it), then a `stage` event
+    ({"stage", "status", "updated_at", "final"}) for every transition, and a
+    last `status` event when it ends: once every stage has completed, once a
+    stage has failed with no retries left ("final"), or after
+    STATUS_EVENTS_MAX_SEC (reconnect to keep following).
+    """
+    _parse_article_id(article_id)
+    # Subscribe before reading the current status, so no transition falls in between
+    pubsub = get_async_redis_conn().pubsub()
+    try:
+        await pubsub.subscribe(status_cache.STATUS_CHANNEL.format(article_id))
+        article = await _load_status(article_id)
+    except Exception as e:
+        await pubsub.aclose()
+        raise HTTPException(
+            status_code=503,
+            detail=f"Status events unavailable: {str(e)}"
+        )
+    if not article:
+        await pubsub.aclose()
+        raise HTTPException(
+            status_code=404,
+            detail=f"Article not found: {article_id}"
+        )
+
+    return StreamingResponse(
+        _status_events(request, pubsub, article_id, article),
+        media_type="text/event-stream",
+        # Proxies must pass events through as they come
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -3,8 +3,9 @@ Pydantic schemas for API requests and responses.
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Any, Dict, List, Literal, Optional
 from datetime import datetime
+from config.settings import INGEST_BATCH_MAX_ITEMS
 
 
 class IngestRequest(BaseModel):
@@ -13,6 +14,10 @@ class IngestRequest(BaseModel):
     url: Optional[str] = Field(None, description="Article URL")
     raw_text: str = Field(..., description="Raw article text to process")
     source: Optional[str] = Field(None, description="Source of the article (e.g., newsletter name)")
+    priority: Literal["interactive", "scheduled", "backfill"] = Field(
+        "interactive", description="Priority lane of the pipeline jobs"
+    )
+    deadline: Optional[datetime] = Field(None, description="Time by which each pipeline stage should have started")
     
     class Config:
         json_schema_extra = {
@@ -20,7 +25,8 @@ class IngestRequest(BaseModel):
                 "title": "Example Article",
                 "url": "https://example.com/article",
                 "raw_text": "This is the full article text...",
-                "source": "TLDR Newsletter"
+                "source": "TLDR Newsletter",
+                "priority": "interactive"
             }
         }
 
@@ -41,6 +47,53 @@ class IngestResponse(BaseModel):
         }
 
 
+class BatchIngestRequest(BaseModel):
+    """Request schema for POST /ingest/batch endpoint."""
+    articles: list[Dict[str, Any]] = Field(
+        ..., min_length=1, max_length=INGEST_BATCH_MAX_ITEMS,
+        description="Articles in the IngestRequest format; each one is validated on its own"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "articles": [
+                    {"title": "First Article", "raw_text": "Full text...", "source": "TLDR Newsletter"},
+                    {"title": "Second Article", "raw_text": "Full text...", "source": "TLDR Newsletter"}
+                ]
+            }
+        }
+
+
+class BatchIngestResult(BaseModel):
+    """Outcome of one article of a batch."""
+    index: int = Field(..., description="Position of the article in the request")
+    article_id: Optional[str] = Field(None, description="Article identifier, when the article is stored")
+    status: Literal["ingested", "duplicate", "invalid", "failed"] = Field(..., description="Outcome")
+    error: Optional[str] = Field(None, description="Why the article is invalid or failed")
+
+
+class BatchIngestResponse(BaseModel):
+    """Response schema for POST /ingest/batch endpoint."""
+    ingested: int = Field(..., description="Articles ingested and enqueued")
+    duplicates: int = Field(..., description="Articles already ingested")
+    failed: int = Field(..., description="Articles invalid or not ingested")
+    results: list[BatchIngestResult] = Field(..., description="Outcome per article, in request order")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "ingested": 1,
+                "duplicates": 0,
+                "failed": 1,
+                "results": [
+                    {"index": 0, "article_id": "507f1f77bcf86cd799439011", "status": "ingested", "error": None},
+                    {"index": 1, "article_id": None, "status": "invalid", "error": "raw_text: Field required"}
+                ]
+            }
+        }
+
+
 class PipelineStatus(BaseModel):
     """Status of each pipeline stage."""
     stage: str = Field(..., description="Pipeline stage name")
@@ -99,3 +152,28 @@ class EpisodeResponse(BaseModel):
                 "published_at": "2024-01-15T11:00:00"
             }
         }
+
+
+class ListResponse(BaseModel):
+    """Response schema for the GET /articles, /episodes and /jobs endpoints."""
+    items: List[Dict[str, Any]] = Field(..., description="Documents of this page, newest first")
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page; null on the last page")
+    limit: int = Field(..., description="Page size used")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {
+                        "id": "507f1f77bcf86cd799439011",
+                        "job_id": "9b2f7d0e-3c41-4c57-9a51-1f0c3d1a7e42",
+                        "type": "ingestion",
+                        "status": "failed",
+                        "error": "Gmail API unavailable",
+                        "metrics": {"created_at": "2024-01-15T10:25:00", "completed_at": "2024-01-15T10:26:00"}
+                    }
+                ],
+                "next_cursor": "507f1f77bcf86cd799439011",
+                "limit": 50
+            }
+        }
@@ -0,0 +1,78 @@
+"""
+Benchmark: per-document Text.save() loop versus Text.save_many() bulk writes.
+
+Requires a running mongod. Documents are written to a scratch database that
+is dropped afterwards.
+
+Usage:
+    python -m benchmarks.bench_bulk_write [--uri mongodb://127.0.0.1:27017] [--count 10000]
+"""
+
+import argparse
+import time
+
+import pymongo
+from bson import ObjectId
+
+import db.database as database
+from db.database import Text
+
+SCRATCH_DB = 'newsletter_to_podcast_bench'
+
+
+def make_texts(count: int, episode_id: ObjectId, size: int):
+    body = 'lorem ipsum dolor sit amet ' * (size // 27 + 1)
+    return [Text(episode_id=episode_id, full_text=body[:size]) for _ in range(count)]
+
+
+def bench_loop(texts) -> float:
+    start = time.perf_counter()
+    for text in texts:
+        text.save()
+    return time.perf_counter() - start
+
+
+def bench_bulk(texts, batch_size: int) -> float:
+    start = time.perf_counter()
+    results = Text.save_many(texts, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    assert all(result.ok for result in results), 'bulk save reported failures'
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--uri', default='mongodb://127.0.0.1:27017')
+    parser.add_argument('--count', type=int, default=10000)
+    parser.add_argument('--size', type=int, default=2000, help='characters of full_text per document')
+    parser.add_argument('--batch-size', type=int, default=database.BULK_WRITE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    client = pymongo.MongoClient(args.uri)
+    client.drop_database(SCRATCH_DB)
+    # Point the models at the scratch database for the duration of the run
+    database.db = client[SCRATCH_DB]
+    episode_id = ObjectId()
+
+    try:
+        loop_s = bench_loop(make_texts(args.count, episode_id, args.size))
+        database.db.texts.drop()
+        insert_s = bench_bulk(make_texts(args.count, episode_id, args.size), args.batch_size)
+        # Upserting the same documents again exercises the ReplaceOne path
+        texts = make_texts(args.count, episode_id, args.size)
+        bench_bulk(texts, args.batch_size)
+        upsert_s = bench_bulk(texts, args.batch_size)
+    finally:
+        client.drop_database(SCRATCH_DB)
+
+    print(f'{args.count} texts of {args.size} chars, batch size {args.batch_size}')
+    print(f'{"method":<28} {"seconds":>9} {"docs/s":>10}')
+    for label, elapsed in [('save() loop', loop_s),
+                           ('save_many() new docs', insert_s),
+                           ('save_many() existing docs', upsert_s)]:
+        print(f'{label:<28} {elapsed:>9.2f} {args.count / elapsed:>10.0f}')
+    print(f'speedup (new docs): {loop_s / insert_s:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: HTML extraction throughput as the process pool grows.
+
+Generates synthetic newsletter-sized HTML documents and converts them with
+the extraction executor at increasing worker counts.
+
+Usage:
+    python -m benchmarks.bench_extraction [--docs 200] [--paragraphs 400] [--extractor email|article]
+"""
+
+import argparse
+import os
+import random
+import string
+import time
+
+from services.ingestion.extraction import ExtractionExecutor, extract_article, html_to_text
+
+
+def make_document(paragraphs: int, seed: int) -> str:
+    rng = random.Random(seed)
+    words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(500)]
+    body = []
+    for i in range(paragraphs):
+        sentence = ' '.join(rng.choices(words, k=40))
+        body.append(f'<div class="item"><h3>Heading {i}</h3><p>{sentence}</p>'
+                    f'<a href="https://example.com/{seed}/{i}">read more</a></div>')
+    return f'<html><head><style>p {{color: black}}</style></head><body>{"".join(body)}</body></html>'
+
+
+def run(executor: ExtractionExecutor, fn, docs) -> float:
+    start = time.perf_counter()
+    for _ in executor.map(fn, docs):
+        pass
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--docs', type=int, default=200)
+    parser.add_argument('--paragraphs', type=int, default=400)
+    parser.add_argument('--extractor', choices=['email', 'article'], default='email')
+    args = parser.parse_args()
+
+    fn = html_to_text if args.extractor == 'email' else extract_article
+    docs = [make_document(args.paragraphs, seed) for seed in range(args.docs)]
+    size_mb = sum(len(d) for d in docs) / 1e6
+    print(f'{args.docs} documents, {size_mb:.1f} MB of HTML, extractor={args.extractor}')
+
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({0, 1, 2, 4, 8, cores} - {w for w in (2, 4, 8) if w > cores})
+
+    baseline = None
+    print(f'{"workers":>8} {"seconds":>9} {"docs/s":>9} {"speedup":>8}')
+    for workers in worker_counts:
+        executor = ExtractionExecutor(max_workers=workers)
+        try:
+            # Warm the pool so process start-up is not measured
+            list(executor.map(fn, docs[:workers or 1]))
+            elapsed = run(executor, fn, docs)
+        finally:
+            executor.shutdown()
+        baseline = baseline or elapsed
+        label = 'inline' if workers == 0 else str(workers)
+        print(f'{label:>8} {elapsed:>9.2f} {args.docs / elapsed:>9.1f} {baseline / elapsed:>7.2f}x')
+
+
+if __name__ == '__main__':
+    main()
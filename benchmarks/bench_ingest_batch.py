@@ -0,0 +1,85 @@
+"""
+Benchmark: ingest throughput of POST /ingest against POST /ingest/batch.
+
+Ingests the same number of distinct articles against a running API, once
+one request per article (at a fixed concurrency) and once in batches of
+increasing size. Every article gets a unique title, so none of them is a
+duplicate; they are all enqueued, so run it against a scratch deployment
+(or with no workers running and flush the queues afterwards).
+
+Usage:
+    uvicorn api.main:app --port 8000 &
+    python -m benchmarks.bench_ingest_batch [--url http://localhost:8000] [--articles 2000]
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+
+
+def make_articles(count: int, text_kb: int):
+    run = uuid.uuid4().hex[:8]
+    text = 'lorem ipsum ' * (text_kb * 1024 // 12)
+    return [{
+        'title': f'Batch benchmark {run} #{i}',
+        'raw_text': text,
+        'source': 'bench-ingest-batch',
+        'priority': 'backfill'
+    } for i in range(count)]
+
+
+async def single(client: httpx.AsyncClient, articles, concurrency: int) -> float:
+    remaining = list(articles)
+
+    async def worker():
+        while remaining:
+            response = await client.post('/ingest', json=remaining.pop())
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return len(articles) / (time.perf_counter() - start)
+
+
+async def batched(client: httpx.AsyncClient, articles, batch_size: int) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(articles), batch_size):
+        response = await client.post('/ingest/batch', json={'articles': articles[i:i + batch_size]})
+        response.raise_for_status()
+        body = response.json()
+        if body['failed']:
+            raise RuntimeError(f"{body['failed']} articles failed: {body['results'][0]}")
+    return len(articles) / (time.perf_counter() - start)
+
+
+async def main_async(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=300) as client:
+        results = [(f'POST /ingest x{args.concurrency} concurrent',
+                    await single(client, make_articles(args.articles, args.text_kb), args.concurrency))]
+        for batch_size in args.batch_sizes:
+            results.append((f'POST /ingest/batch of {batch_size}',
+                            await batched(client, make_articles(args.articles, args.text_kb), batch_size)))
+
+    print(f'{args.articles} articles of {args.text_kb} KB each')
+    print(f'{"route":<32} {"articles/s":>10}')
+    for label, rate in results:
+        print(f'{label:<32} {rate:>10.0f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--articles', type=int, default=2000)
+    parser.add_argument('--text-kb', type=int, default=4, help='size of raw_text per article')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent requests to POST /ingest')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[10, 100, 500])
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: throughput versus latency of micro-batched LLM jobs.
+
+For each combination of batch size and wait time, a producer thread
+enqueues jobs on a scratch queue at a steady rate while a BatchingWorker
+consumes them. Generation is simulated: a batched call costs --call-ms plus
+--sequence-ms per sequence, the shape of batched decoding on a GPU, where
+the fixed cost of each forward pass dominates until the batch fills the
+device.
+
+Reports throughput (jobs/s), mean and p95 latency from enqueue to end, and
+the mean batch size. Batch size 1 is the one-job-at-a-time baseline.
+
+Requires a running Redis. The scratch queue and its jobs are deleted
+afterwards.
+
+Usage:
+    python -m benchmarks.bench_llm_batching [--url redis://127.0.0.1:6379/0] [--jobs 200] [--rate 20]
+        [--sizes 1,4,8,16] [--waits 0,50,200]
+"""
+
+import argparse
+import threading
+import time
+
+import redis
+from rq import Queue
+from rq.job import Job
+
+from services.llm_worker import batching
+
+SCRATCH_QUEUE = 'bench_llm_batching'
+
+CALL_MS = 400.0
+SEQUENCE_MS = 40.0
+BATCH_SIZES = []
+
+
+def simulate_generation(texts):
+    BATCH_SIZES.append(len(texts))
+    time.sleep((CALL_MS + SEQUENCE_MS * len(texts)) / 1000)
+    return [len(text) for text in texts]
+
+
+def simulated_generation_job(text: str) -> int:
+    return batching.batched_result(simulate_generation, text)
+
+
+batching.BATCHABLE_JOBS[f'{__name__}.simulated_generation_job'] = 'bench'
+
+
+def produce(queue: Queue, count: int, rate: float, job_ids: list):
+    for i in range(count):
+        job_ids.append(queue.enqueue(simulated_generation_job, f'chunk {i}').id)
+        time.sleep(1 / rate)
+
+
+def run(connection, count: int, rate: float, batch_size: int, wait_ms: int):
+    queue = Queue(SCRATCH_QUEUE, connection=connection)
+    worker = batching.BatchingWorker([queue], connection=connection)
+    worker.batch_size, worker.batch_wait_ms = batch_size, wait_ms
+    BATCH_SIZES.clear()
+
+    job_ids = []
+    producer = threading.Thread(target=produce, args=(queue, count, rate, job_ids))
+    start = time.perf_counter()
+    producer.start()
+    # Workers install signal handlers, so this one runs in the main thread
+    while producer.is_alive() or queue.count:
+        if not worker.work(burst=True):
+            time.sleep(0.005)
+    elapsed = time.perf_counter() - start
+    producer.join()
+
+    jobs = Job.fetch_many(job_ids, connection=connection)
+    latencies = sorted((job.ended_at - job.enqueued_at).total_seconds() for job in jobs)
+    queue.delete(delete_jobs=True)
+    return {
+        'throughput': count / elapsed,
+        'mean': sum(latencies) / len(latencies),
+        'p95': latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+        'batch': sum(BATCH_SIZES) / len(BATCH_SIZES),
+    }
+
+
+def main():
+    global CALL_MS, SEQUENCE_MS
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='redis://127.0.0.1:6379/0')
+    parser.add_argument('--jobs', type=int, default=200)
+    parser.add_argument('--rate', type=float, default=20, help='jobs enqueued per second')
+    parser.add_argument('--sizes', default='1,4,8,16', help='batch sizes to compare')
+    parser.add_argument('--waits', default='0,50,200', help='batch wait times (ms) to compare')
+    parser.add_argument('--call-ms', type=float, default=CALL_MS, help='simulated cost of one generate call')
+    parser.add_argument('--sequence-ms', type=float, default=SEQUENCE_MS, help='simulated cost per sequence')
+    args = parser.parse_args()
+    CALL_MS, SEQUENCE_MS = args.call_ms, args.sequence_ms
+
+    connection = redis.Redis.from_url(args.url)
+    connection.ping()
+    print(f"{args.jobs} jobs at {args.rate}/s; generate call {CALL_MS:.0f} ms + {SEQUENCE_MS:.0f} ms/sequence")
+    print(f"{'batch':>5} {'wait ms':>7} {'jobs/s':>8} {'mean s':>8} {'p95 s':>8} {'avg batch':>9}")
+    for batch_size in (int(size) for size in args.sizes.split(',')):
+        waits = [0] if batch_size == 1 else [int(wait) for wait in args.waits.split(',')]
+        for wait_ms in waits:
+            result = run(connection, args.jobs, args.rate, batch_size, wait_ms)
+            print(f"{batch_size:>5} {wait_ms:>7} {result['throughput']:>8.2f} {result['mean']:>8.2f} "
+                  f"{result['p95']:>8.2f} {result['batch']:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
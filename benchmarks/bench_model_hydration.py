@@ -0,0 +1,100 @@
+"""
+Benchmark: memory and throughput of loading Chunk models.
+
+Compares
+  - materializing every document with list(find()) and building a
+    __dict__-based model per document (the previous pattern), and
+  - streaming slotted Chunk objects with Chunk.iter_from_cursor().
+
+Peak memory is measured with tracemalloc while all objects are alive
+(materialized) or while the stream is walked one object at a time.
+
+Requires a running mongod. Documents are written to a scratch database that
+is dropped afterwards.
+
+Usage:
+    python -m benchmarks.bench_model_hydration [--uri mongodb://127.0.0.1:27017] [--count 20000]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import pymongo
+from bson import ObjectId
+
+import db.database as database
+from db.database import Chunk
+
+SCRATCH_DB = 'newsletter_to_podcast_bench'
+
+
+class DictChunk:
+    """The Chunk model as it was before __slots__, for comparison."""
+
+    def __init__(self, article_id, chunk_text, _id=None, chunk_summary=None, status='not recombined',
+                 created_at=None):
+        self._id = _id
+        self.article_id = article_id
+        self.chunk_text = chunk_text
+        self.chunk_summary = chunk_summary
+        self.status = status
+        self.created_at = created_at
+
+
+def materialize(article_id: ObjectId):
+    docs = list(database.db.chunks.find({"article_id": article_id}))
+    return [DictChunk(**doc) for doc in docs]
+
+
+def stream(article_id: ObjectId, batch_size: int):
+    count = 0
+    for chunk in Chunk.iter_from_cursor({"article_id": article_id}, batch_size=batch_size):
+        count += 1
+    return count
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(result) if isinstance(result, list) else result
+    del result
+    return count, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--uri', default='mongodb://127.0.0.1:27017')
+    parser.add_argument('--count', type=int, default=20000)
+    parser.add_argument('--size', type=int, default=1000, help='characters of chunk_text per document')
+    parser.add_argument('--batch-size', type=int, default=database.CURSOR_BATCH_SIZE)
+    args = parser.parse_args()
+
+    client = pymongo.MongoClient(args.uri)
+    client.drop_database(SCRATCH_DB)
+    database.db = client[SCRATCH_DB]
+    article_id = ObjectId()
+
+    try:
+        body = ('lorem ipsum dolor sit amet ' * (args.size // 27 + 1))[:args.size]
+        Chunk.save_many((Chunk(article_id=article_id, chunk_text=body) for _ in range(args.count)),
+                        upsert=False)
+        database.db.chunks.create_index('article_id')
+
+        rows = [('list(find()) + dict models', *measure(materialize, article_id)),
+                ('iter_from_cursor() slotted', *measure(stream, article_id, args.batch_size))]
+    finally:
+        client.drop_database(SCRATCH_DB)
+
+    print(f'{args.count} chunks of {args.size} chars, cursor batch size {args.batch_size}')
+    print(f'{"method":<28} {"docs":>7} {"seconds":>9} {"docs/s":>10} {"peak MB":>9}')
+    for label, count, elapsed, peak in rows:
+        print(f'{label:<28} {count:>7} {elapsed:>9.2f} {count / elapsed:>10.0f} {peak / 1e6:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
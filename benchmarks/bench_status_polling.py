@@ -0,0 +1,77 @@
+"""
+Benchmark: status polling throughput with and without a projection.
+
+Inserts articles with large raw_text and script fields into a scratch
+database, then polls them the way GET /status/{article_id} does, once
+fetching the full document and once with STATUS_PROJECTION.
+
+Usage:
+    python -m benchmarks.bench_status_polling [--uri mongodb://127.0.0.1:27017] [--text-kb 512]
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime
+
+import pymongo
+
+from api.routes.status import STATUS_PROJECTION
+from api.routes.episode import EPISODE_PROJECTION
+
+SCRATCH_DB = 'newsletter_to_podcast_bench'
+STAGES = ["normalize", "summarize", "assemble", "text_to_speech", "publish"]
+
+
+def seed(col, count: int, text_kb: int):
+    text = 'x' * (text_kb * 1024)
+    docs = [{
+        "title": f"Article {i}",
+        "raw_text": text,
+        "script": text,
+        "status": "ingested",
+        "pipeline_status": {stage: "pending" for stage in STAGES},
+        "created_at": datetime.now(),
+        "updated_at": datetime.now(),
+    } for i in range(count)]
+    return col.insert_many(docs).inserted_ids
+
+
+def poll(col, ids, polls: int, projection) -> float:
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for _ in range(polls):
+        col.find_one({"_id": rng.choice(ids)}, projection)
+    return polls / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--uri', default='mongodb://127.0.0.1:27017')
+    parser.add_argument('--articles', type=int, default=200)
+    parser.add_argument('--text-kb', type=int, default=512, help='size of raw_text and script per article')
+    parser.add_argument('--polls', type=int, default=2000)
+    args = parser.parse_args()
+
+    client = pymongo.MongoClient(args.uri)
+    client.drop_database(SCRATCH_DB)
+    col = client[SCRATCH_DB].articles
+    try:
+        ids = seed(col, args.articles, args.text_kb)
+        poll(col, ids, 100, STATUS_PROJECTION)  # warm the cache
+        results = [
+            ('full document', poll(col, ids, args.polls, None)),
+            ('episode projection', poll(col, ids, args.polls, EPISODE_PROJECTION)),
+            ('status projection', poll(col, ids, args.polls, STATUS_PROJECTION)),
+        ]
+    finally:
+        client.drop_database(SCRATCH_DB)
+
+    print(f'{args.articles} articles with {args.text_kb} KB raw_text and script, {args.polls} polls')
+    print(f'{"read":<20} {"polls/s":>10}')
+    for label, rate in results:
+        print(f'{label:<20} {rate:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Load test: request throughput of the status/episode routes under concurrency.
+
+Seeds one article through POST /ingest, then fires GET requests at
+increasing concurrency levels against a running API. With non-blocking
+database access, throughput should grow with concurrency until the pool or
+the server saturates, instead of staying flat.
+
+Usage:
+    uvicorn api.main:app --port 8000 &
+    python -m benchmarks.load_test_api [--url http://localhost:8000] [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def run_level(client: httpx.AsyncClient, path: str, concurrency: int, total: int):
+    latencies = []
+    remaining = total
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return total / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+async def main_async(args):
+    limits = httpx.Limits(max_connections=max(args.levels), max_keepalive_connections=max(args.levels))
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        response = await client.post('/ingest', json={
+            'title': 'Load test article',
+            'raw_text': 'lorem ipsum ' * (args.text_kb * 1024 // 12),
+            'source': 'load-test'
+        })
+        response.raise_for_status()
+        article_id = response.json()['article_id']
+
+        for route in ('status', 'episode'):
+            path = f'/{route}/{article_id}'
+            print(f'\nGET /{route}/{{article_id}} ({args.requests} requests per level)')
+            print(f'{"concurrency":>12} {"req/s":>9} {"p50 ms":>8} {"p99 ms":>8}')
+            for concurrency in args.levels:
+                rps, p50, p99 = await run_level(client, path, concurrency, args.requests)
+                print(f'{concurrency:>12} {rps:>9.0f} {p50 * 1000:>8.1f} {p99 * 1000:>8.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--text-kb', type=int, default=64, help='size of the seeded raw_text')
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -6,5 +6,12 @@ load_dotenv()
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 GCP_CREDENTIALS = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
 
-if not GEMINI_API_KEY or not GCP_CREDENTIALS:
-    raise RuntimeError('Missing environment variables')
\ No newline at end of file
+
+CREDENTIALS = {'GEMINI_API_KEY': GEMINI_API_KEY, 'GOOGLE_APPLICATION_CREDENTIALS': GCP_CREDENTIALS}
+
+
+def require_credentials(*names: str) -> None:
+    """Raise if any of the named credentials (all of them by default) is missing; call before using them."""
+    missing = [name for name in names or CREDENTIALS if not CREDENTIALS[name]]
+    if missing:
+        raise RuntimeError(f'Missing environment variables: {", ".join(missing)}')
@@ -8,7 +8,10 @@ This module provides:
 """
 
 import os
+from typing import List, Optional
+
 import redis
+import redis.asyncio
 from rq import Queue
 from dotenv import load_dotenv
 
@@ -29,6 +32,32 @@ redis_conn = redis.Redis(
     decode_responses=False  # RQ expects bytes
 )
 
+# Async client for the API's event loop (status cache reads, pub/sub),
+# created on first use; the API closes it on shutdown
+_async_redis_conn: Optional[redis.asyncio.Redis] = None
+
+
+def get_async_redis_conn() -> redis.asyncio.Redis:
+    """Return the process-wide async Redis client (responses decoded to str)."""
+    global _async_redis_conn
+    if _async_redis_conn is None:
+        _async_redis_conn = redis.asyncio.Redis(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            db=REDIS_DB,
+            password=REDIS_PASSWORD,
+            decode_responses=True
+        )
+    return _async_redis_conn
+
+
+async def close_async_redis_conn() -> None:
+    global _async_redis_conn
+    if _async_redis_conn is not None:
+        await _async_redis_conn.aclose()
+        _async_redis_conn = None
+
+
 # Queue definitions for the new service-based architecture
 INGEST_ARTICLE_QUEUE_NAME = 'ingest_article'
 NORMALIZE_QUEUE_NAME = 'normalize'
@@ -53,6 +82,35 @@ publish_episode_queue = Queue(PUBLISH_EPISODE_QUEUE_NAME, connection=redis_conn)
 ingestion_queue = Queue(INGESTION_QUEUE_NAME, connection=redis_conn)
 llm_queue = Queue(LLM_QUEUE_NAME, connection=redis_conn)
 
+# Priority lanes. Interactive API requests, scheduled ingestion runs and bulk
+# backfills of the article pipeline queues get separate queues, so a backfill
+# never sits in front of a user-facing request. The scheduled lane keeps the
+# plain queue name; the others are suffixed (normalize_interactive, ...).
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_SCHEDULED = 'scheduled'
+PRIORITY_BACKFILL = 'backfill'
+PRIORITY_CLASSES = [PRIORITY_INTERACTIVE, PRIORITY_SCHEDULED, PRIORITY_BACKFILL]
+DEFAULT_PRIORITY = PRIORITY_SCHEDULED
+
+LANED_QUEUE_NAMES = [
+    INGEST_ARTICLE_QUEUE_NAME,
+    NORMALIZE_QUEUE_NAME,
+    SUMMARIZE_CHUNKS_QUEUE_NAME,
+    ASSEMBLE_SUMMARY_QUEUE_NAME,
+    TEXT_TO_SPEECH_QUEUE_NAME,
+    PUBLISH_EPISODE_QUEUE_NAME,
+]
+
+
+def lane_queue_name(queue_name: str, priority: str = DEFAULT_PRIORITY) -> str:
+    """Name of the queue serving `priority` requests of `queue_name`."""
+    if priority not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority: {priority}. Available priorities: {PRIORITY_CLASSES}")
+    if priority == DEFAULT_PRIORITY or queue_name not in LANED_QUEUE_NAMES:
+        return queue_name
+    return f"{queue_name}_{priority}"
+
+
 # All queues (for worker management)
 ALL_QUEUES = {
     INGEST_ARTICLE_QUEUE_NAME: ingest_article_queue,
@@ -66,13 +124,20 @@ ALL_QUEUES = {
     LLM_QUEUE_NAME: llm_queue,
 }
 
+# Interactive and backfill lanes of the pipeline queues
+for _queue_name in LANED_QUEUE_NAMES:
+    for _priority in (PRIORITY_INTERACTIVE, PRIORITY_BACKFILL):
+        _lane_name = lane_queue_name(_queue_name, _priority)
+        ALL_QUEUES[_lane_name] = Queue(_lane_name, connection=redis_conn)
 
-def get_queue(queue_name: str) -> Queue:
+
+def get_queue(queue_name: str, priority: str = DEFAULT_PRIORITY) -> Queue:
     """
     Get a queue by name.
     
     Args:
         queue_name: Name of the queue
+        priority: Priority lane of the queue (ignored for queues without lanes)
         
     Returns:
         Queue instance
@@ -82,7 +147,13 @@ def get_queue(queue_name: str) -> Queue:
     """
     if queue_name not in ALL_QUEUES:
         raise ValueError(f"Unknown queue name: {queue_name}. Available queues: {list(ALL_QUEUES.keys())}")
-    return ALL_QUEUES[queue_name]
+    return ALL_QUEUES[lane_queue_name(queue_name, priority)]
+
+
+def get_lane_queues(queue_name: str) -> List[Queue]:
+    """All lanes of a queue, most urgent class first (just the queue if it has no lanes)."""
+    names = dict.fromkeys(lane_queue_name(queue_name, priority) for priority in PRIORITY_CLASSES)
+    return [get_queue(name) for name in names]
 
 
 def test_redis_connection() -> bool:
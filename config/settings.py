@@ -0,0 +1,139 @@
+"""
+Tunable settings shared by the services.
+
+Every value can be overridden through the environment (or a .env file),
+the same way the Redis connection is configured in config/redis_config.py.
+"""
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Streaming ingestion pipeline (services/ingestion/pipeline.py)
+INGEST_PIPELINE_QUEUE_SIZE = int(os.getenv('INGEST_PIPELINE_QUEUE_SIZE', 16))
+INGEST_SCRAPE_CONCURRENCY = int(os.getenv('INGEST_SCRAPE_CONCURRENCY', 4))
+INGEST_PERSIST_CONCURRENCY = int(os.getenv('INGEST_PERSIST_CONCURRENCY', 2))
+
+# Process pool for CPU-bound HTML extraction (services/ingestion/extraction.py)
+# 0 runs extraction inline in the calling process. At most EXTRACTION_WORKERS_MAX
+# processes, whatever the setting: every long-lived process has its own pool
+EXTRACTION_WORKERS_MAX = int(os.getenv('EXTRACTION_WORKERS_MAX', 4))
+EXTRACTION_WORKERS = min(int(os.getenv('EXTRACTION_WORKERS', os.cpu_count() or 1)), EXTRACTION_WORKERS_MAX)
+EXTRACTION_CHUNKSIZE = int(os.getenv('EXTRACTION_CHUNKSIZE', 4))
+EXTRACTION_START_METHOD = os.getenv('EXTRACTION_START_METHOD', 'spawn')
+
+# MongoDB
+MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://127.0.0.1:27017')
+MONGODB_DB_NAME = os.getenv('MONGODB_DB_NAME', 'newsletter_to_podcast')
+# Connection pool of the async client used by the API routes (db/aio.py)
+MONGO_ASYNC_MAX_POOL_SIZE = int(os.getenv('MONGO_ASYNC_MAX_POOL_SIZE', 100))
+# Connection pool and consistency settings of the blocking client (db/__init__.py)
+MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', 50))
+MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', 0))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv('MONGO_MAX_IDLE_TIME_MS', 300000))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 5000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 10000))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', 0)) or None  # 0 = no timeout
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 0)) or None  # 0 = wait forever
+MONGO_READ_PREFERENCE = os.getenv('MONGO_READ_PREFERENCE', 'primary')
+MONGO_WRITE_CONCERN = os.getenv('MONGO_WRITE_CONCERN', '1')  # a number or 'majority'
+MONGO_JOURNAL = os.getenv('MONGO_JOURNAL', 'false').lower() == 'true'  # require journaled writes
+
+# Large text fields (db/blob_store.py): compress above the first threshold,
+# move the compressed bytes to GridFS above the second
+BLOB_COMPRESS_THRESHOLD = int(os.getenv('BLOB_COMPRESS_THRESHOLD', 4096))
+BLOB_GRIDFS_THRESHOLD = int(os.getenv('BLOB_GRIDFS_THRESHOLD', 1024 * 1024))
+BLOB_ZSTD_LEVEL = int(os.getenv('BLOB_ZSTD_LEVEL', 3))
+
+# Retention (db/retention.py): TTL of ephemeral collections and job archival
+CHUNK_TTL_DAYS = int(os.getenv('CHUNK_TTL_DAYS', 14))
+SUMMARY_TTL_DAYS = int(os.getenv('SUMMARY_TTL_DAYS', 14))
+JOB_ARCHIVE_AFTER_DAYS = int(os.getenv('JOB_ARCHIVE_AFTER_DAYS', 7))
+JOB_ARCHIVE_BATCH_SIZE = int(os.getenv('JOB_ARCHIVE_BATCH_SIZE', 500))
+
+# Pipeline stages (services/pipeline/jobs.py)
+AUDIO_OUTPUT_DIR = os.getenv('AUDIO_OUTPUT_DIR', 'output/audio')
+# Public URL prefix of AUDIO_OUTPUT_DIR; published episodes get file:// URLs when unset
+AUDIO_BASE_URL = os.getenv('AUDIO_BASE_URL', '')
+LLM_MODEL_NAME = os.getenv('LLM_MODEL_NAME', 'jasonjxh/llama3.1-8B-podcast-model')
+
+# Worker autoscaler (services/supervisor/autoscaler.py)
+# Comma-separated queue=min:max worker counts
+WORKER_SCALING = os.getenv(
+    'WORKER_SCALING',
+    'ingestion=1:2,ingest_article=1:4,normalize=1:4,summarize_chunks=1:2,'
+    'assemble_summary=1:2,text_to_speech=1:2,publish_episode=1:1,llm=0:1'
+)
+# Wait time the autoscaler sizes each queue's workers for
+AUTOSCALER_TARGET_LATENCY_SEC = float(os.getenv('AUTOSCALER_TARGET_LATENCY_SEC', 60))
+AUTOSCALER_INTERVAL_SEC = float(os.getenv('AUTOSCALER_INTERVAL_SEC', 5))
+# Consecutive samples a queue must want fewer workers before one is drained
+AUTOSCALER_SCALE_DOWN_AFTER = int(os.getenv('AUTOSCALER_SCALE_DOWN_AFTER', 6))
+
+# Priority lanes (services/supervisor/lanes.py): how long a job of each class
+# may wait in its queue; workers serve the job closest to its deadline first
+INTERACTIVE_MAX_WAIT_SEC = float(os.getenv('INTERACTIVE_MAX_WAIT_SEC', 30))
+SCHEDULED_MAX_WAIT_SEC = float(os.getenv('SCHEDULED_MAX_WAIT_SEC', 15 * 60))
+BACKFILL_MAX_WAIT_SEC = float(os.getenv('BACKFILL_MAX_WAIT_SEC', 6 * 60 * 60))
+# Recent wait times kept per class for the percentiles in lane_wait_stats()
+LANE_WAIT_SAMPLES = int(os.getenv('LANE_WAIT_SAMPLES', 1000))
+
+# Idempotent enqueueing (utils/idempotency.py)
+# How long a job id stays claimed; duplicates within it collapse into the in-flight job
+IDEMPOTENCY_TTL_SEC = int(os.getenv('IDEMPOTENCY_TTL_SEC', 6 * 60 * 60))
+# Single-flight ingestion runs per sender (services/ingestion/scheduler.py)
+INGESTION_JOB_TIMEOUT_SEC = int(os.getenv('INGESTION_JOB_TIMEOUT_SEC', 600))
+# Released when the run finishes; expires on its own if a worker dies mid-run
+INGESTION_LOCK_TTL_SEC = int(os.getenv('INGESTION_LOCK_TTL_SEC', 900))
+
+# Micro-batching of LLM jobs (services/llm_worker/batching.py)
+# Most compatible jobs (same model and prompt type) run as one batch
+LLM_BATCH_SIZE = int(os.getenv('LLM_BATCH_SIZE', 8))
+# How long a worker waits for more compatible jobs before running a partial batch
+LLM_BATCH_WAIT_MS = int(os.getenv('LLM_BATCH_WAIT_MS', 50))
+# Most prompts (e.g. chunks across the batched articles) per model.generate call
+LLM_BATCH_MAX_PROMPTS = int(os.getenv('LLM_BATCH_MAX_PROMPTS', 16))
+
+# Retries and circuit breakers (utils/resilience.py)
+# Retry delays double from the base up to the cap, with jitter
+RETRY_BACKOFF_BASE_SEC = int(os.getenv('RETRY_BACKOFF_BASE_SEC', 10))
+RETRY_BACKOFF_MAX_SEC = int(os.getenv('RETRY_BACKOFF_MAX_SEC', 15 * 60))
+# A breaker opens after this many failures within the window...
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5))
+CIRCUIT_FAILURE_WINDOW_SEC = float(os.getenv('CIRCUIT_FAILURE_WINDOW_SEC', 60))
+# ...and lets a trial call through after staying open this long
+CIRCUIT_RESET_TIMEOUT_SEC = float(os.getenv('CIRCUIT_RESET_TIMEOUT_SEC', 60))
+
+# Metrics (utils/metrics.py): port of the standalone Prometheus exporter
+METRICS_EXPORTER_PORT = int(os.getenv('METRICS_EXPORTER_PORT', 9108))
+
+# Status cache (services/pipeline/status_cache.py): how long an article's cached
+# stage statuses outlive its last transition, the SSE keep-alive interval, and
+# how long an SSE stream stays open at most (clients reconnect for more)
+STATUS_CACHE_TTL_SEC = int(os.getenv('STATUS_CACHE_TTL_SEC', 24 * 60 * 60))
+STATUS_EVENTS_KEEPALIVE_SEC = float(os.getenv('STATUS_EVENTS_KEEPALIVE_SEC', 15))
+STATUS_EVENTS_MAX_SEC = float(os.getenv('STATUS_EVENTS_MAX_SEC', 60 * 60))
+
+# Tracing (utils/tracing.py): file that finished spans are appended to as JSON
+# lines; spans are not exported when unset
+TRACE_FILE = os.getenv('TRACE_FILE', '')
+
+# Batch ingestion (POST /ingest/batch): most articles per request
+INGEST_BATCH_MAX_ITEMS = int(os.getenv('INGEST_BATCH_MAX_ITEMS', 500))
+
+# Admission control (services/supervisor/admission.py)
+# Estimated end-to-end latency above which interactive articles are turned away
+# (429) and scheduled ones go to the backfill lane
+INGEST_MAX_LATENCY_SEC = float(os.getenv('INGEST_MAX_LATENCY_SEC', 30 * 60))
+# Queued and deferred pipeline jobs above which every article is turned away;
+# bounds Redis memory during bursts
+ADMISSION_MAX_PENDING_JOBS = int(os.getenv('ADMISSION_MAX_PENDING_JOBS', 50000))
+# Share of Redis maxmemory above which ingestion answers 503
+ADMISSION_REDIS_MEMORY_MAX_RATIO = float(os.getenv('ADMISSION_REDIS_MEMORY_MAX_RATIO', 0.9))
+# How long a backlog sample is reused
+ADMISSION_CACHE_SEC = float(os.getenv('ADMISSION_CACHE_SEC', 1))
+
+# List endpoints (GET /articles, /episodes, /jobs): page size by default and at most
+LIST_PAGE_SIZE_DEFAULT = int(os.getenv('LIST_PAGE_SIZE_DEFAULT', 50))
+LIST_PAGE_SIZE_MAX = int(os.getenv('LIST_PAGE_SIZE_MAX', 200))
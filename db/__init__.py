@@ -1,4 +1,182 @@
+"""
+MongoDB client factory.
+
+The client is created lazily on first use, once per process, with pool,
+timeout, read preference and write concern settings from config/settings.py.
+A pymongo client must not be shared across fork(): RQ work horses and
+process pools get a fresh client in the child instead of inheriting the
+parent's sockets and monitor threads.
+
+`db` keeps working as before (`db.articles`, `db["jobs"]`); it resolves to
+the current process's database on every access.
+
+pool_stats() reports connection pool utilization, to size pools per service.
+Commands run within a trace are recorded as spans (utils/tracing.py).
+"""
+
+import os
+import threading
+from typing import Dict, Optional
+
 import pymongo
+from pymongo.monitoring import ConnectionPoolListener
+
+from config.settings import (
+    MONGODB_URI,
+    MONGODB_DB_NAME,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_MAX_IDLE_TIME_MS,
+    MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_SOCKET_TIMEOUT_MS,
+    MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    MONGO_READ_PREFERENCE,
+    MONGO_WRITE_CONCERN,
+    MONGO_JOURNAL,
+)
+from utils.tracing import MongoTracingListener
+
+
+def client_options(max_pool_size: int = MONGO_MAX_POOL_SIZE) -> Dict:
+    """Keyword arguments shared by the blocking and async clients."""
+    w = int(MONGO_WRITE_CONCERN) if MONGO_WRITE_CONCERN.isdigit() else MONGO_WRITE_CONCERN
+    options = {
+        "maxPoolSize": max_pool_size,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "readPreference": MONGO_READ_PREFERENCE,
+        "w": w,
+    }
+    if MONGO_JOURNAL:
+        options["journal"] = True
+    return options
+
+
+class PoolStatsListener(ConnectionPoolListener):
+    """Counts connection pool events per server address."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools: Dict[str, Dict[str, int]] = {}
+
+    def _update(self, address, **deltas) -> None:
+        key = f"{address[0]}:{address[1]}"
+        with self._lock:
+            pool = self._pools.setdefault(key, {
+                "open": 0, "in_use": 0, "max_in_use": 0,
+                "checkouts": 0, "checkout_failures": 0, "clears": 0,
+            })
+            for name, delta in deltas.items():
+                pool[name] += delta
+            pool["max_in_use"] = max(pool["max_in_use"], pool["in_use"])
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {address: dict(pool) for address, pool in self._pools.items()}
+
+    def pool_created(self, event):
+        self._update(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._update(event.address, clears=1)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._update(event.address, open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._update(event.address, open=-1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._update(event.address, checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        self._update(event.address, in_use=1, checkouts=1)
+
+    def connection_checked_in(self, event):
+        self._update(event.address, in_use=-1)
+
+
+_client: Optional[pymongo.MongoClient] = None
+_pool_listener: Optional[PoolStatsListener] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> pymongo.MongoClient:
+    """Return this process's MongoClient, creating it on first use."""
+    global _client, _pool_listener
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _pool_listener = PoolStatsListener()
+                _client = pymongo.MongoClient(
+                    MONGODB_URI,
+                    event_listeners=[_pool_listener, MongoTracingListener()],
+                    **client_options()
+                )
+    return _client
+
+
+def get_db():
+    """Return the pipeline database on this process's client."""
+    return get_client()[MONGODB_DB_NAME]
+
+
+def pool_stats() -> Dict:
+    """
+    Connection pool utilization of this process's client.
+
+    Returns:
+        Dict with max_pool_size and, per server address, open connections,
+        connections in use (current and peak), checkouts, checkout failures
+        and pool clears
+    """
+    return {
+        "max_pool_size": MONGO_MAX_POOL_SIZE,
+        "pools": _pool_listener.snapshot() if _pool_listener is not None else {},
+    }
+
+
+def _reset_after_fork() -> None:
+    # Drop (do not close) the parent's client: closing would tear down sockets
+    # the parent is still using. The child builds its own on first use.
+    global _client, _pool_listener, _client_lock
+    _client = None
+    _pool_listener = None
+    _client_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class _LazyDatabase:
+    """Proxy that resolves to get_db() on every attribute or item access."""
+
+    def __getattr__(self, name):
+        return getattr(get_db(), name)
+
+    def __getitem__(self, name):
+        return get_db()[name]
+
+    def __repr__(self):
+        return f"<lazy database {MONGODB_DB_NAME!r}>"
+
 
-db_client = pymongo.MongoClient('mongodb://127.0.0.1:27017')
-db = db_client['newsletter_to_podcast']
\ No newline at end of file
+db = _LazyDatabase()
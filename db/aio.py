@@ -0,0 +1,54 @@
+"""
+Async MongoDB access for the FastAPI routes.
+
+The routes are `async def`, so they must not block the event loop on
+pymongo round trips. They use this module's AsyncMongoClient, which has its
+own connection pool, instead of the blocking module-level `db`.
+
+Usage:
+    from db.aio import get_async_db
+
+    article = await get_async_db().articles.find_one({"_id": article_id})
+"""
+
+import os
+from typing import Optional
+
+from pymongo import AsyncMongoClient
+
+from config.settings import MONGODB_URI, MONGODB_DB_NAME, MONGO_ASYNC_MAX_POOL_SIZE
+from db import client_options
+from utils.tracing import MongoTracingListener
+
+_async_client: Optional[AsyncMongoClient] = None
+
+
+def get_async_client() -> AsyncMongoClient:
+    """Return the process-wide async client, creating it on first use."""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncMongoClient(MONGODB_URI, event_listeners=[MongoTracingListener()],
+                                         **client_options(MONGO_ASYNC_MAX_POOL_SIZE))
+    return _async_client
+
+
+def get_async_db():
+    """Return the pipeline database on the async client."""
+    return get_async_client()[MONGODB_DB_NAME]
+
+
+async def close_async_client() -> None:
+    """Close the async client (called on API shutdown)."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
+
+def _reset_after_fork() -> None:
+    global _async_client
+    _async_client = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
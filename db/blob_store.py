@@ -0,0 +1,142 @@
+"""
+Compressed storage for large text fields.
+
+full_text, raw_text, chunk_text and script can be hundreds of kilobytes.
+Stored inline as plain strings they bloat the working set and every read of
+their parent document. encode_text() turns a large string into a compact
+blob document that replaces the string in the parent:
+
+    {"_blob": 1, "codec": "zstd", "sha256": "...", "length": 123456, "data": Binary(...)}
+
+Text shorter than BLOB_COMPRESS_THRESHOLD bytes stays a plain string. When
+the compressed bytes exceed BLOB_GRIDFS_THRESHOLD they move to GridFS
+(content-addressed by sha256, so identical texts share one file) and the
+parent keeps only the hash, length and file reference.
+
+decode_text() accepts both blob documents and plain strings, so existing
+documents keep working. The models decode through BlobTextField, lazily,
+the first time a caller reads the field.
+"""
+
+import asyncio
+import hashlib
+import zlib
+from typing import Optional, Union
+
+from bson import Binary, ObjectId
+from gridfs import AsyncGridFSBucket, GridFSBucket
+
+from config.settings import BLOB_COMPRESS_THRESHOLD, BLOB_GRIDFS_THRESHOLD, BLOB_ZSTD_LEVEL
+from db import get_db
+
+try:
+    import zstandard
+except ImportError:  # zlib fallback keeps the store usable without the optional dependency
+    zstandard = None
+
+GRIDFS_BUCKET = "blobs"
+DEFAULT_CODEC = "zstd" if zstandard is not None else "zlib"
+
+
+def is_blob(value) -> bool:
+    return isinstance(value, dict) and value.get("_blob") == 1
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=BLOB_ZSTD_LEVEL).compress(data)
+    return zlib.compress(data, 6)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed blobs")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "zlib":
+        return zlib.decompress(data)
+    raise ValueError(f"Unknown blob codec: {codec}")
+
+
+def encode_text(text: Optional[str], database=None) -> Union[str, dict, None]:
+    """
+    Encode a text field for storage.
+
+    Args:
+        text: Text to store; blob documents are passed through unchanged
+        database: Database holding the GridFS bucket (defaults to get_db())
+
+    Returns:
+        The original string if it is small, otherwise a blob document
+    """
+    if text is None or is_blob(text):
+        return text
+    raw = text.encode("utf-8")
+    if len(raw) < BLOB_COMPRESS_THRESHOLD:
+        return text
+
+    digest = hashlib.sha256(raw).hexdigest()
+    compressed = _compress(raw, DEFAULT_CODEC)
+    blob = {"_blob": 1, "codec": DEFAULT_CODEC, "sha256": digest, "length": len(text)}
+
+    if len(compressed) > BLOB_GRIDFS_THRESHOLD:
+        bucket = GridFSBucket(database if database is not None else get_db(),
+                              bucket_name=GRIDFS_BUCKET)
+        existing = next(iter(bucket.find({"filename": digest}).limit(1)), None)
+        blob["gridfs_id"] = existing._id if existing else bucket.upload_from_stream(digest, compressed)
+    else:
+        blob["data"] = Binary(compressed)
+    return blob
+
+
+def decode_text(value, database=None) -> Optional[str]:
+    """Decode a stored text field (blob document or plain string)."""
+    if not is_blob(value):
+        return value
+    if "data" in value:
+        compressed = bytes(value["data"])
+    else:
+        bucket = GridFSBucket(database if database is not None else get_db(),
+                              bucket_name=GRIDFS_BUCKET)
+        compressed = bucket.open_download_stream(value["gridfs_id"]).read()
+    return _decompress(compressed, value["codec"]).decode("utf-8")
+
+
+async def decode_text_async(value, database) -> Optional[str]:
+    """
+    decode_text for the async routes. GridFS reads go through the async client;
+    decompressing runs in a thread, so a large blob does not stall the event loop.
+    """
+    if not is_blob(value):
+        return value
+    if "data" in value:
+        return await asyncio.to_thread(decode_text, value)
+    bucket = AsyncGridFSBucket(database, bucket_name=GRIDFS_BUCKET)
+    stream = await bucket.open_download_stream(ObjectId(value["gridfs_id"]))
+    data = await stream.read()
+    return (await asyncio.to_thread(_decompress, data, value["codec"])).decode("utf-8")
+
+
+class BlobTextField:
+    """
+    Model attribute holding a possibly-encoded text field.
+
+    The stored value lives in the `_<name>` attribute. Reading the attribute
+    decodes (and caches) a blob on first access; to_dict() can pass the raw
+    value to encode_text() without decoding text nobody read.
+    """
+
+    def __set_name__(self, owner, name):
+        self.attr = f"_{name}"
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = getattr(obj, self.attr)
+        if is_blob(value):
+            value = decode_text(value)
+            setattr(obj, self.attr, value)
+        return value
+
+    def __set__(self, obj, value):
+        setattr(obj, self.attr, value)
@@ -1,13 +1,100 @@
 from . import db 
-from typing import Dict
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
 from bson import ObjectId
 from datetime import datetime
+from pymongo import InsertOne, ReplaceOne
+from pymongo.errors import BulkWriteError
+from .blob_store import BlobTextField, encode_text
 
 # The database contains collections that store data and metadata about articles, their summaries, 
 # along with the details of podcast episodes. 
+# Large text fields (script, full_text, chunk_text) are stored through db/blob_store.py and decoded
+# lazily on first read.
+# The models use __slots__ (no per-instance __dict__); a BlobTextField keeps its stored value in the
+# `_<name>` slot. Use iter_from_cursor() to walk many documents without loading them all at once.
 
-class Episode():
+BULK_WRITE_BATCH_SIZE = 1000
+CURSOR_BATCH_SIZE = 500
+
+class BulkSaveResult(NamedTuple):
+    id: ObjectId
+    ok: bool
+    error: Optional[str] = None
+
+def bulk_save(collection_name: str, docs: Iterable[Dict], upsert: bool = True,
+              batch_size: int = BULK_WRITE_BATCH_SIZE) -> List[BulkSaveResult]:
+    '''
+    Writes documents with unordered bulk_write calls of at most batch_size operations.
+    With upsert=True each document replaces (or creates) the one with the same _id,
+    otherwise documents are inserted and duplicates are reported as errors.
+    Returns one result per document, in input order.
+    '''
+    col = db[collection_name]
+    results = []
+    docs = iter(docs)
+    while True:
+        batch = list(islice(docs, batch_size))
+        if not batch:
+            break
+        if upsert:
+            ops = [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in batch]
+        else:
+            ops = [InsertOne(doc) for doc in batch]
+        errors = {}
+        try:
+            col.bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            # Unordered writes keep going; collect which documents failed
+            errors = {err["index"]: err.get("errmsg") for err in e.details.get("writeErrors", [])}
+        except Exception as e:
+            raise Exception(f'Could not bulk save to {collection_name}: {e}')
+        results.extend(
+            BulkSaveResult(doc["_id"], i not in errors, errors.get(i)) for i, doc in enumerate(batch)
+        )
+    return results
+
+class BulkSaveMixin:
+    __slots__ = ()
+
+    @classmethod
+    def save_many(cls, items: Iterable, upsert: bool = True,
+                  batch_size: int = BULK_WRITE_BATCH_SIZE) -> List[BulkSaveResult]:
+        '''
+        Stores many objects with batched bulk writes instead of one save() round trip each.
+        items may be a generator; it is consumed one batch at a time.
+        '''
+        return bulk_save(cls.collection_name, (item.to_dict() for item in items),
+                         upsert=upsert, batch_size=batch_size)
+
+class CursorMixin:
+    __slots__ = ()
+
+    @classmethod
+    def iter_from_cursor(cls, query: Dict, batch_size: int = CURSOR_BATCH_SIZE,
+                         projection: Optional[Dict] = None, sort: Optional[List] = None) -> Iterator:
+        '''
+        Yields one object per matching document, hydrated as the cursor is consumed.
+        Only batch_size documents are held at a time; fields left out by the projection are None.
+        '''
+        cursor = db[cls.collection_name].find(query, projection, batch_size=batch_size, sort=sort)
+        try:
+            for data in cursor:
+                yield cls._from_doc(data)
+        finally:
+            cursor.close()
+
+    @classmethod
+    def from_mongo(cls, _id: ObjectId):
+        data = db[cls.collection_name].find_one({"_id": _id})
+        if not data:
+            return None
+        return cls._from_doc(data)
+
+class Episode(BulkSaveMixin, CursorMixin):
     collection_name = "episodes"
+    __slots__ = ("_id", "episode_name", "episode_num", "newsletter", "date", "_script", "status")
+    script = BlobTextField()
 # The collection 'episodes' stores the data of each episode and contains items with the following structure:
 # {
 #     "_id": ObjectId(),
@@ -35,7 +122,7 @@ class Episode():
             "episode_num": self.episode_num,
             "newsletter": self.newsletter,
             "date": self.date,
-            "script": self.script,
+            "script": encode_text(self._script),
             "status": self.status
         }
 
@@ -44,15 +131,11 @@ class Episode():
         return cls(**data)
     
     @classmethod
-    def from_mongo(cls, article_id: ObjectId):
-        col = db[cls.collection_name]
-        data = col.find_one({"_id", article_id})
-        if not data:
-            return None
+    def _from_doc(cls, data: Dict):
         return cls(
             _id=data["_id"],
-            episode_name=data["episode_name"],
-            episode_num=data["episode_num"],
+            episode_name=data.get("episode_name"),
+            episode_num=data.get("episode_num"),
             newsletter=data.get("newsletter"),
             date=data.get("date"),
             script=data.get("script"),
@@ -77,8 +160,10 @@ class Episode():
         except Exception as e:
             raise Exception(f'Could not save episode to database: {e}')
         
-class Text():
+class Text(BulkSaveMixin, CursorMixin):
     collection_name = "texts"
+    __slots__ = ("_id", "episode_id", "newsletter", "_full_text", "status")
+    full_text = BlobTextField()
 # The collection 'articles' stores the data of each article and contains items with the following structure:
 # {
 #     "_id": ObjectId(),
@@ -102,7 +187,7 @@ class Text():
             "_id": self._id,
             "episode_id": self.episode_id,
             "newsletter": self.newsletter,
-            "full_text": self.full_text,
+            "full_text": encode_text(self._full_text),
             "status": self.status
         }
     
@@ -111,14 +196,10 @@ class Text():
         return cls(**data)
     
     @classmethod
-    def from_mongo(cls, article_id: ObjectId):
-        col = db[cls.collection_name]
-        data = col.find_one({"_id", article_id})
-        if not data:
-            return None
+    def _from_doc(cls, data: Dict):
         return cls(
             _id=data["_id"],
-            episode_id=data["episode_id"],
+            episode_id=data.get("episode_id"),
             newsletter=data.get("newsletter"),
             full_text=data.get("full_text"),
             status=data.get("status"),
@@ -141,8 +222,10 @@ class Text():
         except Exception as e:
             raise Exception(f'Could not save text to database: {e}')
     
-class Article():
+class Article(BulkSaveMixin, CursorMixin):
     collection_name = "articles"
+    __slots__ = ("_id", "episode_id", "url", "title", "newsletter", "_full_text", "status")
+    full_text = BlobTextField()
 # The collection 'articles' stores the data of each article and contains items with the following structure:
 # {
 #     "_id": ObjectId(),
@@ -170,7 +253,7 @@ class Article():
             "url": self.url,
             "title": self.title,
             "newsletter": self.newsletter,
-            "full_text": self.full_text,
+            "full_text": encode_text(self._full_text),
             "status": self.status
         }
     
@@ -179,15 +262,11 @@ class Article():
         return cls(**data)
     
     @classmethod
-    def from_mongo(cls, article_id: ObjectId):
-        col = db[cls.collection_name]
-        data = col.find_one({"_id", article_id})
-        if not data:
-            return None
+    def _from_doc(cls, data: Dict):
         return cls(
             _id=data["_id"],
-            episode_id=data["episode_id"],
-            url=data["url"],
+            episode_id=data.get("episode_id"),
+            url=data.get("url"),
             title=data.get("title"),
             newsletter=data.get("newsletter"),
             full_text=data.get("full_text"),
@@ -211,8 +290,10 @@ class Article():
         except Exception as e:
             raise Exception(f'Could not save article to database: {e}')
 
-class Chunk:
+class Chunk(BulkSaveMixin, CursorMixin):
     collection_name="chunks"
+    __slots__ = ("_id", "article_id", "_chunk_text", "chunk_summary", "status", "created_at")
+    chunk_text = BlobTextField()
 # The collection 'chunks' stores the data of each chunk of an article for structured compression and contains items
 # with the following structure:
 # {
@@ -220,23 +301,27 @@ class Chunk:
 #     "article_id": article_id,
 #     "chunk_text": "...",
 #     "chunk_summary": "...",
-#     "status": "not recombined/recombined"
+#     "status": "not recombined/recombined",
+#     "created_at": datetime (chunks expire through a TTL index, see db/indexes.py)
 # }
     def __init__(self, article_id: ObjectId, chunk_text: str, 
-                 _id: ObjectId=None, chunk_summary: str=None, status: str='not recombined'):
+                 _id: ObjectId=None, chunk_summary: str=None, status: str='not recombined',
+                 created_at: datetime=None):
         self._id = _id if _id is not None else ObjectId()
         self.article_id = article_id
         self.chunk_text = chunk_text
         self.chunk_summary= chunk_summary
         self.status = status
+        self.created_at = created_at if created_at is not None else datetime.now()
 
     def to_dict(self):
         return {
             "_id": self._id,
             "article_id": self.article_id,
-            "chunk_text": self.chunk_text,
+            "chunk_text": encode_text(self._chunk_text),
             "chunk_summary": self.chunk_summary,
-            "status": self.status
+            "status": self.status,
+            "created_at": self.created_at
         }
     
     @classmethod
@@ -244,17 +329,14 @@ class Chunk:
         return cls(**data)
     
     @classmethod
-    def from_mongo(cls, article_id: ObjectId):
-        col = db[cls.collection_name]
-        data = col.find_one({"_id": article_id})
-        if not data:
-            return None
+    def _from_doc(cls, data: Dict):
         return cls(
             _id=data["_id"],
-            article_id = data["article_id"],
-            chunk_text = data["chunk_text"],
+            article_id = data.get("article_id"),
+            chunk_text = data.get("chunk_text"),
             chunk_summary = data.get("chunk_summary"),
-            status = data.get("status")
+            status = data.get("status"),
+            created_at = data.get("created_at")
         )
     
     def save(self):
@@ -274,25 +356,30 @@ class Chunk:
         except Exception as e:
             raise Exception(f'Could not save chunk to database: {e}')
         
-class Summary:
+class Summary(BulkSaveMixin, CursorMixin):
     collection_name = "summaries"
+    __slots__ = ("_id", "article_id", "summary_text", "created_at")
 # The collection 'summaries' stores the summaries of each article, which is the result of combining the compressed chunks. 
 # Items have the following structure:
 # {
 #     "_id": ObjectId(),
 #     "article_id": article_id,
 #     "summary": "...",
+#     "created_at": datetime (summaries expire through a TTL index, see db/indexes.py)
 # }
-    def __init__(self, article_id: ObjectId, _id: ObjectId=None, summary_text: str=None):
+    def __init__(self, article_id: ObjectId, _id: ObjectId=None, summary_text: str=None,
+                 created_at: datetime=None):
         self._id = _id if _id is not None else ObjectId()
         self.article_id = article_id
         self.summary_text = summary_text
+        self.created_at = created_at if created_at is not None else datetime.now()
 
     def to_dict(self):
         return {
             "_id": self._id,
             "article_id": self.article_id,
-            "summary_text": self.summary_text
+            "summary_text": self.summary_text,
+            "created_at": self.created_at
         }
     
     @classmethod
@@ -300,15 +387,12 @@ class Summary:
         return cls(**data)
     
     @classmethod
-    def from_mongo(cls, article_id: ObjectId):
-        col = db[cls.collection_name]
-        data = col.find_one({"_id": article_id})
-        if not data:
-            return None
+    def _from_doc(cls, data: Dict):
         return cls(
             _id = data["_id"],
-            article_id = data["article_id"],
-            summary_text = data["summary_text"]
+            article_id = data.get("article_id"),
+            summary_text = data.get("summary_text"),
+            created_at = data.get("created_at")
         )
     
     def save(self):
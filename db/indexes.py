@@ -0,0 +1,220 @@
+"""
+Declarative index registry for the pipeline collections.
+
+Every index the services rely on is declared in INDEXES and created
+idempotently with ensure_indexes(), which the API and workers call at
+startup. KNOWN_QUERIES lists the hot query shapes so their plans can be
+checked with explain(): a plan that scans the collection, or sorts in
+memory, is reported.
+
+Usage:
+    python -m db.indexes            # create missing indexes
+    python -m db.indexes --explain  # also check the plans of the known queries
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from config.settings import CHUNK_TTL_DAYS, SUMMARY_TTL_DAYS
+from db import db
+from services.pipeline.stages import STAGES
+
+_DAY = 24 * 60 * 60
+
+# IndexOptionsConflict: an index with this name exists with other options
+_INDEX_OPTIONS_CONFLICT = 85
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "texts": [
+        # create_script: find({"episode_id", "status"})
+        IndexModel([("episode_id", ASCENDING), ("status", ASCENDING)], name="episode_id_status"),
+    ],
+    "articles": [
+        IndexModel([("episode_id", ASCENDING), ("status", ASCENDING)], name="episode_id_status"),
+        # Email ingestion dedupes on the Gmail message id; API articles have none
+        IndexModel(
+            [("message_id", ASCENDING)],
+            name="message_id_unique",
+            unique=True,
+            partialFilterExpression={"message_id": {"$type": "string"}},
+        ),
+        # POST /ingest dedupes resubmitted articles on a hash of their content
+        IndexModel(
+            [("content_hash", ASCENDING)],
+            name="content_hash_unique",
+            unique=True,
+            partialFilterExpression={"content_hash": {"$type": "string"}},
+        ),
+        # GET /articles: newest first, by status or by the status of one stage
+        IndexModel([("status", ASCENDING), ("_id", DESCENDING)], name="status_id"),
+        *[
+            IndexModel([(f"pipeline_status.{stage}", ASCENDING), ("_id", DESCENDING)], name=f"{stage}_status_id")
+            for stage in STAGES
+        ],
+    ],
+    "episodes": [
+        # GET /episodes: newest first, by status
+        IndexModel([("status", ASCENDING), ("_id", DESCENDING)], name="status_id"),
+    ],
+    "jobs": [
+        # Ingestion and LLM job updates: find_one({"job_id"}); API jobs have no job_id
+        IndexModel(
+            [("job_id", ASCENDING)],
+            name="job_id_unique",
+            unique=True,
+            partialFilterExpression={"job_id": {"$type": "string"}},
+        ),
+        # Retention: finished jobs by completion time (db/retention.py)
+        IndexModel([("status", ASCENDING), ("metrics.completed_at", ASCENDING)], name="status_completed_at"),
+        # GET /jobs: newest first, by status or by type
+        IndexModel([("status", ASCENDING), ("_id", DESCENDING)], name="status_id"),
+        IndexModel([("type", ASCENDING), ("_id", DESCENDING)], name="type_id"),
+    ],
+    "chunks": [
+        IndexModel([("article_id", ASCENDING)], name="article_id"),
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=CHUNK_TTL_DAYS * _DAY),
+    ],
+    "summaries": [
+        IndexModel([("article_id", ASCENDING)], name="article_id"),
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=SUMMARY_TTL_DAYS * _DAY),
+    ],
+    "dead_letters": [
+        IndexModel([("job_id", ASCENDING)], name="job_id_unique", unique=True),
+        # python -m utils.dead_letter list/replay: dead jobs of a queue, most recent first
+        IndexModel([("status", ASCENDING), ("queue", ASCENDING), ("failed_at", ASCENDING)],
+                   name="status_queue_failed_at"),
+    ],
+    "jobs_archive": [
+        IndexModel([("job_id", ASCENDING)], name="job_id"),
+        IndexModel([("metrics.completed_at", ASCENDING)], name="completed_at"),
+    ],
+}
+
+# Sort of the list endpoints: newest first
+_NEWEST = [("_id", DESCENDING)]
+
+# (description, collection, filter, sort) for every hot query, with placeholder values
+KNOWN_QUERIES: List[Tuple[str, str, Dict, Optional[List]]] = [
+    ("create_script texts by episode", "texts", {"episode_id": ObjectId(), "status": "not processed"}, None),
+    ("articles by episode", "articles", {"episode_id": ObjectId(), "status": "text extracted"}, None),
+    ("articles by message id", "articles", {"message_id": {"$in": ["placeholder"]}}, None),
+    ("status/episode routes", "articles", {"_id": ObjectId()}, None),
+    ("ingest dedup by content hash", "articles", {"content_hash": "placeholder"}, None),
+    ("job updates", "jobs", {"job_id": "placeholder"}, None),
+    ("retention: finished jobs", "jobs", {"status": {"$in": ["completed", "failed"]},
+                                          "metrics.completed_at": {"$lt": datetime(2000, 1, 1)}}, None),
+    ("chunks by article", "chunks", {"article_id": ObjectId()}, None),
+    ("dead letters of a queue", "dead_letters", {"status": "dead", "queue": "placeholder"}, None),
+    ("summaries by article", "summaries", {"article_id": ObjectId()}, None),
+    ("list articles", "articles", {"_id": {"$lt": ObjectId()}}, _NEWEST),
+    ("list articles by status", "articles", {"status": "placeholder", "_id": {"$lt": ObjectId()}}, _NEWEST),
+    *[
+        (f"list articles by {stage} status", "articles",
+         {f"pipeline_status.{stage}": "failed", "_id": {"$lt": ObjectId()}}, _NEWEST)
+        for stage in STAGES
+    ],
+    ("list episodes by status", "episodes", {"status": "placeholder", "_id": {"$lt": ObjectId()}}, _NEWEST),
+    ("list jobs by status", "jobs", {"status": "failed", "_id": {"$lt": ObjectId()}}, _NEWEST),
+    ("list jobs by type", "jobs", {"type": "placeholder", "_id": {"$lt": ObjectId()}}, _NEWEST),
+]
+
+
+def ensure_indexes(database=None) -> Dict[str, List[str]]:
+    """
+    Create every registered index that does not exist yet.
+
+    Safe to call on every startup: creating an index that already exists with
+    the same definition is a no-op. A changed TTL is applied in place with
+    collMod; any other changed definition is reported (not dropped) so it
+    can be migrated by hand.
+
+    Returns:
+        Mapping of collection name to the index names now in place
+    """
+    database = database if database is not None else db
+    created = {}
+    for collection_name, models in INDEXES.items():
+        try:
+            created[collection_name] = database[collection_name].create_indexes(models)
+        except OperationFailure as e:
+            if e.code == _INDEX_OPTIONS_CONFLICT and _update_ttls(database, collection_name, models):
+                created[collection_name] = database[collection_name].create_indexes(models)
+            else:
+                print(f"Could not create indexes on {collection_name}: {e}")
+    return created
+
+
+def _update_ttls(database, collection_name: str, models: List[IndexModel]) -> bool:
+    """Apply changed expireAfterSeconds values with collMod. Returns True if any were updated."""
+    existing = {index["name"]: index for index in database[collection_name].list_indexes()}
+    updated = False
+    for model in models:
+        spec = model.document
+        ttl = spec.get("expireAfterSeconds")
+        current = existing.get(spec["name"])
+        if ttl is None or current is None or current.get("expireAfterSeconds") == ttl:
+            continue
+        database.command("collMod", collection_name, index={"name": spec["name"], "expireAfterSeconds": ttl})
+        updated = True
+    return updated
+
+
+def _plan_stages(plan: Dict) -> List[str]:
+    """Flatten the stage names of a winning plan tree."""
+    stages = [plan.get("stage")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(_plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return [stage for stage in stages if stage]
+
+
+def check_query_plans(database=None) -> List[Tuple[str, List[str], bool]]:
+    """
+    Run explain() for every known query.
+
+    Returns:
+        List of (description, plan stages, uses_index) tuples; a plan that
+        sorts in memory does not count as using an index
+    """
+    database = database if database is not None else db
+    report = []
+    for description, collection_name, query, sort in KNOWN_QUERIES:
+        cursor = database[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort).limit(50)
+        explain = cursor.explain()
+        stages = _plan_stages(explain["queryPlanner"]["winningPlan"])
+        report.append((description, stages, "COLLSCAN" not in stages and "SORT" not in stages))
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Create pipeline indexes and check query plans.")
+    parser.add_argument("--explain", action="store_true", help="check plans of the known hot queries")
+    args = parser.parse_args()
+
+    for collection_name, names in ensure_indexes().items():
+        print(f"{collection_name}: {', '.join(names)}")
+
+    if not args.explain:
+        return 0
+
+    print()
+    all_indexed = True
+    for description, stages, uses_index in check_query_plans():
+        all_indexed = all_indexed and uses_index
+        marker = "ok  " if uses_index else "SCAN"
+        print(f"[{marker}] {description}: {' -> '.join(stages)}")
+    return 0 if all_indexed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Retention for the ever-growing pipeline collections.
+
+- chunks and summaries are ephemeral: TTL indexes on created_at (declared
+  in db/indexes.py) let MongoDB expire them after CHUNK_TTL_DAYS /
+  SUMMARY_TTL_DAYS. Documents written before the TTL existed get a
+  created_at here, so they age out too.
+- jobs: finished jobs older than JOB_ARCHIVE_AFTER_DAYS move, in batches,
+  to a compact `jobs_archive` collection without their source text and
+  script, which keeps the live collection and its indexes small.
+
+Per-collection sizes are reported before and after a run.
+
+Usage:
+    python -m db.retention [--days 7] [--batch-size 500] [--dry-run]
+"""
+
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from pymongo import ReplaceOne
+
+from config.settings import JOB_ARCHIVE_AFTER_DAYS, JOB_ARCHIVE_BATCH_SIZE
+from db import db
+from db.indexes import ensure_indexes
+
+ARCHIVE_COLLECTION = "jobs_archive"
+TTL_COLLECTIONS = ["chunks", "summaries"]
+REPORTED_COLLECTIONS = ["jobs", ARCHIVE_COLLECTION, "chunks", "summaries"]
+
+# Fields kept in the archive; input.source_text and output.script are dropped
+ARCHIVE_PROJECTION = {
+    "job_id": 1,
+    "type": 1,
+    "stage": 1,
+    "article_id": 1,
+    "source": 1,
+    "input.prompt_type": 1,
+    "input.model": 1,
+    "status": 1,
+    "output.tokens_generated": 1,
+    "metrics": 1,
+    "error": 1,
+}
+
+
+def collection_sizes(names: List[str] = REPORTED_COLLECTIONS) -> Dict[str, Dict[str, int]]:
+    """Document count, data size, storage size and index size of each collection."""
+    sizes = {}
+    for name in names:
+        stats = next(db[name].aggregate([{"$collStats": {"storageStats": {}}}]), {})
+        storage = stats.get("storageStats", {})
+        sizes[name] = {
+            "count": storage.get("count", 0),
+            "size": storage.get("size", 0),
+            "storage_size": storage.get("storageSize", 0),
+            "index_size": storage.get("totalIndexSize", 0),
+        }
+    return sizes
+
+
+def backfill_ttl_fields(now: datetime = None) -> Dict[str, int]:
+    """Give TTL-managed documents without created_at a timestamp so they can expire."""
+    now = now or datetime.now()
+    return {
+        name: db[name].update_many({"created_at": {"$exists": False}}, {"$set": {"created_at": now}}).modified_count
+        for name in TTL_COLLECTIONS
+    }
+
+
+def archive_finished_jobs(older_than_days: int = JOB_ARCHIVE_AFTER_DAYS,
+                          batch_size: int = JOB_ARCHIVE_BATCH_SIZE,
+                          dry_run: bool = False) -> int:
+    """
+    Move completed and failed jobs finished before the cutoff to jobs_archive.
+
+    Each batch is upserted into the archive with one unordered bulk_write and
+    only then deleted from jobs, so an interrupted run never loses a job and
+    can simply be repeated.
+
+    Returns:
+        Number of jobs archived (or that would be, with dry_run)
+    """
+    cutoff = datetime.now() - timedelta(days=older_than_days)
+    query = {"status": {"$in": ["completed", "failed"]}, "metrics.completed_at": {"$lt": cutoff}}
+    if dry_run:
+        return db.jobs.count_documents(query)
+
+    archived = 0
+    while True:
+        batch = list(db.jobs.find(query, ARCHIVE_PROJECTION).limit(batch_size))
+        if not batch:
+            break
+        archived_at = datetime.now()
+        db[ARCHIVE_COLLECTION].bulk_write(
+            [ReplaceOne({"_id": job["_id"]}, {**job, "archived_at": archived_at}, upsert=True) for job in batch],
+            ordered=False
+        )
+        db.jobs.delete_many({"_id": {"$in": [job["_id"] for job in batch]}})
+        archived += len(batch)
+        print(f"Archived {archived} jobs...")
+    return archived
+
+
+def _print_sizes(title: str, sizes: Dict[str, Dict[str, int]]) -> None:
+    print(title)
+    print(f"  {'collection':<14} {'docs':>10} {'data MB':>9} {'storage MB':>11} {'index MB':>9}")
+    for name, size in sizes.items():
+        print(f"  {name:<14} {size['count']:>10} {size['size'] / 1e6:>9.1f} "
+              f"{size['storage_size'] / 1e6:>11.1f} {size['index_size'] / 1e6:>9.1f}")
+
+
+def run_retention(older_than_days: int = JOB_ARCHIVE_AFTER_DAYS,
+                  batch_size: int = JOB_ARCHIVE_BATCH_SIZE,
+                  dry_run: bool = False) -> Dict:
+    """Ensure TTL indexes, archive finished jobs and report sizes before and after."""
+    before = collection_sizes()
+    _print_sizes("Before:", before)
+
+    if dry_run:
+        print(f"Would archive {archive_finished_jobs(older_than_days, batch_size, dry_run=True)} jobs")
+        return {"before": before, "after": before, "archived": 0, "backfilled": {}}
+
+    ensure_indexes()
+    backfilled = backfill_ttl_fields()
+    archived = archive_finished_jobs(older_than_days, batch_size)
+
+    after = collection_sizes()
+    _print_sizes("After:", after)
+    print(f"Archived {archived} jobs; added created_at to {backfilled}")
+    return {"before": before, "after": after, "archived": archived, "backfilled": backfilled}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive finished jobs and expire ephemeral collections.")
+    parser.add_argument("--days", type=int, default=JOB_ARCHIVE_AFTER_DAYS, help="archive jobs finished this many days ago")
+    parser.add_argument("--batch-size", type=int, default=JOB_ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="only report sizes and how many jobs would move")
+    args = parser.parse_args()
+    run_retention(args.days, args.batch_size, args.dry_run)
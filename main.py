@@ -1,22 +1,35 @@
-import requests
+'''
+Script generator API and the helper steps of the manual newsletter flow.
+
+The API process only enqueues: POST /generate_script puts a job on the llm
+queue, where a worker with the model already loaded writes the script
+(services.pipeline.jobs.generate_script_job), and GET
+/generate_script/{job_id} returns it once done. Nothing heavy is imported
+at module level - Gmail, scraping, the database models and the LLM are
+imported by the helpers that use them - so the API starts in well under a
+second and holds no model weights.
+'''
+
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
 from pathlib import Path
-from typing import List
+from typing import List, TYPE_CHECKING
 from bson import ObjectId
 
-from auth.gmail_auth import get_gmail_service
-from services.ingestion.fetch_emails import get_latest_newsletter_text
-from services.ingestion.article_scraper import scrape_article, get_latest_newsletter_links
-
-from db import db
-from db.database import Episode, Article, Text
-from processing.script_generator import generate_script, load_model
+if TYPE_CHECKING:
+    from db.database import BulkSaveResult
 
 PROJECT_ROOT = Path(__file__).resolve().parent
 CLIENT_SECRET_FILE = PROJECT_ROOT / 'credentials' / 'gmail_oauth.json'
 
+# Dotted path so the API does not import the worker's dependencies
+GENERATE_SCRIPT_JOB = 'services.pipeline.jobs.generate_script_job'
+GENERATE_SCRIPT_TIMEOUT_SEC = 30 * 60
+# How long a written script can be fetched
+GENERATE_SCRIPT_RESULT_TTL_SEC = 24 * 60 * 60
+
 app = FastAPI(title="Podcast Script Generator API")
 
 class ScriptRequest(BaseModel):
@@ -28,75 +41,139 @@ class ScriptResponse(BaseModel):
     episode_id: str
     script: str
 
-model, tokenizer = load_model()
+class ScriptJobResponse(BaseModel):
+    job_id: str
+    episode_id: str
+    status: str
 
-@app.post("/generate_script")
+@app.post("/generate_script", response_model=ScriptJobResponse, status_code=202)
 def generate_script_endpoint(req: ScriptRequest):
-    '''API endpoint to generate script'''
+    '''Enqueue script generation on the llm queue; poll GET /generate_script/{job_id} for the script'''
+    from config.redis_config import LLM_QUEUE_NAME, get_queue
     try:
-        script = generate_script(req.source_text, model, tokenizer)
-        return ScriptResponse(
-            episode_id=req.episode_id,
-            script=script
+        job = get_queue(LLM_QUEUE_NAME).enqueue(
+            GENERATE_SCRIPT_JOB, req.source_text, req.max_tokens,
+            job_timeout=GENERATE_SCRIPT_TIMEOUT_SEC,
+            result_ttl=GENERATE_SCRIPT_RESULT_TTL_SEC,
+            meta={"episode_id": req.episode_id}
         )
-    except HTTPException as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f'Could not enqueue script generation: {e}')
+    return ScriptJobResponse(job_id=job.id, episode_id=req.episode_id, status=job.get_status(refresh=False))
+
+@app.get("/generate_script/{job_id}", response_model=ScriptResponse,
+         responses={202: {"model": ScriptJobResponse}})
+def get_script_endpoint(job_id: str):
+    '''The generated script once its job has finished; 202 while it is queued or running'''
+    from rq.exceptions import NoSuchJobError
+    from rq.job import Job, JobStatus
+    from config.redis_config import redis_conn
+    try:
+        job = Job.fetch(job_id, connection=redis_conn)
+    except NoSuchJobError:
+        raise HTTPException(status_code=404, detail=f'Unknown or expired job: {job_id}')
+    episode_id = job.meta.get("episode_id", "")
+    status = job.get_status()
+    if status == JobStatus.FINISHED:
+        return ScriptResponse(episode_id=episode_id, script=job.return_value())
+    if status in (JobStatus.FAILED, JobStatus.STOPPED, JobStatus.CANCELED):
+        raise HTTPException(status_code=500, detail=f'Script generation {status}')
+    return JSONResponse(status_code=202, content=ScriptJobResponse(
+        job_id=job_id, episode_id=episode_id, status=status
+    ).model_dump())
 
 # Works
 def fetch_links() -> List[str]:
+    from auth.gmail_auth import get_gmail_service
+    from services.ingestion.article_scraper import get_latest_newsletter_links
     gmail_service = get_gmail_service()
     newsletter_links = get_latest_newsletter_links(gmail_service, 'dan@tldrnewsletter.com')
     return newsletter_links
 
 # Works
 def fetch_text() -> List[str]:
+    from auth.gmail_auth import get_gmail_service
+    from services.ingestion.fetch_emails import get_latest_newsletter_text
     gmail_service = get_gmail_service()
     texts = get_latest_newsletter_text(gmail_service, 'dan@tldrnewsletter.com')
     return texts
 
 # Works
 def process_links(links: List[str], episode_name: str, episode_num: int) -> ObjectId:
+    from db.database import Episode, Article
+    from services.ingestion.article_scraper import scrape_article
     print('Creating/accessing episode...')
     episode = Episode(episode_name=episode_name, episode_num=episode_num)
     episode.save()
     print('Episode created and saved.')
     episode_id = episode._id
     print(f'Going through {len(links)} articles.')
-    i = 1
-    for link in links:
-        print(f'Processing article [{i}/{len(links)}].')
-        article = Article(episode_id=episode_id, url=link)
-        print(f'Scraping...')
-        article = scrape_article(article)
-        article.status = 'text extracted'
-        print('Article scraped.')
-        article.save()
-        print('Changes saved.')
-        i += 1
+
+    def scraped_articles():
+        for i, link in enumerate(links, start=1):
+            print(f'Processing article [{i}/{len(links)}].')
+            article = Article(episode_id=episode_id, url=link)
+            print(f'Scraping...')
+            article = scrape_article(article)
+            article.status = 'text extracted'
+            print('Article scraped.')
+            yield article
+
+    # Articles are written in batches as they are scraped
+    results = Article.save_many(scraped_articles(), batch_size=50)
+    _report_failed_saves(results)
     return episode._id
 
 # Works
 def save_texts(texts: List[str], episode_name: str, episode_num: int) -> ObjectId:
+    from db.database import Episode, Text
     print('Creating/accessing episode...')
     episode = Episode(episode_name=episode_name, episode_num=episode_num)
     episode.save()
     print('Episode created and saved.')
     episode_id = episode._id
     print(f'Going through {len(texts)} texts.')
-    for i, text in enumerate(texts, start=1):
-        print(f'Processing article [{i}/{len(texts)}].')
-        txt = Text(episode_id=episode_id, full_text=text)
-        txt.save()
-        print('Changes saved.')
+    results = Text.save_many(Text(episode_id=episode_id, full_text=text) for text in texts)
+    _report_failed_saves(results)
+    print('Changes saved.')
+    return episode._id
+
+def _report_failed_saves(results: List["BulkSaveResult"]) -> None:
+    failed = [result for result in results if not result.ok]
+    print(f'Saved {len(results) - len(failed)}/{len(results)} documents.')
+    for result in failed:
+        print(f'  Could not save {result.id}: {result.error}')
+
+def stream_articles(episode_name: str, episode_num: int) -> ObjectId:
+    '''
+    Streams articles from the latest newsletters straight into the database.
+    Unlike fetch_links + process_links, articles are stored as soon as they are scraped.
+    '''
+    from auth.gmail_auth import get_gmail_service
+    from db.database import Episode
+    from services.ingestion.pipeline import run_newsletter_pipeline
+    print('Creating/accessing episode...')
+    episode = Episode(episode_name=episode_name, episode_num=episode_num)
+    episode.save()
+    print('Episode created and saved.')
+    gmail_service = get_gmail_service()
+    stored = run_newsletter_pipeline(gmail_service, 'dan@tldrnewsletter.com', episode._id)
+    print(f'Stored {stored} articles.')
     return episode._id
 
 def create_script(episode_id: ObjectId, source_col: str):
+    '''Writes the script of an episode in this process, loading the model (minutes) first'''
+    from db import db
+    from db.blob_store import decode_text
+    from processing.script_generator import generate_script
+    from services.llm_worker.model import load_model
     cursor = db[source_col].find({"episode_id": episode_id, "status": "not processed"})
-    full_texts = ' '.join(text.get("full_text") for text in cursor)
+    full_texts = ' '.join(decode_text(text.get("full_text")) for text in cursor)
 
     if not full_texts.strip():
         raise ValueError("No text found for this episode")
 
+    model, tokenizer = load_model()
     script = generate_script(full_texts, model, tokenizer)
     return script
 
@@ -164,9 +241,13 @@ def main():
     # send_episode_email(summary, rss_url, audio_path)
 
 if __name__ == "__main__":
+    import time
+    import requests
+    from db import db
+    from db.blob_store import decode_text
     # text_doc = db["texts"].find_one()
     cursor = db["texts"].find({"episode_id": ObjectId("6959d00f98e8dc6cffe0f67b"), "status": "not processed"})
-    full_texts = ' '.join(text.get("full_text") for text in cursor)
+    full_texts = ' '.join(decode_text(text.get("full_text")) for text in cursor)
 
     if full_texts:
         episode_id = str(ObjectId("6959d00f98e8dc6cffe0f67b"))
@@ -178,6 +259,10 @@ if __name__ == "__main__":
                 "episode_id": episode_id
             }
         )
+        # The script is written by an llm worker; poll until it is done
+        while response.status_code == 202:
+            time.sleep(10)
+            response = requests.get(f"http://localhost:8000/generate_script/{response.json()['job_id']}")
         # print(response.json()["script"])
         print("Status Code:", response.status_code)
         print("Response:", response.json())
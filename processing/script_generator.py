@@ -1,8 +1,5 @@
-import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer
 from utils.files import get_file_text
 from pathlib import Path
-from db.database import db
 import time
 from datetime import datetime
 
@@ -229,6 +226,7 @@ def generate_script(source_material: str, model, tokenizer):
         raise
 
 if __name__=='__main__':
+    from services.llm_worker.model import load_model
     model, tokenizer = load_model()
     test_path = Path(__file__).resolve().parent / 'test_source_material.txt'
     print(generate_script(get_file_text(test_path), model, tokenizer))
@@ -1,8 +1,80 @@
+import re
+from typing import List
+
 from google.cloud import texttospeech as tts
 from pathlib import Path
+from config.config import require_credentials
 from utils.files import get_file_text
+from utils.resilience import circuit_breaker
+from utils.tracing import span
+
+_tts_client = None
+
+# The API rejects requests with more than 5000 bytes of input
+MAX_REQUEST_BYTES = 4500
+
+
+def get_tts_client() -> tts.TextToSpeechClient:
+    '''
+    Returns the Text-to-Speech client, creating it on first use, once the credentials are known to be set.
+    '''
+    global _tts_client
+    if _tts_client is None:
+        require_credentials('GOOGLE_APPLICATION_CREDENTIALS')
+        _tts_client = tts.TextToSpeechClient()
+    return _tts_client
+
+
+def split_for_synthesis(text: str, max_bytes: int = MAX_REQUEST_BYTES) -> List[str]:
+    '''
+    Splits text at sentence boundaries into pieces of at most max_bytes UTF-8 bytes.
+    '''
+    pieces = []
+    current = ''
+    for sentence in re.split(r'(?<=[.!?])\s+', text.strip()):
+        candidate = f'{current} {sentence}' if current else sentence
+        if len(candidate.encode('utf-8')) <= max_bytes:
+            current = candidate
+            continue
+        if current:
+            pieces.append(current)
+        # A single sentence longer than the limit is cut on whitespace
+        # (max_bytes // 4 characters always fit: UTF-8 uses at most 4 bytes per character)
+        while len(sentence.encode('utf-8')) > max_bytes:
+            cut = sentence.rfind(' ', 0, max_bytes // 4)
+            if cut <= 0:
+                cut = max_bytes // 4
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        current = sentence
+    if current:
+        pieces.append(current)
+    return pieces
 
-tts_client = tts.TextToSpeechClient()
+
+def synthesize_speech(text: str) -> bytes:
+    '''
+    Returns the MP3 audio of text, synthesizing long scripts piece by piece.
+    '''
+    voice = tts.VoiceSelectionParams(
+        language_code='en-US', ssml_gender=tts.SsmlVoiceGender.MALE
+    )
+    audio_config = tts.AudioConfig(
+        audio_encoding=tts.AudioEncoding.MP3
+    )
+    client = get_tts_client()
+    audio = b''
+    # While the API is down, fail fast and let the job retry later
+    breaker = circuit_breaker('tts')
+    for piece in split_for_synthesis(text):
+        with span('tts.synthesize', characters=len(piece)):
+            response = breaker.call(
+                client.synthesize_speech,
+                input=tts.SynthesisInput(text=piece), voice=voice, audio_config=audio_config
+            )
+        # MP3 frames are self-contained, so the pieces can be concatenated
+        audio += response.audio_content
+    return audio
 
 
 def main(text: str):
@@ -17,7 +89,7 @@ def main(text: str):
         audio_encoding=tts.AudioEncoding.MP3
     )
 
-    response = tts_client.synthesize_speech(
+    response = get_tts_client().synthesize_speech(
         input=synthesis_input, voice=voice, audio_config=audio_config
     )
 
@@ -1,11 +1,14 @@
-import trafilatura
 from typing import List, Tuple
+from urllib.parse import urlparse
 from playwright.sync_api import sync_playwright
 from utils.files import write_text_to_file
 from pathlib import Path
 from services.ingestion.fetch_emails import get_latest_newsletter_links
 from auth.gmail_auth import get_gmail_service
 from db.database import Article
+from services.ingestion.extraction import get_extraction_executor, extract_article
+from utils.resilience import CircuitOpenError, circuit_breaker
+from utils.tracing import span
 
 def scrape_article(article: Article) -> Article:
         try:
@@ -18,42 +21,41 @@ def scrape_article(article: Article) -> Article:
         except Exception as e:
             raise Exception(f'Could not scrape article: {e}')
         
-def extract_text_with_playwright(url: str) -> Tuple[str, str]:
-    '''
-    Given a url to an article, returns a tuple contain the title and text body.
-    '''
-    try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=False)
+def _fetch_page_html(url: str) -> str:
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=False)
+        try:
             page = browser.new_page()
             print('Going into page...')
             page.goto(url)
             print('Successfully entered page.')
-
-            html = page.content()
+            return page.content()
+        finally:
             browser.close()
 
-            print('Extracting title...')
-            title = None
-            metadata = trafilatura.extract_metadata(html)
-            if metadata:
-                title = metadata.title
-            print('Title extracted.')
-            
-            print('Extracing text...')
-            text = trafilatura.extract(
-                html,
-                include_tables=True,
-                include_comments=False
-            )
-            print('Text extracted.')
+def extract_text_with_playwright(url: str) -> Tuple[str, str]:
+    '''
+    Given a url to an article, returns a tuple contain the title and text body.
 
-            # Use extracted values, or fallback to defaults if None
-            title = title or 'Untitled'
-            text = text or ''
-            return title, text
+    Page loads go through a circuit breaker per site: once a site keeps
+    failing, its pages are skipped without launching a browser until the
+    breaker lets a trial load through.
+    '''
+    try:
+        with span('scrape.page', url=url):
+            html = circuit_breaker(f'scrape:{urlparse(url).netloc}').call(_fetch_page_html, url)
+
+        # Title and text extraction is CPU bound, so it runs on the extraction process pool
+        print('Extracting title and text...')
+        with span('scrape.extract'):
+            title, text = get_extraction_executor().submit(extract_article, html).result()
+        print('Title and text extracted.')
+        return title, text
+    except CircuitOpenError as e:
+        print(f'Skipping {url}: {e}')
+        return 'Untitled', ''
     except Exception as e:
-        print(f'Error scraping text {url}: {e}')
+        print(f'Error scraping text {url}: {type(e).__name__}: {e}')
         return 'Untitled', ''
     
 def save_articles_to_file(urls: List[str]) -> None:
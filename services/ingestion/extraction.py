@@ -0,0 +1,145 @@
+"""
+Process pool for CPU-bound HTML extraction.
+
+HTML-to-text conversion (trafilatura, BeautifulSoup) is pure-Python work that
+holds the GIL. Running it on the threads that also do network I/O serializes
+scraping and email processing under load, so the scrape and email paths
+submit raw HTML to a shared process pool instead.
+
+The pool belongs to the long-lived process that first uses it. A forked child,
+such as an RQ work horse running a single job, extracts inline instead: a pool
+of its own would cost a spawned interpreter per worker for every job.
+
+Usage:
+    executor = get_extraction_executor()
+    title, text = executor.submit(extract_article, html).result()
+    texts = list(executor.map(html_to_text, html_bodies))
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+from config.settings import (
+    EXTRACTION_WORKERS,
+    EXTRACTION_CHUNKSIZE,
+    EXTRACTION_START_METHOD,
+)
+
+
+def extract_article(html: str) -> Tuple[str, str]:
+    """
+    Extract the title and main text of a scraped article page.
+
+    Returns:
+        Tuple of (title, text), falling back to ('Untitled', '')
+    """
+    import trafilatura
+
+    title = None
+    metadata = trafilatura.extract_metadata(html)
+    if metadata:
+        title = metadata.title
+    text = trafilatura.extract(
+        html,
+        include_tables=True,
+        include_comments=False
+    )
+    return title or 'Untitled', text or ''
+
+
+def html_to_text(html: str) -> str:
+    """
+    Convert an HTML email body into whitespace-normalized plain text.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Remove script and style elements
+    for script in soup(["script", "style"]):
+        script.decompose()
+
+    text = soup.get_text()
+
+    # Clean up whitespace
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+
+class ExtractionExecutor:
+    """
+    Thin wrapper around a ProcessPoolExecutor for extraction functions.
+
+    With max_workers=0 work runs inline in the calling process, which keeps
+    tests and single-core deployments free of worker processes.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, chunksize: int = EXTRACTION_CHUNKSIZE,
+                 start_method: str = EXTRACTION_START_METHOD):
+        self.max_workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+        self.chunksize = chunksize
+        self._pool = None
+        if self.max_workers > 0:
+            # 'spawn' by default: the submitting processes run threads and hold
+            # Mongo/Redis clients, neither of which survive fork() cleanly
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(start_method)
+            )
+
+    def submit(self, fn: Callable, html: str) -> Future:
+        """Submit a single document."""
+        if self._pool is None:
+            future = Future()
+            try:
+                future.set_result(fn(html))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self._pool.submit(fn, html)
+
+    def map(self, fn: Callable, htmls: Iterable[str], chunksize: Optional[int] = None) -> Iterator:
+        """Apply fn to every document, sending them to workers in chunks. Results keep input order."""
+        if self._pool is None:
+            return map(fn, htmls)
+        return self._pool.map(fn, htmls, chunksize=chunksize or self.chunksize)
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+
+_executor: Optional[ExtractionExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_extraction_executor() -> ExtractionExecutor:
+    """Return the process-wide extraction executor, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ExtractionExecutor(max_workers=EXTRACTION_WORKERS)
+        return _executor
+
+
+def _reset_after_fork() -> None:
+    # A forked child (e.g. an RQ work horse) cannot use the parent's pool,
+    # and lives too short to pay for a pool of its own
+    global _executor
+    _executor = ExtractionExecutor(max_workers=0)
+
+
+def _shutdown() -> None:
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+atexit.register(_shutdown)
@@ -1,5 +1,6 @@
 import base64
-from typing import List, Dict
+from functools import partial
+from typing import List, Dict, Iterator, Optional
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 from urllib.parse import unquote, urlparse
@@ -7,6 +8,9 @@ from auth.gmail_auth import get_gmail_service
 import re
 import uuid
 from db import db
+from services.ingestion.extraction import get_extraction_executor, html_to_text
+from utils.resilience import CircuitOpenError, circuit_breaker
+from utils.tracing import span
 
 CLIENT_FILE = 'credentials.json'
 GMAIL_BASE_URL = 'https://gmail.googleapis.com/gmail/v1/users/me/messages'
@@ -61,41 +65,24 @@ def create_job(source_text, sender, subject, prompt_type="acquired"):
 
 def get_latest_newsletter_text(gmail_service, email):
     '''
-    Returns a list of all the links from latest newsletter emails
+    Returns a list of the cleaned text of the latest newsletter emails
     '''
     start_time = (datetime.now()-timedelta(days=1)).strftime('%Y/%m/%d')
     print('Fetching messages...')
     messages = _fetch_messages(gmail_service, email, start_time=start_time)
     print(f'Messages fetched. Found {len(messages)} messages.')
+    html_bodies = _fetch_html_bodies(gmail_service, messages)
+
+    # HTML-to-text conversion is CPU bound, so it runs on the extraction process pool
+    executor = get_extraction_executor()
     texts = []
-    for i, message in enumerate(messages):
-        try:
-            print(f'Processing message {i+1}/{len(messages)}...')
-            message_id = message.get('id')
-            # Get the full message object with payload
-            full_message = gmail_service.users().messages().get(userId='me', id=message_id).execute()
-            payload = full_message.get('payload')
-            print(f'  Payload acquired for message {i+1}.')
-            if payload:
-                print(f'  Extracting HTML body from message {i+1}...')
-                html_body = _extract_html_body(payload)
-                print(f'  HTML body acquired for message {i+1}.')
-                if html_body:
-                    print(f'  Extracting text from message {i+1}...')
-                    text = _extract_text_body(html_body)
-                    print(f'  Found text in message {i+1}.')
-                    text = text.replace(REMOVE_TEXT, '')
-                    text = re.split(r'Love TLDR\?', text)[0]
-                    if text:
-                        texts.append(text)
-                else:
-                    print(f'  No HTML body found in message {i+1}.')
-            else:
-                print(f'  No payload in message {i+1}.')
-        except Exception as e:
-            print(f'  Error processing message {i+1}: {type(e).__name__}: {e}')
+    for i, (text, error) in enumerate(executor.map(partial(_catching, _newsletter_text_from_html), html_bodies)):
+        if error:
+            print(f'  Error processing message body {i+1}: {error}')
+        elif text:
+            texts.append(text)
 
-    print(f'Total links extracted: {len(texts)}')
+    print(f'Total texts extracted: {len(texts)}')
     return texts
 
 def get_latest_newsletter_links(gmail_service, email):
@@ -106,34 +93,56 @@ def get_latest_newsletter_links(gmail_service, email):
     print('Fetching messages...')
     messages = _fetch_messages(gmail_service, email, start_time=start_time)
     print(f'Messages fetched. Found {len(messages)} messages.')
+    html_bodies = _fetch_html_bodies(gmail_service, messages)
+
+    executor = get_extraction_executor()
     all_links = []
+    for i, (links, error) in enumerate(executor.map(partial(_catching, _extract_link_from_html), html_bodies)):
+        if error:
+            print(f'  Error processing message body {i+1}: {error}')
+        else:
+            all_links.extend(links)
+
+    print(f'Total links extracted: {len(all_links)}')
+    return all_links
+
+def _fetch_html_bodies(gmail_service, messages: List[Dict]) -> List[str]:
+    '''
+    Fetches the html body of every message, skipping messages without one.
+    '''
+    html_bodies = []
     for i, message in enumerate(messages):
         try:
             print(f'Processing message {i+1}/{len(messages)}...')
-            message_id = message.get('id')
-            # Get the full message object with payload
-            full_message = gmail_service.users().messages().get(userId='me', id=message_id).execute()
-            payload = full_message.get('payload')
-            print(f'  Payload acquired for message {i+1}.')
-            if payload:
-                print(f'  Extracting HTML body from message {i+1}...')
-                html_body = _extract_html_body(payload)
-                print(f'  HTML body acquired for message {i+1}.')
-                if html_body:
-                    print(f'  Extracting links from message {i+1}...')
-                    links = _extract_link_from_html(html_body)
-                    print(f'  Found {len(links)} links in message {i+1}.')
-                    if links:
-                        all_links.extend(links)
-                else:
-                    print(f'  No HTML body found in message {i+1}.')
+            html_body = _get_message_html(gmail_service, message.get('id'))
+            if html_body:
+                html_bodies.append(html_body)
             else:
-                print(f'  No payload in message {i+1}.')
+                print(f'  No HTML body found in message {i+1}.')
+        except CircuitOpenError:
+            # Gmail is down: the remaining messages would fail the same way
+            raise
         except Exception as e:
             print(f'  Error processing message {i+1}: {type(e).__name__}: {e}')
+    return html_bodies
 
-    print(f'Total links extracted: {len(all_links)}')
-    return all_links
+def _catching(fn, html_body: str):
+    '''
+    Runs fn on one html body in the extraction pool and returns (result, error),
+    so that one malformed body does not throw away the rest of the batch.
+    '''
+    try:
+        return fn(html_body), None
+    except Exception as e:
+        return None, f'{type(e).__name__}: {e}'
+
+def _newsletter_text_from_html(html_body: str) -> str:
+    '''
+    Converts a newsletter html body to text and strips the TLDR header and footer.
+    '''
+    text = html_to_text(html_body)
+    text = text.replace(REMOVE_TEXT, '')
+    return re.split(r'Love TLDR\?', text)[0]
         
 
 # def init_gmail_service(client_file, api_name='gmail', api_version='v1', scopes=['https://mail.google.com/readonly']):
@@ -143,17 +152,32 @@ def _fetch_messages(gmail_service, target_email: str, start_time: str) -> List[D
     '''
     Fetches a list of all message objects from after a start_time.
     '''
-    all_messages = []
+    return list(_iter_messages(gmail_service, target_email, start_time))
+
+def _iter_messages(gmail_service, target_email: str, start_time: str) -> Iterator[Dict]:
+    '''
+    Lazily yields message objects from after a start_time, one result page at a time.
+    '''
     user_id = 'me'
     query = f'from:{target_email} after:{start_time}'
     request = gmail_service.users().messages().list(userId=user_id, q=query)
     while request is not None:
-        response = request.execute()
-        messages = response.get('messages', [])
-        all_messages.extend(messages)
+        with span('gmail.messages.list'):
+            response = circuit_breaker('gmail').call(request.execute)
+        yield from response.get('messages', [])
         request = gmail_service.users().messages().list_next(request, response)
 
-    return all_messages
+def _get_message_html(gmail_service, message_id: str) -> Optional[str]:
+    '''
+    Fetches a single message and returns its decoded html body, or None if it has none.
+    '''
+    request = gmail_service.users().messages().get(userId='me', id=message_id)
+    with span('gmail.messages.get'):
+        full_message = circuit_breaker('gmail').call(request.execute)
+    payload = full_message.get('payload')
+    if not payload:
+        return None
+    return _extract_html_body(payload)
 
 def _extract_text_body(payload) -> str:
     '''
@@ -166,22 +190,7 @@ def _extract_text_body(payload) -> str:
     try:
         # If it's already a string (HTML), extract text from it
         if isinstance(payload, str):
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(payload, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # Get text
-            text = soup.get_text()
-            
-            # Clean up whitespace
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
-            
-            return text
+            return html_to_text(payload)
 
         if 'parts' in payload:
             for part in payload['parts']:
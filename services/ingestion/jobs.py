@@ -6,23 +6,44 @@ for processing email ingestion tasks.
 """
 
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Dict, Any
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from rq import Queue
 from auth.gmail_auth import get_gmail_service
-from services.ingestion.fetch_emails import get_latest_newsletter_text
+from services.ingestion.fetch_emails import (
+    _iter_messages,
+    _get_message_html,
+    _newsletter_text_from_html,
+)
+from config.redis_config import INGEST_ARTICLE_QUEUE_NAME, DEFAULT_PRIORITY, get_queue
+from services.pipeline.stages import enqueue_pipeline
+from services.supervisor.lanes import lane_meta
 from db import db
+from db.blob_store import encode_text
+from utils.resilience import retry_policy
 
+# Gmail fetches of a single article are retried with backoff before dead-lettering
+INGEST_ARTICLE_RETRIES = 5
 
-def process_email_ingestion(sender: str, subject: str = None) -> str:
+
+def process_email_ingestion(sender: str, subject: str = None, days: int = 1,
+                            priority: str = DEFAULT_PRIORITY) -> str:
     """
     Process email ingestion job.
     
-    Fetches emails from the specified sender and creates LLM jobs
-    for each newsletter text found.
+    Thin producer: lists new messages from the sender, inserts one article
+    stub per message with a single insert_many, and enqueues one lightweight
+    ingest_newsletter_article job per article so that fetching and parsing
+    spread across all ingest_article workers.
     
     Args:
         sender: Email address of the sender (e.g., 'dan@tldrnewsletter.com')
         subject: Optional subject filter
+        days: How many days of mail to look back over
+        priority: Priority lane of the article jobs; use 'backfill' for bulk
+            runs over many days so they do not delay interactive requests
         
     Returns:
         job_id: ID of the ingestion job created in the database
@@ -50,34 +71,57 @@ def process_email_ingestion(sender: str, subject: str = None) -> str:
         # Insert job record
         db.jobs.insert_one(ingestion_job)
         
-        # Fetch emails
+        # List messages (ids only) and skip the ones already ingested.
+        # Each job builds its own service: RQ runs every job in a fresh work horse
         gmail_service = get_gmail_service()
-        texts = get_latest_newsletter_text(gmail_service, sender)
-        
-        # TODO: Update to match new architecture
-        # In the new architecture, ingestion should:
-        # 1. Store raw article text in MongoDB
-        # 2. Queue normalize jobs (not LLM jobs)
-        # 
-        # This code is temporarily kept but needs refactoring for:
-        # - ingest_article queue → Normalizer service
+        start_time = (datetime.now() - timedelta(days=days)).strftime('%Y/%m/%d')
+        message_ids = [m.get('id') for m in _iter_messages(gmail_service, sender, start_time)]
+        known = {
+            doc["message_id"]
+            for doc in db.articles.find({"message_id": {"$in": message_ids}}, {"message_id": 1})
+        }
+        new_message_ids = [message_id for message_id in message_ids if message_id not in known]
         
         article_ids = []
-        for text in texts:
-            # Store article in database (temporary - needs proper article model)
-            article_doc = {
-                "raw_text": text,
-                "sender": sender,
-                "subject": subject or "Newsletter",
-                "status": "ingested",
-                "created_at": datetime.now()
-            }
-            result = db.articles.insert_one(article_doc)
-            article_ids.append(str(result.inserted_id))
+        if new_message_ids:
+            now = datetime.now()
+            stubs = [
+                {
+                    "message_id": message_id,
+                    "sender": sender,
+                    "subject": subject or "Newsletter",
+                    "raw_text": None,
+                    "priority": priority,
+                    "status": "pending_fetch",
+                    "created_at": now,
+                    "updated_at": now
+                }
+                for message_id in new_message_ids
+            ]
+            try:
+                db.articles.insert_many(stubs, ordered=False)
+                inserted = stubs
+            except BulkWriteError as e:
+                # Another run inserted some of these messages first (message_id is unique);
+                # only the stubs that went in are ours to enqueue
+                if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                    raise
+                duplicates = {error["index"] for error in e.details["writeErrors"]}
+                inserted = [stub for i, stub in enumerate(stubs) if i not in duplicates]
+            article_ids = [str(stub["_id"]) for stub in inserted]
             
-            # TODO: Queue normalize job instead of LLM job
-            # from config.redis_config import ingest_article_queue
-            # ingest_article_queue.enqueue(...)
+            # One job per article, pushed in a single Redis pipeline
+            get_queue(INGEST_ARTICLE_QUEUE_NAME, priority).enqueue_many([
+                Queue.prepare_data(
+                    ingest_newsletter_article,
+                    args=(article_id, priority),
+                    job_id=f"ingest_{article_id}",
+                    timeout=300,
+                    retry=retry_policy(INGEST_ARTICLE_RETRIES),
+                    meta=lane_meta(priority)
+                )
+                for article_id in article_ids
+            ])
         
         # Update ingestion job status
         db.jobs.update_one(
@@ -85,7 +129,8 @@ def process_email_ingestion(sender: str, subject: str = None) -> str:
             {"$set": {
                 "status": "completed",
                 "metrics.completed_at": datetime.now(),
-                "output.llm_jobs_created": llm_job_ids
+                "output.messages_found": len(message_ids),
+                "output.articles_created": article_ids
             }}
         )
         
@@ -104,6 +149,54 @@ def process_email_ingestion(sender: str, subject: str = None) -> str:
         raise
 
 
+def ingest_newsletter_article(article_id: str, priority: str = DEFAULT_PRIORITY) -> str:
+    """
+    Fetch and parse the newsletter behind one article stub.
+    
+    Runs on the ingest_article queue. Fills in the article's raw_text and
+    pipeline status, then enqueues its pipeline stage jobs.
+    
+    Args:
+        article_id: ID of the article stub created by process_email_ingestion
+        priority: Priority lane of the article's pipeline jobs
+        
+    Returns:
+        article_id
+    """
+    article_object_id = ObjectId(article_id)
+    article = db.articles.find_one({"_id": article_object_id}, {"message_id": 1})
+    if not article:
+        raise ValueError(f"Article not found: {article_id}")
+    
+    html_body = _get_message_html(get_gmail_service(), article["message_id"])
+    text = _newsletter_text_from_html(html_body) if html_body else ''
+    if not text:
+        db.articles.update_one(
+            {"_id": article_object_id},
+            {"$set": {"status": "empty", "updated_at": datetime.now()}}
+        )
+        return article_id
+    
+    db.articles.update_one(
+        {"_id": article_object_id},
+        {"$set": {
+            "raw_text": encode_text(text),
+            "status": "ingested",
+            "pipeline_status": {
+                "normalize": "pending",
+                "summarize": "pending",
+                "assemble": "pending",
+                "text_to_speech": "pending",
+                "publish": "pending"
+            },
+            "updated_at": datetime.now()
+        }}
+    )
+    
+    enqueue_pipeline(article_id, priority=priority)
+    return article_id
+
+
 def fetch_and_queue_newsletters(sender: str, subject: str = None) -> Dict[str, Any]:
     """
     Fetch newsletters and queue them for processing.
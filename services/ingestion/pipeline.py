@@ -0,0 +1,176 @@
+"""
+Streaming ingest-to-store pipeline.
+
+Newsletter ingestion runs as a chain of concurrent stages connected by
+bounded asyncio queues:
+
+    list messages -> fetch bodies -> extract links -> scrape -> persist
+
+Each stage pulls one item at a time from its inbox and blocks on a full
+outbox, so a slow stage (usually scraping) applies backpressure upstream
+instead of letting earlier stages buffer a whole issue in memory. The first
+article reaches MongoDB while the rest of the issue is still downloading.
+
+Blocking calls (Gmail client, Playwright, pymongo) run in worker threads via
+asyncio.to_thread. The Gmail client (httplib2) is not thread-safe, so every
+Gmail call, listing and fetching alike, runs on one dedicated thread.
+"""
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Iterator, Optional
+
+from bson import ObjectId
+
+from config.settings import (
+    INGEST_PIPELINE_QUEUE_SIZE,
+    INGEST_SCRAPE_CONCURRENCY,
+    INGEST_PERSIST_CONCURRENCY,
+)
+from db.database import Article
+from services.ingestion.extraction import get_extraction_executor
+from services.ingestion.fetch_emails import (
+    _iter_messages,
+    _get_message_html,
+    _extract_link_from_html,
+)
+
+# Sentinel passed down a queue once its producer has finished
+_DONE = object()
+
+
+def _default_scrape(article: Article) -> Article:
+    # Imported lazily so the pipeline can be used without Playwright installed
+    from services.ingestion.article_scraper import scrape_article
+    return scrape_article(article)
+
+
+def _default_persist(article: Article) -> ObjectId:
+    return article.save()
+
+
+async def _in_thread(executor: Optional[Executor], fn: Callable, *args):
+    """asyncio.to_thread, on `executor` if given, in the caller's context."""
+    if executor is None:
+        return await asyncio.to_thread(fn, *args)
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(executor, lambda: context.run(fn, *args))
+
+
+async def _produce(iterator: Iterator, outbox: asyncio.Queue, executor: Optional[Executor] = None) -> None:
+    """Feed items from a blocking iterator into the first queue."""
+    while True:
+        item = await _in_thread(executor, next, iterator, _DONE)
+        if item is _DONE:
+            break
+        await outbox.put(item)
+    await outbox.put(_DONE)
+
+
+async def _run_stage(fn: Callable[[object], Optional[Iterable]], inbox: asyncio.Queue,
+                     outbox: Optional[asyncio.Queue], concurrency: int = 1,
+                     executor: Optional[Executor] = None) -> None:
+    """
+    Run `concurrency` workers that apply `fn` to every item of `inbox`, in
+    threads of `executor` (default: asyncio's).
+
+    `fn` is a blocking callable returning an iterable of results (or None);
+    each result is forwarded to `outbox`. Errors are reported and the item is
+    dropped so that one bad message or article does not stop the issue.
+    """
+    async def worker():
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                # Leave the sentinel for sibling workers of this stage
+                await inbox.put(_DONE)
+                return
+            try:
+                results = await _in_thread(executor, fn, item)
+            except Exception as e:
+                print(f'  Pipeline stage {fn.__name__} failed: {type(e).__name__}: {e}')
+                continue
+            if outbox is not None:
+                for result in results or ():
+                    await outbox.put(result)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    if outbox is not None:
+        await outbox.put(_DONE)
+
+
+async def stream_newsletter_articles(gmail_service, sender: str, episode_id: ObjectId,
+                                     start_time: str = None,
+                                     scrape: Callable[[Article], Article] = _default_scrape,
+                                     persist: Callable[[Article], ObjectId] = _default_persist,
+                                     queue_size: int = INGEST_PIPELINE_QUEUE_SIZE,
+                                     scrape_concurrency: int = INGEST_SCRAPE_CONCURRENCY,
+                                     persist_concurrency: int = INGEST_PERSIST_CONCURRENCY) -> int:
+    """
+    Stream every article linked from recent newsletters into the database.
+
+    Args:
+        gmail_service: Authenticated Gmail API service
+        sender: Email address of the newsletter sender
+        episode_id: Episode the scraped articles belong to
+        start_time: Gmail 'after:' date (Y/m/d); defaults to 50 days ago
+        scrape: Callable filling in an Article's title and full_text
+        persist: Callable storing an Article
+        queue_size: Capacity of each queue between stages
+        scrape_concurrency: Number of concurrent scrapes
+        persist_concurrency: Number of concurrent database writers
+
+    Returns:
+        Number of articles persisted
+    """
+    if start_time is None:
+        start_time = (datetime.now() - timedelta(days=50)).strftime('%Y/%m/%d')
+
+    persisted = 0
+    persisted_lock = threading.Lock()
+
+    def fetch_body(message):
+        html = _get_message_html(gmail_service, message.get('id'))
+        return [html] if html else None
+
+    def extract_links(html):
+        return get_extraction_executor().submit(_extract_link_from_html, html).result()
+
+    def scrape_link(url):
+        article = scrape(Article(episode_id=episode_id, url=url))
+        article.status = 'text extracted'
+        return [article]
+
+    def store(article):
+        nonlocal persisted
+        persist(article)
+        with persisted_lock:
+            persisted += 1
+        print(f'  Stored article: {article.url}')
+
+    messages = asyncio.Queue(maxsize=queue_size)
+    bodies = asyncio.Queue(maxsize=queue_size)
+    links = asyncio.Queue(maxsize=queue_size)
+    articles = asyncio.Queue(maxsize=queue_size)
+
+    # Listing and fetching share the Gmail client: one thread makes all their calls
+    gmail_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gmail')
+    try:
+        await asyncio.gather(
+            _produce(_iter_messages(gmail_service, sender, start_time), messages, gmail_thread),
+            _run_stage(fetch_body, messages, bodies, executor=gmail_thread),
+            _run_stage(extract_links, bodies, links),
+            _run_stage(scrape_link, links, articles, concurrency=scrape_concurrency),
+            _run_stage(store, articles, None, concurrency=persist_concurrency),
+        )
+    finally:
+        gmail_thread.shutdown(wait=False)
+    return persisted
+
+
+def run_newsletter_pipeline(gmail_service, sender: str, episode_id: ObjectId, **kwargs) -> int:
+    """Synchronous entry point for stream_newsletter_articles."""
+    return asyncio.run(stream_newsletter_articles(gmail_service, sender, episode_id, **kwargs))
@@ -0,0 +1,79 @@
+"""
+Single-flight scheduling of email ingestion runs.
+
+At most one process_email_ingestion run per sender is queued or running at
+a time. schedule_ingestion() takes the sender's lock before enqueueing, and
+the run's success or failure callback releases it. If the lock is still
+held when the next cycle comes round, that cycle is skipped instead of
+fetching the same mail twice. The lock expires after
+INGESTION_LOCK_TTL_SEC in case a worker dies mid-run.
+
+The job id is derived from (sender, subject, days), so a manual run
+submitted while the scheduled one is in flight collapses into it. The
+in-flight job keeps its own lock token, so the lock just taken is released
+again at once.
+
+Usage:
+    job = schedule_ingestion("dan@tldrnewsletter.com")  # None if a run is in flight
+"""
+
+from typing import Optional
+
+from rq import Callback
+from rq.job import Job
+
+from config.redis_config import DEFAULT_PRIORITY, redis_conn, ingestion_queue
+from config.settings import INGESTION_JOB_TIMEOUT_SEC, INGESTION_LOCK_TTL_SEC
+from services.ingestion.jobs import process_email_ingestion
+from utils.idempotency import SingleFlightLock, enqueue_once, idempotency_key
+
+
+def ingestion_lock(sender: str, connection=None) -> SingleFlightLock:
+    return SingleFlightLock(f"ingestion:{sender}", INGESTION_LOCK_TTL_SEC, connection or redis_conn)
+
+
+def release_ingestion_lock(job: Job, connection, *args, **kwargs) -> None:
+    """RQ success/failure callback: free the sender's lock held by this run."""
+    sender, token = job.meta.get("lock_sender"), job.meta.get("lock_token")
+    if sender and token:
+        ingestion_lock(sender, connection).release(token)
+
+
+def schedule_ingestion(sender: str, subject: str = None, days: int = 1,
+                       priority: str = DEFAULT_PRIORITY, queue=None) -> Optional[Job]:
+    """
+    Enqueue an ingestion run for a sender unless one is already in flight.
+
+    Args:
+        sender: Email address to fetch newsletters from
+        subject: Optional subject filter
+        days: How many days of mail to look back over
+        priority: Priority lane of the article jobs
+        queue: Queue to enqueue on (defaults to the ingestion queue)
+
+    Returns:
+        The enqueued job, or None if the sender's previous run still holds the lock
+    """
+    queue = queue if queue is not None else ingestion_queue
+    lock = ingestion_lock(sender, queue.connection)
+    token = lock.acquire()
+    if token is None:
+        return None
+    try:
+        job = enqueue_once(
+            queue,
+            process_email_ingestion,
+            sender, subject, days, priority,
+            job_id=idempotency_key("ingestion", sender, subject, days),
+            job_timeout=INGESTION_JOB_TIMEOUT_SEC,
+            meta={"lock_sender": sender, "lock_token": token},
+            on_success=Callback(release_ingestion_lock),
+            on_failure=Callback(release_ingestion_lock),
+        )
+    except Exception:
+        lock.release(token)
+        raise
+    if job.meta.get("lock_token") != token:
+        # Collapsed into a run enqueued earlier, whose callback frees its own token only
+        lock.release(token)
+    return job
@@ -7,10 +7,12 @@ Or use the run_worker.sh script.
 
 from rq import Worker, Connection
 from config.redis_config import redis_conn, ingestion_queue
+from db.indexes import ensure_indexes
 
 
 def start_worker():
     """Start RQ worker for ingestion queue."""
+    ensure_indexes()
     with Connection(redis_conn):
         worker = Worker([ingestion_queue])
         worker.work()
@@ -0,0 +1,243 @@
+"""
+Micro-batching of compatible LLM jobs.
+
+RQ hands a worker one job at a time, but a model generates a batch of
+sequences in little more time than a single one. BatchingWorker dequeues a
+job as usual, then claims up to LLM_BATCH_SIZE - 1 compatible jobs from its
+queues, waiting up to LLM_BATCH_WAIT_MS for them to arrive. Jobs are
+compatible when they share a model and a prompt type (batch_key()).
+
+The first job of a batch computes the results of the whole batch through
+batched_result(), with the timeout of every job in the batch added up. The
+other jobs then run through RQ one after the other and pick up their
+precomputed result, so each still gets its own status, RQ result,
+dependents and callbacks. If the batch fails, its jobs fall back to running
+one at a time; if it times out, the first job fails and the others run one
+at a time under their own timeout.
+
+Claimed jobs are recorded in a hash owned by the worker until they run;
+worker maintenance puts back the ones claimed by workers that died.
+
+Usage:
+    rq worker -w services.llm_worker.batching.BatchingWorker \\
+        summarize_chunks_interactive summarize_chunks summarize_chunks_backfill llm
+"""
+
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import redis
+from rq import Queue, SimpleWorker, Worker, get_current_job
+from rq.job import Job, JobStatus
+from rq.timeouts import JobTimeoutException
+
+from config.settings import LLM_BATCH_SIZE, LLM_BATCH_WAIT_MS, LLM_MODEL_NAME
+from services.supervisor.lanes import DeadlineOrderingMixin
+from utils.dead_letter import DeadLetterMixin
+from utils.metrics import StageMetricsMixin
+from utils.tracing import TracingMixin
+
+# Job functions that can be batched, with the prompt type they use.
+# A job's meta may override both ("model", "prompt_type").
+BATCHABLE_JOBS = {
+    "services.pipeline.jobs.summarize_article_job": "chunk_summary",
+}
+
+CLAIMED_KEY = "pipeline:llm_batch:{}"
+# Queued jobs looked at per queue when filling a batch
+SCAN_DEPTH = 100
+_POLL_SEC = 0.005
+
+# Companions of the job being run, and results computed for them by its batch
+_batch: List[Job] = []
+_results: Dict[str, object] = {}
+
+
+def batch_key(job: Job) -> Optional[Tuple[str, str]]:
+    """(model, prompt type) of a job, or None if it cannot be batched."""
+    prompt_type = job.meta.get("prompt_type") or BATCHABLE_JOBS.get(job.func_name)
+    if prompt_type is None:
+        return None
+    return job.meta.get("model") or LLM_MODEL_NAME, prompt_type
+
+
+def batched_result(handler: Callable[[List], List], arg):
+    """
+    Result of the current job, computed in one batch with its companions.
+
+    Args:
+        handler: Function mapping a list of job inputs to their results, in order
+        arg: Input of the current job (its first argument)
+
+    Returns:
+        The current job's result
+    """
+    job = get_current_job()
+    if job is not None and job.id in _results:
+        return _results.pop(job.id)
+
+    companions = list(_batch) if job is not None else []
+    if not companions:
+        return handler([arg])[0]
+    try:
+        results = handler([arg] + [companion.args[0] for companion in companions])
+    except JobTimeoutException:
+        # The batch used up the time of all its jobs: they run one at a time
+        raise
+    except Exception as e:
+        print(f"Batch of {len(companions) + 1} jobs failed ({type(e).__name__}: {e}); running them one at a time")
+        return handler([arg])[0]
+    for companion, result in zip(companions, results[1:]):
+        _results[companion.id] = result
+    return results[0]
+
+
+def claim_compatible(queues: List[Queue], key: Tuple[str, str], limit: int, claimed_key: str,
+                     connection, job_class=Job, serializer=None) -> List[Tuple[Job, Queue]]:
+    """
+    Atomically take up to `limit` queued jobs with the given batch key off the queues.
+
+    The claimed job ids are recorded in claimed_key (job id -> queue name).
+    Returns the claimed jobs with their queues, in queue order.
+    """
+    if limit <= 0:
+        return []
+    with connection.pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch(*[queue.key for queue in queues])
+                candidates = []
+                for queue in queues:
+                    candidates.extend((job_id.decode(), queue) for job_id in pipe.lrange(queue.key, 0, SCAN_DEPTH - 1))
+                jobs = job_class.fetch_many([job_id for job_id, _ in candidates], connection=connection,
+                                            serializer=serializer)
+                claimed = [
+                    (job, queue)
+                    for job, (_, queue) in zip(jobs, candidates)
+                    if job is not None and batch_key(job) == key
+                ][:limit]
+                if not claimed:
+                    pipe.unwatch()
+                    return []
+                pipe.multi()
+                for job, queue in claimed:
+                    pipe.lrem(queue.key, 1, job.id)
+                    pipe.hset(claimed_key, job.id, queue.name)
+                pipe.execute()
+                return claimed
+            except redis.WatchError:
+                # A queue changed under us: look again
+                continue
+
+
+def requeue_orphaned_batches(connection, job_class=Job, serializer=None) -> int:
+    """Put back jobs claimed by batching workers that are no longer alive."""
+    live = {worker.name for worker in Worker.all(connection=connection)}
+    prefix = CLAIMED_KEY.format("")
+    requeued = 0
+    for key in connection.scan_iter(CLAIMED_KEY.format("*")):
+        key = key.decode()
+        if key[len(prefix):] in live:
+            continue
+        for job_id, queue_name in connection.hgetall(key).items():
+            job_id = job_id.decode()
+            try:
+                job = job_class.fetch(job_id, connection=connection, serializer=serializer)
+            except Exception:
+                continue
+            # A job the dead worker already ran is not put back
+            if job.get_status() == JobStatus.QUEUED:
+                Queue(queue_name.decode(), connection=connection, job_class=job_class,
+                      serializer=serializer).push_job_id(job_id, at_front=True)
+                requeued += 1
+        connection.delete(key)
+    return requeued
+
+
+class MicroBatchMixin:
+    """Run each batchable job together with the compatible jobs queued behind it."""
+
+    batch_size = LLM_BATCH_SIZE
+    batch_wait_ms = LLM_BATCH_WAIT_MS
+    # (job id, timeout) of the batch leader running with its batch's timeout
+    _leader_timeout: Optional[Tuple[str, Optional[int]]] = None
+
+    @property
+    def claimed_key(self) -> str:
+        return CLAIMED_KEY.format(self.name)
+
+    def fill_batch(self, job: Job) -> List[Tuple[Job, Queue]]:
+        """Claim compatible jobs for job's batch, waiting up to batch_wait_ms for them."""
+        key = batch_key(job)
+        if key is None or self.batch_size <= 1:
+            return []
+        companions = []
+        deadline = time.monotonic() + self.batch_wait_ms / 1000
+        while True:
+            companions += claim_compatible(self._ordered_queues, key, self.batch_size - 1 - len(companions),
+                                           self.claimed_key, self.connection, self.job_class, self.serializer)
+            remaining = deadline - time.monotonic()
+            if len(companions) >= self.batch_size - 1 or remaining <= 0:
+                return companions
+            time.sleep(min(_POLL_SEC, remaining))
+
+    def execute_job(self, job, queue):
+        try:
+            companions = self.fill_batch(job)
+        except Exception as e:
+            self.log.warning("Could not fill a batch for job %s: %s", job.id, e)
+            companions = []
+        if companions:
+            self.log.info("Worker %s: batching %s with %d compatible jobs", self.name, job.id, len(companions))
+
+        _batch[:] = [companion for companion, _ in companions]
+        timeout = job.timeout or self.queue_class.DEFAULT_TIMEOUT
+        if companions and timeout > 0:
+            # The leader computes the whole batch: it gets the time of all its jobs
+            self._leader_timeout = (job.id, job.timeout)
+            job.timeout = timeout * (len(companions) + 1)
+        try:
+            super().execute_job(job, queue)
+        finally:
+            _batch.clear()
+            self._restore_timeout(job)
+        try:
+            for companion, companion_queue in companions:
+                super().execute_job(companion, companion_queue)
+                self.connection.hdel(self.claimed_key, companion.id)
+        finally:
+            _results.clear()
+
+    def _restore_timeout(self, job):
+        """Put back the leader's own timeout, so the batch's is not saved with the job."""
+        if self._leader_timeout is not None and self._leader_timeout[0] == job.id:
+            job.timeout = self._leader_timeout[1]
+            self._leader_timeout = None
+
+    def handle_job_success(self, job, queue, started_job_registry):
+        self._restore_timeout(job)
+        return super().handle_job_success(job, queue, started_job_registry)
+
+    def handle_job_failure(self, job, queue, started_job_registry=None, exc_string=''):
+        self._restore_timeout(job)
+        return super().handle_job_failure(job, queue, started_job_registry=started_job_registry,
+                                          exc_string=exc_string)
+
+    def handle_job_retry(self, job, queue, retry, started_job_registry, execution):
+        self._restore_timeout(job)
+        return super().handle_job_retry(job, queue, retry, started_job_registry, execution)
+
+    def run_maintenance_tasks(self):
+        super().run_maintenance_tasks()
+        try:
+            requeued = requeue_orphaned_batches(self.connection, self.job_class, self.serializer)
+            if requeued:
+                self.log.info("Worker %s: requeued %d jobs claimed by dead workers", self.name, requeued)
+        except Exception as e:
+            self.log.warning("Could not requeue orphaned batch jobs: %s", e)
+
+
+class BatchingWorker(MicroBatchMixin, TracingMixin, StageMetricsMixin, DeadLetterMixin, DeadlineOrderingMixin,
+                     SimpleWorker):
+    """SimpleWorker (the model stays loaded) that serves its lanes by deadline and batches LLM jobs."""
+    pass
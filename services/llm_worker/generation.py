@@ -1,3 +1,8 @@
+import time
+
+from utils.metrics import record_generation
+from utils.tracing import record_span, span
+
 SYSTEM_PROMPT = """ Your job is to convert written articles into podcast scripts that sound natural when read aloud by a single host.
 
 The script must:
@@ -178,29 +183,66 @@ SOURCE MATERIAL:
 #     except Exception as e:
 #         raise
 
+def _record_generation(model, tokens: int, seconds: float) -> None:
+    try:
+        record_generation(getattr(model, "name_or_path", "unknown"), tokens, seconds)
+    except Exception as e:
+        # Metrics never fail a generation
+        print(f"Could not record generation metrics: {e}")
+
+class _FirstTokenTimer:
+    """Streamer for model.generate noting when the first new tokens come out, which ends the prefill."""
+
+    def __init__(self):
+        self.puts = 0
+        self.first_token_at = None
+
+    def put(self, value):
+        # The first put is the prompt itself
+        self.puts += 1
+        if self.puts == 2:
+            self.first_token_at = time.time()
+
+    def end(self):
+        pass
+
+def _generate(model, prompt_tokens: int, **kwargs):
+    """model.generate, recorded as prefill and decode spans. Returns the outputs and the seconds taken."""
+    timer = _FirstTokenTimer()
+    start = time.time()
+    outputs = model.generate(streamer=timer, **kwargs)
+    end = time.time()
+    first_token_at = timer.first_token_at or end
+    record_span("llm.prefill", start, first_token_at, prompt_tokens=prompt_tokens)
+    record_span("llm.decode", first_token_at, end, sequences=len(outputs))
+    return outputs, end - start
+
 # For Llama-8B
-def generate_script(source_material: str, model, tokenizer):
+def generate_text(system_prompt: str, user_prompt: str, model, tokenizer, max_new_tokens: int=2048) -> str:
     try:
         device = model.device  # Use the device the model is on
         
         # Create the message format
         messages = [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": build_acquired_user_prompt(source_material)}
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
         ]
 
         # Apply chat template
-        inputs = tokenizer.apply_chat_template(
-            messages,
-            tokenize=True,
-            add_generation_prompt=True,
-            return_tensors="pt"
-        ).to(device)
+        with span("llm.tokenize"):
+            inputs = tokenizer.apply_chat_template(
+                messages,
+                tokenize=True,
+                add_generation_prompt=True,
+                return_tensors="pt"
+            ).to(device)
 
         # Generate
-        outputs = model.generate(
+        outputs, seconds = _generate(
+            model,
+            inputs.shape[1],
             input_ids=inputs,
-            max_new_tokens=2048,
+            max_new_tokens=max_new_tokens,
             use_cache=True,
             temperature=0.7,
             do_sample=True,
@@ -212,10 +254,58 @@ def generate_script(source_material: str, model, tokenizer):
         # Decode only the new tokens (exclude the prompt)
         prompt_length = inputs.shape[1]
         generated_tokens = outputs[0][prompt_length:]
-        script = tokenizer.decode(generated_tokens, skip_special_tokens=True)
+        _record_generation(model, len(generated_tokens), seconds)
+        text = tokenizer.decode(generated_tokens, skip_special_tokens=True)
         
-        return script.strip()
+        return text.strip()
         
     except Exception as e:
-        print(f"Error generating script: {e}")
-        raise
\ No newline at end of file
+        print(f"Error generating text: {e}")
+        raise
+
+def generate_batch(system_prompt: str, user_prompts: list, model, tokenizer, max_new_tokens: int=2048) -> list:
+    """Generate one completion per user prompt in a single batched model.generate call."""
+    if not user_prompts:
+        return []
+    try:
+        with span("llm.tokenize", prompts=len(user_prompts)):
+            texts = [
+                tokenizer.apply_chat_template(
+                    [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
+                    tokenize=False,
+                    add_generation_prompt=True
+                )
+                for user_prompt in user_prompts
+            ]
+
+            # Pad on the left so every prompt ends where its generation starts
+            tokenizer.padding_side = "left"
+            if tokenizer.pad_token is None:
+                tokenizer.pad_token = tokenizer.eos_token
+            inputs = tokenizer(texts, return_tensors="pt", padding=True, add_special_tokens=False).to(model.device)
+
+        outputs, seconds = _generate(
+            model,
+            int(inputs["attention_mask"].sum()),
+            **inputs,
+            max_new_tokens=max_new_tokens,
+            use_cache=True,
+            temperature=0.7,
+            do_sample=True,
+            top_p=0.9,
+            repetition_penalty=1.1,
+            pad_token_id=tokenizer.pad_token_id
+        )
+
+        # Decode only the new tokens of each sequence
+        prompt_length = inputs["input_ids"].shape[1]
+        generated = int((outputs[:, prompt_length:] != tokenizer.pad_token_id).sum())
+        _record_generation(model, generated, seconds)
+        return [tokenizer.decode(output[prompt_length:], skip_special_tokens=True).strip() for output in outputs]
+
+    except Exception as e:
+        print(f"Error generating batch of {len(user_prompts)}: {e}")
+        raise
+
+def generate_script(source_material: str, model, tokenizer):
+    return generate_text(SYSTEM_PROMPT, build_acquired_user_prompt(source_material), model, tokenizer)
@@ -7,25 +7,22 @@ The new architecture uses separate services: Normalizer, Summarization, and Asse
 This module is kept temporarily but should be replaced with the new service-based approach.
 """
 
-import time
-from db import db
+from services.pipeline.dispatcher import run_dispatcher
 
 
 def worker_loop():
     """
     Legacy worker loop - DEPRECATED.
     
-    This function is kept for backward compatibility but is no longer
-    aligned with the new service-based architecture.
+    Kept for backward compatibility. Instead of polling the database every
+    5 seconds it now runs the change-stream dispatcher, which enqueues each
+    pipeline stage as soon as the previous one completes.
     
-    TODO: Replace with Normalizer, Summarization, and Assembly services.
+    Use `python -m services.pipeline.dispatcher` directly instead.
     """
     print("WARNING: This worker loop is deprecated.")
-    print("Please use the new service-based architecture instead.")
-    while True:
-        # Legacy polling - will be replaced with RQ workers
-        time.sleep(5)
-        print("Worker loop running (deprecated - no jobs processed)")
+    print("Running the change-stream stage dispatcher instead.")
+    run_dispatcher()
 
 
 def process_llm_job(job):
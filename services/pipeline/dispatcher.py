@@ -0,0 +1,211 @@
+"""
+Change-stream driven stage dispatcher.
+
+Subscribes to MongoDB change streams on `articles` and `jobs`. As soon as a
+stage of an article flips to "completed", the next stage's job is enqueued
+unless it already exists (articles enqueued with enqueue_pipeline() have
+their later stages deferred in RQ) or the article records that stage as
+running or completed (its RQ job may have expired since), so there is no
+polling delay between stages:
+
+    normalize -> summarize -> assemble -> text_to_speech -> publish
+
+Stage completions are read from `pipeline_status.<stage>` on inserted,
+replaced and updated articles, and from `jobs` documents that carry `stage` and `article_id`
+fields when their `status` becomes "completed".
+
+The resume token is stored in the `dispatcher_state` collection after every
+event, so a restarted dispatcher continues where it stopped. If the token
+has fallen out of the oplog, the dispatcher starts from the present and
+reconcile() re-enqueues anything that completed in the meantime.
+
+Change streams require MongoDB to run as a replica set (a single-node
+replica set is enough).
+
+Usage:
+    python -m services.pipeline.dispatcher
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+from rq.exceptions import NoSuchJobError
+from rq.job import Job
+
+from config.redis_config import DEFAULT_PRIORITY, redis_conn, get_queue
+from db import db
+from services.supervisor.lanes import lane_meta
+from services.pipeline.stages import (
+    STAGES, STAGE_QUEUES, STAGE_JOBS, STAGE_TIMEOUTS, STAGE_RETRIES, next_stage, stage_job_id
+)
+from utils.idempotency import enqueue_once
+from utils.resilience import retry_policy
+
+STATE_COLLECTION = "dispatcher_state"
+STATE_ID = "pipeline_dispatcher"
+
+# ChangeStreamHistoryLost: the stored resume token is no longer in the oplog
+_HISTORY_LOST = 286
+
+_WATCH_PIPELINE = [
+    {"$match": {
+        "operationType": {"$in": ["insert", "update", "replace"]},
+        "ns.coll": {"$in": ["articles", "jobs"]},
+    }},
+    # Only stage fields are needed; keep large texts out of every event
+    {"$project": {
+        "fullDocument.raw_text": 0,
+        "fullDocument.full_text": 0,
+        "fullDocument.script": 0,
+        "fullDocument.input": 0,
+        "fullDocument.output": 0,
+    }},
+]
+
+
+def enqueue_stage(stage: str, article_id: str, priority: str = DEFAULT_PRIORITY) -> Optional[Job]:
+    """
+    Enqueue a stage job for an article, in its priority lane, unless it is already queued or ran.
+
+    Returns:
+        The new job, or None if a job with the stage's id already exists or
+        the article records the stage as running or completed
+    """
+    job_id = stage_job_id(stage, article_id)
+    try:
+        Job.fetch(job_id, connection=redis_conn)
+        return None
+    except NoSuchJobError:
+        pass
+    # The job of a stage that ran is gone once its result expires; the article remembers
+    article = db.articles.find_one({"_id": ObjectId(article_id)}, {f"pipeline_status.{stage}": 1})
+    if article is not None and (article.get("pipeline_status") or {}).get(stage) in ("running", "completed"):
+        return None
+    # Two dispatchers (or a dispatcher and enqueue_pipeline) can race past the check above
+    job = enqueue_once(
+        get_queue(STAGE_QUEUES[stage], priority),
+        STAGE_JOBS[stage],
+        article_id,
+        job_id=job_id,
+        job_timeout=STAGE_TIMEOUTS[stage],
+        retry=retry_policy(STAGE_RETRIES[stage]),
+        meta=lane_meta(priority)
+    )
+    print(f"Enqueued {stage} for article {article_id}")
+    return job
+
+
+def completed_stages(change: Dict) -> List[str]:
+    """Stages that a change event marks as completed."""
+    coll = change["ns"]["coll"]
+    if change["operationType"] in ("insert", "replace") or coll == "jobs":
+        doc = change.get("fullDocument") or {}
+        if coll == "jobs":
+            if doc.get("status") == "completed" and doc.get("stage") in STAGES and doc.get("article_id"):
+                return [doc["stage"]]
+            return []
+        pipeline_status = doc.get("pipeline_status") or {}
+        return [stage for stage in STAGES if pipeline_status.get(stage) == "completed"]
+
+    updated = change.get("updateDescription", {}).get("updatedFields", {})
+    stages = []
+    for field, value in updated.items():
+        if field == "pipeline_status" and isinstance(value, dict):
+            stages.extend(stage for stage in STAGES if value.get(stage) == "completed")
+        elif field.startswith("pipeline_status.") and value == "completed":
+            stage = field.split(".", 1)[1]
+            if stage in STAGES:
+                stages.append(stage)
+    return stages
+
+
+def handle_change(change: Dict) -> List[Job]:
+    """Enqueue the next stage for every stage completed by a change event."""
+    doc = change.get("fullDocument") or {}
+    if change["ns"]["coll"] == "jobs":
+        article_id = str(doc.get("article_id"))
+    else:
+        article_id = str(change["documentKey"]["_id"])
+    priority = doc.get("priority") or DEFAULT_PRIORITY
+
+    jobs = []
+    for stage in completed_stages(change):
+        following = next_stage(stage)
+        if following is None:
+            continue
+        job = enqueue_stage(following, article_id, priority)
+        if job is not None:
+            jobs.append(job)
+    return jobs
+
+
+def reconcile() -> int:
+    """
+    Enqueue the next stage for articles whose last completed stage has no job.
+
+    Covers events missed while the dispatcher was down with an expired token.
+
+    Returns:
+        Number of jobs enqueued
+    """
+    enqueued = 0
+    for stage in STAGES[:-1]:
+        following = next_stage(stage)
+        cursor = db.articles.find(
+            {f"pipeline_status.{stage}": "completed", f"pipeline_status.{following}": "pending"},
+            {"_id": 1, "priority": 1}
+        )
+        for article in cursor:
+            priority = article.get("priority") or DEFAULT_PRIORITY
+            if enqueue_stage(following, str(article["_id"]), priority) is not None:
+                enqueued += 1
+    return enqueued
+
+
+def _load_resume_token():
+    state = db[STATE_COLLECTION].find_one({"_id": STATE_ID})
+    return state.get("resume_token") if state else None
+
+
+def _save_resume_token(token) -> None:
+    db[STATE_COLLECTION].update_one(
+        {"_id": STATE_ID},
+        {"$set": {"resume_token": token, "updated_at": datetime.now()}},
+        upsert=True
+    )
+
+
+def _watch(resume_token) -> Iterable[Dict]:
+    return db.watch(_WATCH_PIPELINE, full_document="updateLookup", resume_after=resume_token)
+
+
+def run_dispatcher() -> None:
+    """Dispatch stage transitions forever, resuming from the stored token."""
+    resume_token = _load_resume_token()
+    if resume_token is None:
+        print(f"No resume token; reconcile enqueued {reconcile()} jobs")
+
+    while True:
+        try:
+            with _watch(resume_token) as stream:
+                print("Watching articles and jobs for completed stages...")
+                for change in stream:
+                    try:
+                        handle_change(change)
+                    except Exception as e:
+                        print(f"Error dispatching change {change.get('_id')}: {type(e).__name__}: {e}")
+                    resume_token = stream.resume_token
+                    _save_resume_token(resume_token)
+        except OperationFailure as e:
+            if e.code != _HISTORY_LOST:
+                raise
+            print("Resume token expired; restarting from now and reconciling")
+            resume_token = None
+            _save_resume_token(None)
+            print(f"Reconcile enqueued {reconcile()} jobs")
+
+
+if __name__ == "__main__":
+    run_dispatcher()
@@ -0,0 +1,298 @@
+"""
+Job functions for the pipeline stages.
+
+These are executed by RQ workers on the stage queues listed in
+services/pipeline/stages.py:
+
+    normalize       split the article's text into sentence-bounded chunks
+    summarize       compress every chunk with the chunk summarization prompt
+    assemble        recombine the chunk summaries and write the podcast script
+    text_to_speech  synthesize the script to an MP3 file
+    publish         give the episode its audio URL and publish date
+
+Every stage records its progress in `pipeline_status.<stage>` ("running",
+then "completed" or "failed") and `pipeline_status.<stage>_updated_at`, and
+writes each transition through to the status cache
+(services/pipeline/status_cache.py).
+Stages are safe to re-run: each one replaces what a previous attempt wrote.
+
+The LLM stages keep the model loaded for the life of the worker process, so
+their workers must not fork a work horse per job. The autoscaler
+(services/supervisor/autoscaler.py) starts them as SimpleWorkers, and
+summarize_chunks as a BatchingWorker; by hand:
+
+    rq worker -w services.llm_worker.batching.BatchingWorker summarize_chunks
+    rq worker -w rq.worker.SimpleWorker assemble_summary
+
+generate_script_job runs on the llm queue for the script API (main.py), on
+the same terms.
+"""
+
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from rq import get_current_job
+
+from config.settings import AUDIO_OUTPUT_DIR, AUDIO_BASE_URL, LLM_MODEL_NAME, LLM_BATCH_MAX_PROMPTS
+from db import db
+from db.blob_store import decode_text, encode_text
+from db.database import Chunk, Summary
+from services.pipeline.status_cache import write_status
+from utils.files import get_file_text
+
+_model = None
+_tokenizer = None
+
+
+def _get_model() -> Tuple:
+    """Load the LLM once per worker process."""
+    global _model, _tokenizer
+    if _model is None:
+        from services.llm_worker.model import load_model
+        _model, _tokenizer = load_model(LLM_MODEL_NAME)
+    return _model, _tokenizer
+
+
+def set_stage_status(article_id: ObjectId, stage: str, status: str, final: bool = False, **fields) -> None:
+    """
+    Update one stage of an article's pipeline_status, with its timestamp.
+
+    Args:
+        article_id: ID of the article
+        stage: Stage name (a key of pipeline_status)
+        status: pending, running, completed or failed
+        final: The stage failed for good (its job has no retries left)
+        **fields: Other article fields to set in the same update
+    """
+    now = datetime.now()
+    db.articles.update_one(
+        {"_id": article_id},
+        {"$set": {
+            f"pipeline_status.{stage}": status,
+            f"pipeline_status.{stage}_updated_at": now,
+            "updated_at": now,
+            **fields
+        }}
+    )
+    try:
+        write_status(str(article_id), stage, status, now, final=final)
+    except Exception as e:
+        # MongoDB has the transition; status reads fall back to it
+        print(f"Could not cache {stage} status of {article_id}: {e}")
+
+
+@contextmanager
+def _stage(stage: str, article_id: str):
+    """Mark a stage running, then completed, or failed if the body raises."""
+    article_object_id = ObjectId(article_id)
+    set_stage_status(article_object_id, stage, "running")
+    try:
+        yield article_object_id
+    except Exception as e:
+        job = get_current_job()
+        set_stage_status(article_object_id, stage, "failed", final=job is None or not job.retries_left,
+                         error=f"{stage}: {e}")
+        raise
+    set_stage_status(article_object_id, stage, "completed")
+
+
+def _get_article(article_id: ObjectId, projection: dict) -> dict:
+    article = db.articles.find_one({"_id": article_id}, projection)
+    if not article:
+        raise ValueError(f"Article not found: {article_id}")
+    return article
+
+
+def normalize_article_job(article_id: str) -> int:
+    """
+    Split an article's text into chunks of about 200 words.
+
+    Args:
+        article_id: ID of the article to normalize
+
+    Returns:
+        Number of chunks created
+    """
+    # nltk is only needed (and downloads its tokenizer) on normalize workers
+    from utils.text_utils import chunk_by_sentence
+
+    with _stage("normalize", article_id) as article_object_id:
+        article = _get_article(article_object_id, {"raw_text": 1, "full_text": 1})
+        text = decode_text(article.get("raw_text")) or decode_text(article.get("full_text"))
+        chunks = chunk_by_sentence(text)
+        if not chunks:
+            raise ValueError("Article has no text to normalize")
+
+        db.chunks.delete_many({"article_id": article_object_id})
+        results = Chunk.save_many(
+            (Chunk(article_id=article_object_id, chunk_text=chunk_text) for chunk_text in chunks),
+            upsert=False
+        )
+        failed = [result for result in results if not result.ok]
+        if failed:
+            raise Exception(f"Could not save {len(failed)} of {len(results)} chunks: {failed[0].error}")
+        db.articles.update_one({"_id": article_object_id}, {"$set": {"chunk_count": len(chunks)}})
+    return len(chunks)
+
+
+def summarize_article_job(article_id: str) -> int:
+    """
+    Summarize every chunk of an article that has no summary yet.
+
+    On a BatchingWorker, the chunks of several articles waiting in the queue
+    are summarized together (services/llm_worker/batching.py).
+
+    Args:
+        article_id: ID of the article whose chunks to summarize
+
+    Returns:
+        Number of chunks summarized
+    """
+    from services.llm_worker.batching import batched_result
+
+    with _stage("summarize", article_id):
+        return batched_result(summarize_articles, article_id)
+
+
+def summarize_articles(article_ids: List[str]) -> List[int]:
+    """
+    Summarize the chunks without a summary of several articles, in batched generations.
+
+    Chunks summarized by an earlier, interrupted attempt are skipped.
+
+    Args:
+        article_ids: IDs of the articles whose chunks to summarize
+
+    Returns:
+        Number of chunks summarized per article, in the order of article_ids
+    """
+    from services.llm_worker.generation import generate_batch
+
+    model, tokenizer = _get_model()
+    prompt = get_file_text('chunk_summarize_prompt.txt')
+    object_ids = [ObjectId(article_id) for article_id in article_ids]
+    counts = dict.fromkeys(object_ids, 0)
+    # Loaded up front: generating can outlast an idle cursor's timeout
+    chunks = list(Chunk.iter_from_cursor({"article_id": {"$in": object_ids}, "chunk_summary": None},
+                                         projection={"article_id": 1, "chunk_text": 1}, sort=[("_id", 1)]))
+    for start in range(0, len(chunks), LLM_BATCH_MAX_PROMPTS):
+        batch = chunks[start:start + LLM_BATCH_MAX_PROMPTS]
+        summaries = generate_batch(prompt, [chunk.chunk_text for chunk in batch], model, tokenizer,
+                                   max_new_tokens=512)
+        db.chunks.bulk_write(
+            [UpdateOne({"_id": chunk._id}, {"$set": {"chunk_summary": summary}})
+             for chunk, summary in zip(batch, summaries)],
+            ordered=False
+        )
+        for chunk in batch:
+            counts[chunk.article_id] += 1
+    return [counts[object_id] for object_id in object_ids]
+
+
+def assemble_article_job(article_id: str) -> str:
+    """
+    Recombine an article's chunk summaries and generate its podcast script.
+
+    Args:
+        article_id: ID of the article whose summaries to assemble into a script
+
+    Returns:
+        ID of the stored Summary
+    """
+    from services.llm_worker.generation import generate_script, generate_text
+
+    with _stage("assemble", article_id) as article_object_id:
+        model, tokenizer = _get_model()
+        chunk_summaries = [
+            chunk.chunk_summary
+            for chunk in Chunk.iter_from_cursor({"article_id": article_object_id},
+                                                projection={"chunk_summary": 1}, sort=[("_id", 1)])
+        ]
+        if not chunk_summaries or not all(chunk_summaries):
+            raise ValueError("Article has chunks without summaries")
+
+        summary_text = generate_text(get_file_text('reassemble_article_prompt.txt'),
+                                     '\n\n'.join(chunk_summaries), model, tokenizer)
+        db.summaries.delete_many({"article_id": article_object_id})
+        summary = Summary(article_id=article_object_id, summary_text=summary_text)
+        summary.save()
+
+        script = generate_script(summary_text, model, tokenizer)
+        db.articles.update_one({"_id": article_object_id}, {"$set": {"script": encode_text(script)}})
+        db.chunks.update_many({"article_id": article_object_id}, {"$set": {"status": "recombined"}})
+    return str(summary._id)
+
+
+def text_to_speech_job(article_id: str) -> str:
+    """
+    Synthesize an article's script to <AUDIO_OUTPUT_DIR>/<article_id>.mp3.
+
+    Args:
+        article_id: ID of the article whose script to synthesize
+
+    Returns:
+        Path of the audio file
+    """
+    from processing.text_to_speech import synthesize_speech
+
+    with _stage("text_to_speech", article_id) as article_object_id:
+        script = decode_text(_get_article(article_object_id, {"script": 1}).get("script"))
+        if not script:
+            raise ValueError("Article has no script")
+
+        audio_path = Path(AUDIO_OUTPUT_DIR) / f"{article_id}.mp3"
+        audio_path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so a failed attempt leaves no partial audio
+        tmp_path = audio_path.with_suffix(".mp3.tmp")
+        tmp_path.write_bytes(synthesize_speech(script))
+        os.replace(tmp_path, audio_path)
+        db.articles.update_one({"_id": article_object_id}, {"$set": {"audio_path": str(audio_path)}})
+    return str(audio_path)
+
+
+def _audio_url(audio_path: str) -> str:
+    if AUDIO_BASE_URL:
+        return f"{AUDIO_BASE_URL.rstrip('/')}/{Path(audio_path).name}"
+    return Path(audio_path).resolve().as_uri()
+
+
+def publish_episode_job(article_id: str) -> Optional[str]:
+    """
+    Publish an article's episode: set its audio URL and publish date.
+
+    Args:
+        article_id: ID of the article to publish
+
+    Returns:
+        The audio URL
+    """
+    with _stage("publish", article_id) as article_object_id:
+        audio_path = _get_article(article_object_id, {"audio_path": 1}).get("audio_path")
+        if not audio_path or not Path(audio_path).is_file():
+            raise ValueError(f"Audio file not found: {audio_path}")
+
+        audio_url = _audio_url(audio_path)
+        db.articles.update_one(
+            {"_id": article_object_id},
+            {"$set": {"audio_url": audio_url, "published_at": datetime.now(), "status": "published"}}
+        )
+    return audio_url
+
+
+def generate_script_job(source_text: str, max_tokens: int = 2048) -> str:
+    """
+    Write a podcast script for source text (POST /generate_script in main.py).
+
+    Returns:
+        The script, kept as the job's result
+    """
+    from services.llm_worker.generation import SYSTEM_PROMPT, build_acquired_user_prompt, generate_text
+
+    model, tokenizer = _get_model()
+    return generate_text(SYSTEM_PROMPT, build_acquired_user_prompt(source_text), model, tokenizer,
+                         max_new_tokens=max_tokens)
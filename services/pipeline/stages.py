@@ -0,0 +1,185 @@
+"""
+Stage graph of the article pipeline.
+
+    normalize -> summarize -> assemble -> text_to_speech -> publish
+
+Each stage maps to its RQ queue and to the job function run by that
+stage's worker. Stage names match the keys of an article's pipeline_status.
+
+enqueue_pipeline() enqueues all stages of an article at once, each with
+depends_on on the previous one: RQ keeps a stage deferred until the stage
+before it finishes, and never runs it if that stage fails. Different
+articles move through the stages independently, on whichever workers
+consume each queue. The jobs go to the article's priority lane, and an
+optional deadline makes workers favour them as it nears.
+
+Stage job ids are derived from the article id, and enqueue_pipeline() goes
+through enqueue_once(): enqueueing an article that is already in flight
+returns its existing jobs instead of running the stages twice.
+
+enqueue_pipelines() enqueues the stages of many newly inserted articles in
+a single Redis transaction (POST /ingest/batch).
+"""
+
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from rq import Queue
+from rq.job import Job, JobStatus
+
+from config.redis_config import (
+    DEFAULT_PRIORITY,
+    get_queue,
+    NORMALIZE_QUEUE_NAME,
+    SUMMARIZE_CHUNKS_QUEUE_NAME,
+    ASSEMBLE_SUMMARY_QUEUE_NAME,
+    TEXT_TO_SPEECH_QUEUE_NAME,
+    PUBLISH_EPISODE_QUEUE_NAME,
+)
+from services.supervisor.lanes import lane_meta
+from utils.idempotency import claim, enqueue_once
+from utils.resilience import retry_policy
+from utils.tracing import inject
+
+STAGES = ["normalize", "summarize", "assemble", "text_to_speech", "publish"]
+
+STAGE_QUEUES = {
+    "normalize": NORMALIZE_QUEUE_NAME,
+    "summarize": SUMMARIZE_CHUNKS_QUEUE_NAME,
+    "assemble": ASSEMBLE_SUMMARY_QUEUE_NAME,
+    "text_to_speech": TEXT_TO_SPEECH_QUEUE_NAME,
+    "publish": PUBLISH_EPISODE_QUEUE_NAME,
+}
+
+# Dotted paths so the dispatcher does not import worker-only dependencies
+STAGE_JOBS = {
+    "normalize": "services.pipeline.jobs.normalize_article_job",
+    "summarize": "services.pipeline.jobs.summarize_article_job",
+    "assemble": "services.pipeline.jobs.assemble_article_job",
+    "text_to_speech": "services.pipeline.jobs.text_to_speech_job",
+    "publish": "services.pipeline.jobs.publish_episode_job",
+}
+
+# RQ job timeouts in seconds; the LLM stages get the longest
+STAGE_TIMEOUTS = {
+    "normalize": 600,
+    "summarize": 3600,
+    "assemble": 1800,
+    "text_to_speech": 900,
+    "publish": 300,
+}
+
+# Retries per stage, with jittered exponential backoff (utils/resilience.py).
+# Stages calling external services get the most; after the last retry a job
+# goes to the dead-letter queue (utils/dead_letter.py).
+STAGE_RETRIES = {
+    "normalize": 1,
+    "summarize": 2,
+    "assemble": 2,
+    "text_to_speech": 5,
+    "publish": 3,
+}
+
+
+def next_stage(stage: str) -> Optional[str]:
+    """Return the stage following `stage`, or None after the last one."""
+    index = STAGES.index(stage)
+    return STAGES[index + 1] if index + 1 < len(STAGES) else None
+
+
+def stage_job_id(stage: str, article_id: str) -> str:
+    """Deterministic RQ job id of a stage for an article (e.g. normalize_<article_id>)."""
+    return f"{stage}_{article_id}"
+
+
+def enqueue_pipeline(article_id: str, from_stage: str = STAGES[0], priority: str = DEFAULT_PRIORITY,
+                     deadline: Optional[datetime] = None) -> List[Job]:
+    """
+    Enqueue every stage of an article from `from_stage` on, chained with depends_on.
+
+    Args:
+        article_id: ID of the article
+        from_stage: First stage to enqueue
+        priority: Priority lane (interactive, scheduled or backfill)
+        deadline: Optional time by which each stage should have started
+
+    Returns:
+        The enqueued (or already in-flight) jobs, in stage order
+    """
+    jobs = []
+    previous = None
+    meta = lane_meta(priority, deadline)
+    for stage in STAGES[STAGES.index(from_stage):]:
+        previous = enqueue_once(
+            get_queue(STAGE_QUEUES[stage], priority),
+            STAGE_JOBS[stage],
+            article_id,
+            job_id=stage_job_id(stage, article_id),
+            job_timeout=STAGE_TIMEOUTS[stage],
+            retry=retry_policy(STAGE_RETRIES[stage]),
+            depends_on=previous,
+            meta=meta
+        )
+        jobs.append(previous)
+    return jobs
+
+
+def enqueue_pipelines(articles: Iterable[Tuple[str, str, Optional[datetime]]]) -> List[List[Job]]:
+    """
+    Enqueue every stage of many new articles in one Redis transaction.
+
+    Normalize jobs go through Queue.enqueue_many(); the later stages are
+    saved deferred on the stage before, as enqueue_pipeline() leaves them.
+    Every job id is claimed for enqueue_once(). Only for articles that were
+    never enqueued: ids already in flight would be overwritten.
+
+    Args:
+        articles: (article_id, priority, deadline) of each article
+
+    Returns:
+        The jobs of each article, in stage order
+    """
+    articles = list(articles)
+    if not articles:
+        return []
+    first_stage = {}
+    deferred = []
+    for article_id, priority, deadline in articles:
+        meta = inject(lane_meta(priority, deadline))
+        queue = get_queue(STAGE_QUEUES[STAGES[0]], priority)
+        first_stage.setdefault(queue.name, (queue, []))[1].append(Queue.prepare_data(
+            STAGE_JOBS[STAGES[0]],
+            args=(article_id,),
+            job_id=stage_job_id(STAGES[0], article_id),
+            timeout=STAGE_TIMEOUTS[STAGES[0]],
+            retry=retry_policy(STAGE_RETRIES[STAGES[0]]),
+            meta=meta
+        ))
+        for previous, stage in zip(STAGES, STAGES[1:]):
+            deferred.append(get_queue(STAGE_QUEUES[stage], priority).create_job(
+                STAGE_JOBS[stage],
+                args=(article_id,),
+                job_id=stage_job_id(stage, article_id),
+                timeout=STAGE_TIMEOUTS[stage],
+                retry=retry_policy(STAGE_RETRIES[stage]),
+                depends_on=stage_job_id(previous, article_id),
+                meta=meta,
+                status=JobStatus.DEFERRED
+            ))
+
+    enqueued = {}
+    connection = next(iter(first_stage.values()))[0].connection
+    with connection.pipeline() as pipe:
+        for queue, job_datas in first_stage.values():
+            for job_data in job_datas:
+                claim(pipe, job_data.job_id)
+            for job in queue.enqueue_many(job_datas, pipeline=pipe):
+                enqueued[job.id] = job
+        # The stages before are created in this same transaction, so none has finished yet
+        for job in deferred:
+            claim(pipe, job.id)
+            job.save(pipeline=pipe)
+            job.register_dependency(pipeline=pipe)
+            enqueued[job.id] = job
+        pipe.execute()
+    return [[enqueued[stage_job_id(stage, article_id)] for stage in STAGES] for article_id, _, _ in articles]
@@ -0,0 +1,94 @@
+"""
+Write-through cache of article stage statuses, with push updates.
+
+Workers record every stage transition in MongoDB (set_stage_status()), then
+write it through to a small Redis hash per article and publish it on the
+article's channel:
+
+    pipeline:status:{article_id}          hash: <stage>, <stage>_updated_at, created_at
+    pipeline:status:{article_id}:events   channel: {"stage", "status", "updated_at", "final"}
+
+GET /status/{article_id} serves the hash and only reads MongoDB when it is
+missing or incomplete, seeding it from the document it read.
+GET /status/{article_id}/events relays the channel as server-sent events,
+so clients no longer need to poll. A failed transition is "final" when the
+stage's job has no retries left: the pipeline will go no further.
+
+MongoDB stays the source of truth; a failed Redis write only costs a cache
+miss. A hash is complete once seeded (it has created_at): a transition
+written after the hash expired leaves it incomplete until the next read
+seeds it. Seeding uses HSETNX, so a snapshot read from MongoDB never
+overwrites a transition written while the read was in flight.
+"""
+
+import json
+from datetime import datetime
+from typing import Dict, Optional
+
+from config.redis_config import redis_conn
+from config.settings import STATUS_CACHE_TTL_SEC
+from services.pipeline.stages import STAGES
+
+STATUS_KEY = "pipeline:status:{}"
+STATUS_CHANNEL = "pipeline:status:{}:events"
+# Only a seeded hash has this field
+SEEDED_FIELD = "created_at"
+
+
+def _timestamp(value: Optional[datetime]) -> str:
+    return value.isoformat() if value else ""
+
+
+def _datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def write_status(article_id: str, stage: str, status: str, updated_at: datetime, connection=None,
+                 final: bool = False) -> None:
+    """Cache one stage transition of an article and publish it to its subscribers."""
+    connection = connection if connection is not None else redis_conn
+    key = STATUS_KEY.format(article_id)
+    event = {"stage": stage, "status": status, "updated_at": _timestamp(updated_at), "final": final}
+    with connection.pipeline() as pipe:
+        pipe.hset(key, mapping={stage: status, f"{stage}_updated_at": event["updated_at"]})
+        pipe.expire(key, STATUS_CACHE_TTL_SEC)
+        pipe.publish(STATUS_CHANNEL.format(article_id), json.dumps(event))
+        pipe.execute()
+
+
+def cached_article(fields: Dict[str, str]) -> Optional[Dict]:
+    """
+    The article's status fields, shaped like its MongoDB document.
+
+    Returns:
+        {"pipeline_status": {...}, "created_at": ...}, or None if the hash
+        was never seeded
+    """
+    if SEEDED_FIELD not in fields:
+        return None
+    pipeline_status = {}
+    for stage in STAGES:
+        pipeline_status[stage] = fields.get(stage, "pending")
+        pipeline_status[f"{stage}_updated_at"] = _datetime(fields.get(f"{stage}_updated_at"))
+    return {"pipeline_status": pipeline_status, "created_at": _datetime(fields[SEEDED_FIELD])}
+
+
+async def read_status(client, article_id: str) -> Optional[Dict]:
+    """Cached status of an article (see cached_article()), from the async client."""
+    return cached_article(await client.hgetall(STATUS_KEY.format(article_id)))
+
+
+async def seed_status(client, article_id: str, article: Dict) -> None:
+    """Cache the status fields of an article document read from MongoDB."""
+    pipeline_status = article.get("pipeline_status") or {}
+    fields = {SEEDED_FIELD: _timestamp(article.get("created_at"))}
+    for stage in STAGES:
+        fields[stage] = pipeline_status.get(stage, "pending")
+        fields[f"{stage}_updated_at"] = _timestamp(pipeline_status.get(f"{stage}_updated_at"))
+
+    key = STATUS_KEY.format(article_id)
+    async with client.pipeline() as pipe:
+        for field, value in fields.items():
+            pipe.hsetnx(key, field, value)
+        pipe.expire(key, STATUS_CACHE_TTL_SEC)
+        await pipe.execute()
@@ -0,0 +1,249 @@
+"""
+Admission control for ingestion: backpressure before the queues overflow.
+
+POST /ingest and POST /ingest/batch ask admit() before storing a new article
+(resubmitted duplicates add no work and skip it).
+It estimates how long a new article would take to get through every stage
+from a sample of the pipeline backlog, read in one pipelined round trip and
+reused for ADMISSION_CACHE_SEC:
+
+- the jobs waiting in each stage queue, per priority lane, and the deferred
+  jobs of articles already in flight;
+- the workers registered on each stage queue;
+- the mean run time of each stage's jobs (utils/metrics.py histograms);
+- Redis memory use against its maxmemory.
+
+A new job waits for the jobs ahead of it in its lane and the more urgent
+lanes, shared between the stage's workers, then runs. Summed over the
+stages, that is the article's estimated end-to-end latency. Then:
+
+    pending jobs >= ADMISSION_MAX_PENDING_JOBS   429, Retry-After
+    Redis memory above its ratio of maxmemory    503, Retry-After
+    interactive article over INGEST_MAX_LATENCY_SEC   429, Retry-After
+    scheduled article over INGEST_MAX_LATENCY_SEC     admitted to the backfill lane
+    backfill article over BACKFILL_MAX_WAIT_SEC       429, Retry-After
+
+Stages without run time history add no wait, so a cold pipeline is bounded
+by the pending job cap alone. If the backlog cannot be read, articles are
+admitted: enqueueing them reports the Redis failure anyway.
+
+Usage:
+    decision = await admit(request.priority)
+    if not decision.admitted:
+        raise HTTPException(decision.status_code, decision.reason,
+                            headers={"Retry-After": str(decision.retry_after)})
+"""
+
+import math
+import time
+from typing import Dict, NamedTuple, Optional
+
+from redis.exceptions import RedisError
+from rq import Queue
+from rq.registry import DeferredJobRegistry
+from rq.worker_registration import WORKERS_BY_QUEUE_KEY
+
+from config.redis_config import (
+    PRIORITY_CLASSES,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_SCHEDULED,
+    PRIORITY_BACKFILL,
+    get_async_redis_conn,
+    lane_queue_name,
+)
+from config.settings import (
+    INGEST_MAX_LATENCY_SEC,
+    BACKFILL_MAX_WAIT_SEC,
+    ADMISSION_MAX_PENDING_JOBS,
+    ADMISSION_REDIS_MEMORY_MAX_RATIO,
+    ADMISSION_CACHE_SEC,
+)
+from services.pipeline.stages import STAGES, STAGE_QUEUES
+from utils.metrics import STAGE_DURATION_KEY
+
+# Retry-After when there is nothing to base an estimate on, and at most
+DEFAULT_RETRY_AFTER_SEC = 30
+MAX_RETRY_AFTER_SEC = 600
+LATENCY_BUDGETS = {
+    PRIORITY_INTERACTIVE: INGEST_MAX_LATENCY_SEC,
+    PRIORITY_SCHEDULED: INGEST_MAX_LATENCY_SEC,
+    PRIORITY_BACKFILL: BACKFILL_MAX_WAIT_SEC,
+}
+
+
+class Backlog(NamedTuple):
+    # stage -> priority -> jobs waiting in that lane
+    depth: Dict[str, Dict[str, int]]
+    # Deferred jobs of every stage lane (later stages of articles in flight)
+    deferred: int
+    # stage -> workers registered on its queue
+    workers: Dict[str, int]
+    # stage -> mean run time of its finished jobs, if any finished yet
+    job_seconds: Dict[str, Optional[float]]
+    used_memory: Optional[int] = None
+    max_memory: Optional[int] = None
+
+    @property
+    def pending(self) -> int:
+        return self.deferred + sum(sum(lanes.values()) for lanes in self.depth.values())
+
+
+class Decision(NamedTuple):
+    admitted: bool
+    # Lane to enqueue in (the requested one unless routed to backfill)
+    priority: str
+    status_code: int = 200
+    retry_after: int = 0
+    reason: str = ""
+    estimated_latency: float = 0.0
+
+
+async def read_backlog(client) -> Backlog:
+    """Sample the backlog of every stage in one pipelined round trip."""
+    lanes = [(stage, priority, lane_queue_name(STAGE_QUEUES[stage], priority))
+             for stage in STAGES for priority in PRIORITY_CLASSES]
+    async with client.pipeline(transaction=False) as pipe:
+        for _, _, name in lanes:
+            pipe.llen(Queue.redis_queue_namespace_prefix + name)
+            pipe.zcard(DeferredJobRegistry(name, connection=client).key)
+        for stage in STAGES:
+            # Workers listen on every lane of their queue
+            pipe.scard(WORKERS_BY_QUEUE_KEY % STAGE_QUEUES[stage])
+            pipe.hmget(STAGE_DURATION_KEY.format(STAGE_QUEUES[stage], "finished"), "count", "sum")
+        pipe.info("memory")
+        results = await pipe.execute(raise_on_error=False)
+
+    memory = results.pop()
+    errors = [result for result in results if isinstance(result, Exception)]
+    if errors:
+        raise errors[0]
+
+    depth: Dict[str, Dict[str, int]] = {stage: {} for stage in STAGES}
+    deferred = 0
+    for i, (stage, priority, _) in enumerate(lanes):
+        depth[stage][priority] = depth[stage].get(priority, 0) + int(results[2 * i])
+        deferred += int(results[2 * i + 1])
+    workers, job_seconds = {}, {}
+    offset = 2 * len(lanes)
+    for i, stage in enumerate(STAGES):
+        workers[stage] = int(results[offset + 2 * i])
+        count, total = results[offset + 2 * i + 1]
+        job_seconds[stage] = float(total) / int(count) if count and int(count) else None
+
+    used_memory = max_memory = None
+    if isinstance(memory, dict):
+        used_memory = memory.get("used_memory")
+        max_memory = memory.get("maxmemory") or None
+    return Backlog(depth, deferred, workers, job_seconds, used_memory, max_memory)
+
+
+def estimated_latency(backlog: Backlog, priority: str) -> float:
+    """Seconds a new article of this class would take through every stage."""
+    ahead_classes = PRIORITY_CLASSES[:PRIORITY_CLASSES.index(priority) + 1]
+    latency = 0.0
+    for stage in STAGES:
+        seconds = backlog.job_seconds.get(stage)
+        if not seconds:
+            continue
+        ahead = sum(backlog.depth[stage].get(lane, 0) for lane in ahead_classes)
+        # The autoscaler starts a worker for a queue with none
+        latency += ahead * seconds / max(backlog.workers.get(stage, 0), 1) + seconds
+    return latency
+
+
+def _retry_after(seconds: float) -> int:
+    return max(1, min(MAX_RETRY_AFTER_SEC, math.ceil(seconds)))
+
+
+def _with_admitted(backlog: Backlog, admitted: Dict[str, int]) -> Backlog:
+    """The backlog plus the articles admitted since it was sampled, waiting to be normalized."""
+    admitted = {priority: count for priority, count in admitted.items() if count}
+    if not admitted:
+        return backlog
+    normalize = dict(backlog.depth["normalize"])
+    for priority, count in admitted.items():
+        normalize[priority] = normalize.get(priority, 0) + count
+    return backlog._replace(depth={**backlog.depth, "normalize": normalize},
+                            deferred=backlog.deferred + sum(admitted.values()) * (len(STAGES) - 1))
+
+
+def decide(backlog: Backlog, priority: str, count: int = 1) -> Decision:
+    """Admission decision for `count` new articles of a priority class."""
+    normalize_seconds = backlog.job_seconds.get("normalize")
+    normalize_workers = max(backlog.workers.get("normalize", 0), 1)
+
+    # Each article brings a job per stage
+    excess = backlog.pending + count * len(STAGES) - ADMISSION_MAX_PENDING_JOBS
+    if excess > 0:
+        wait = (excess / len(STAGES) * normalize_seconds / normalize_workers if normalize_seconds
+                else DEFAULT_RETRY_AFTER_SEC)
+        return Decision(False, priority, 429, _retry_after(wait),
+                        f"Pipeline backlog is full ({backlog.pending} jobs pending)")
+
+    if backlog.max_memory and backlog.used_memory is not None \
+            and backlog.used_memory >= ADMISSION_REDIS_MEMORY_MAX_RATIO * backlog.max_memory:
+        return Decision(False, priority, 503, DEFAULT_RETRY_AFTER_SEC,
+                        "Queue storage is near its memory limit")
+
+    # The last article of a batch waits for the ones before it
+    backlog = _with_admitted(backlog, {priority: count - 1})
+    latency = estimated_latency(backlog, priority)
+    budget = LATENCY_BUDGETS[priority]
+    if latency <= budget:
+        return Decision(True, priority, estimated_latency=latency)
+    if priority == PRIORITY_SCHEDULED:
+        backfill_latency = estimated_latency(backlog, PRIORITY_BACKFILL)
+        if backfill_latency <= LATENCY_BUDGETS[PRIORITY_BACKFILL]:
+            return Decision(True, PRIORITY_BACKFILL, reason=f"Estimated latency {latency:.0f}s exceeds "
+                            f"{budget:.0f}s; queued in the backfill lane", estimated_latency=backfill_latency)
+    return Decision(False, priority, 429, _retry_after(latency - budget),
+                    f"Estimated pipeline latency {latency:.0f}s exceeds {budget:.0f}s", latency)
+
+
+# (monotonic time sampled, backlog, articles admitted since, per class)
+_sample: Optional[tuple] = None
+
+
+async def admit(priority: str, count: int = 1, client=None) -> Decision:
+    """
+    Admission decision for `count` new articles, from a backlog sample at most
+    ADMISSION_CACHE_SEC old. Admitted articles count toward the backlog until
+    the next sample, so a burst between samples cannot overshoot the limits.
+    """
+    return (await admit_all({priority: count}, client))[priority]
+
+
+async def admit_all(counts: Dict[str, int], client=None) -> Dict[str, Decision]:
+    """
+    Admission decisions for new articles of several priority classes, all or
+    none: the articles only count toward the backlog if every class is
+    admitted. Stops at the first class refused.
+
+    Returns:
+        priority -> decision, in the order of counts
+    """
+    global _sample
+    now = time.monotonic()
+    if _sample is None or now - _sample[0] >= ADMISSION_CACHE_SEC:
+        try:
+            _sample = (now, await read_backlog(client if client is not None else get_async_redis_conn()), {})
+        except RedisError as e:
+            print(f"Could not read the pipeline backlog; admitting: {e}")
+            return {priority: Decision(True, priority) for priority in counts}
+    _, backlog, admitted = _sample
+    # Each class waits for the ones admitted before it
+    batch = dict(admitted)
+    decisions = {}
+    for priority, count in counts.items():
+        decision = decisions[priority] = decide(_with_admitted(backlog, batch), priority, count)
+        if not decision.admitted:
+            return decisions
+        batch[decision.priority] = batch.get(decision.priority, 0) + count
+    admitted.update(batch)
+    return decisions
+
+
+def reset() -> None:
+    """Forget the cached backlog sample."""
+    global _sample
+    _sample = None
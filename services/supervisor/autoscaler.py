@@ -0,0 +1,278 @@
+"""
+Queue-depth-driven supervisor for the RQ workers.
+
+Every AUTOSCALER_INTERVAL_SEC the supervisor samples each configured queue
+across its priority lanes (depth, age of the oldest job, and the
+started/failed registries that utils/queue_status.py reports) and sizes its
+worker processes so queued work drains within AUTOSCALER_TARGET_LATENCY_SEC.
+Each worker listens on all lanes of its queue and serves the most urgent
+job first (services/supervisor/lanes.py).
+
+- The average job duration of a queue's workers (successful jobs over
+  working time, as recorded by RQ) gives the backlog in worker-seconds;
+  dividing it by the latency target gives the workers needed. Until a
+  queue has history, it gains a worker whenever its oldest job is older
+  than the target.
+- The result is kept between the queue's min and max workers
+  (WORKER_SCALING).
+- Workers are added at once. They are removed one at a time, only after
+  AUTOSCALER_SCALE_DOWN_AFTER samples in a row wanted fewer. Removal is a
+  warm shutdown (SIGTERM), so the current job finishes.
+- Workers that exit without being asked to are restarted.
+
+Usage:
+    python -m services.supervisor.autoscaler [queue ...]
+"""
+
+import argparse
+import math
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+from urllib.parse import quote
+
+from rq import Queue, Worker
+
+from config.redis_config import REDIS_HOST, REDIS_PORT, REDIS_DB, REDIS_PASSWORD, redis_conn, get_lane_queues
+from config.settings import (
+    WORKER_SCALING,
+    AUTOSCALER_TARGET_LATENCY_SEC,
+    AUTOSCALER_INTERVAL_SEC,
+    AUTOSCALER_SCALE_DOWN_AFTER,
+)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+WORKER_CLASS = "services.supervisor.lanes.LaneWorker"
+SIMPLE_WORKER_CLASS = "services.supervisor.lanes.LaneSimpleWorker"
+BATCHING_WORKER_CLASS = "services.llm_worker.batching.BatchingWorker"
+# LLM stages keep their model loaded between jobs instead of forking per job,
+# and chunk summarization batches compatible jobs
+WORKER_CLASSES = {
+    "summarize_chunks": BATCHING_WORKER_CLASS,
+    "assemble_summary": SIMPLE_WORKER_CLASS,
+    "llm": SIMPLE_WORKER_CLASS,
+}
+
+
+class QueuePolicy(NamedTuple):
+    min_workers: int
+    max_workers: int
+    worker_class: str = WORKER_CLASS
+
+
+class QueueSample(NamedTuple):
+    queue: str
+    depth: int
+    oldest_age: float
+    started: int
+    failed: int
+    avg_job_seconds: Optional[float] = None
+
+
+def parse_scaling(spec: str = WORKER_SCALING) -> Dict[str, QueuePolicy]:
+    """Parse "queue=min:max,..." into per-queue policies."""
+    policies = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, bounds = entry.split("=")
+        low, high = (int(value) for value in bounds.split(":"))
+        if not 0 <= low <= high:
+            raise ValueError(f"Invalid worker bounds for {name}: {bounds}")
+        policies[name] = QueuePolicy(low, high, WORKER_CLASSES.get(name, WORKER_CLASS))
+    return policies
+
+
+def _age(enqueued_at: Optional[datetime], now: datetime) -> float:
+    if enqueued_at is None:
+        return 0.0
+    if enqueued_at.tzinfo is None:
+        enqueued_at = enqueued_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (now - enqueued_at).total_seconds())
+
+
+def sample_queue(queue: Queue, now: Optional[datetime] = None) -> QueueSample:
+    """Measure a queue's backlog, using the same registries as utils/queue_status.py."""
+    now = now or datetime.now(timezone.utc)
+    oldest_age = 0.0
+    oldest_ids = queue.get_job_ids(0, 0)
+    if oldest_ids:
+        job = queue.fetch_job(oldest_ids[0])
+        oldest_age = _age(job.enqueued_at if job else None, now)
+
+    jobs_done, working_time = 0, 0.0
+    for worker in Worker.all(queue=queue):
+        jobs_done += worker.successful_job_count
+        working_time += worker.total_working_time
+
+    return QueueSample(
+        queue=queue.name,
+        depth=queue.count,
+        oldest_age=oldest_age,
+        started=len(queue.started_job_registry),
+        failed=len(queue.failed_job_registry),
+        avg_job_seconds=working_time / jobs_done if jobs_done else None,
+    )
+
+
+def sample_lanes(queue_name: str, now: Optional[datetime] = None) -> QueueSample:
+    """Sample every lane of a queue as one backlog; its workers serve them all."""
+    samples = [sample_queue(queue, now) for queue in get_lane_queues(queue_name)]
+    return QueueSample(
+        queue=queue_name,
+        depth=sum(sample.depth for sample in samples),
+        oldest_age=max(sample.oldest_age for sample in samples),
+        started=sum(sample.started for sample in samples),
+        failed=sum(sample.failed for sample in samples),
+        # The lanes share their workers, so any lane's average is theirs
+        avg_job_seconds=next((sample.avg_job_seconds for sample in samples if sample.avg_job_seconds), None),
+    )
+
+
+def desired_workers(sample: QueueSample, current: int, policy: QueuePolicy,
+                    target_latency: float = AUTOSCALER_TARGET_LATENCY_SEC) -> int:
+    """Workers a queue needs to drain its backlog within target_latency seconds."""
+    if sample.depth == 0:
+        # Nothing waiting: keep the workers that are busy
+        wanted = sample.started
+    elif sample.avg_job_seconds:
+        wanted = math.ceil((sample.depth + sample.started) * sample.avg_job_seconds / target_latency)
+    elif sample.oldest_age > target_latency:
+        wanted = current + 1
+    else:
+        wanted = current
+    if sample.depth > 0:
+        wanted = max(wanted, 1)
+    return max(policy.min_workers, min(policy.max_workers, wanted))
+
+
+def redis_url() -> str:
+    auth = f":{quote(REDIS_PASSWORD, safe='')}@" if REDIS_PASSWORD else ""
+    return f"redis://{auth}{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
+
+
+def spawn_worker(queue_name: str, policy: QueuePolicy) -> subprocess.Popen:
+    """Start one `rq worker` process listening on every lane of a queue."""
+    lane_names = [queue.name for queue in get_lane_queues(queue_name)]
+    return subprocess.Popen(
+        # --with-scheduler runs the delayed retries (utils/resilience.py)
+        [sys.executable, "-m", "rq.cli", "worker", *lane_names, "--with-scheduler",
+         "--path", str(PROJECT_ROOT), "--url", redis_url(), "-w", policy.worker_class],
+        cwd=PROJECT_ROOT
+    )
+
+
+class Supervisor:
+    """
+    Keeps each queue's worker processes between its bounds and sized to its backlog.
+
+    spawn and sample are injectable so the scaling loop can be simulated.
+    """
+
+    def __init__(self, policies: Dict[str, QueuePolicy],
+                 spawn: Callable[[str, QueuePolicy], subprocess.Popen] = spawn_worker,
+                 sample: Callable[[str], QueueSample] = sample_lanes,
+                 target_latency: float = AUTOSCALER_TARGET_LATENCY_SEC,
+                 scale_down_after: int = AUTOSCALER_SCALE_DOWN_AFTER):
+        self.policies = policies
+        self.spawn = spawn
+        self.sample = sample
+        self.target_latency = target_latency
+        self.scale_down_after = scale_down_after
+        self.workers: Dict[str, List] = {name: [] for name in policies}
+        self.draining: Dict[str, List] = {name: [] for name in policies}
+        self.restarts: Dict[str, int] = {name: 0 for name in policies}
+        self._low_samples: Dict[str, int] = {name: 0 for name in policies}
+
+    def reap(self, queue_name: str) -> None:
+        """Forget exited workers; count the ones that were not being drained as crashes."""
+        alive = []
+        for process in self.workers[queue_name]:
+            code = process.poll()
+            if code is None:
+                alive.append(process)
+            else:
+                self.restarts[queue_name] += 1
+                print(f"Worker {process.pid} on {queue_name} exited with code {code}; restarting")
+        self.workers[queue_name] = alive
+        self.draining[queue_name] = [p for p in self.draining[queue_name] if p.poll() is None]
+
+    def scale(self, queue_name: str) -> int:
+        """Reap, sample and resize one queue. Returns its target worker count."""
+        policy = self.policies[queue_name]
+        self.reap(queue_name)
+        workers = self.workers[queue_name]
+        current = len(workers)
+        wanted = desired_workers(self.sample(queue_name), current, policy, self.target_latency)
+
+        if wanted < current:
+            self._low_samples[queue_name] += 1
+            if self._low_samples[queue_name] >= self.scale_down_after:
+                process = workers.pop()
+                process.send_signal(signal.SIGTERM)  # warm shutdown: finish the current job
+                self.draining[queue_name].append(process)
+                self._low_samples[queue_name] = 0
+                print(f"Draining worker {process.pid} on {queue_name} ({current} -> {current - 1})")
+            return wanted
+
+        self._low_samples[queue_name] = 0
+        for _ in range(wanted - current):
+            workers.append(self.spawn(queue_name, policy))
+        if wanted > current:
+            print(f"Scaled {queue_name} from {current} to {wanted} workers")
+        return wanted
+
+    def tick(self) -> Dict[str, int]:
+        return {queue_name: self.scale(queue_name) for queue_name in self.policies}
+
+    def stop(self) -> None:
+        """Warm-shut-down every worker and wait for them to exit."""
+        processes = [p for name in self.policies for p in self.workers[name] + self.draining[name]]
+        for process in processes:
+            if process.poll() is None:
+                process.send_signal(signal.SIGTERM)
+        for process in processes:
+            process.wait()
+
+    def run(self, interval: float = AUTOSCALER_INTERVAL_SEC) -> None:
+        try:
+            while True:
+                try:
+                    self.tick()
+                except Exception as e:
+                    # Keep supervising through Redis hiccups
+                    print(f"Autoscaler tick failed: {type(e).__name__}: {e}")
+                time.sleep(interval)
+        finally:
+            self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run and autoscale the RQ workers.")
+    parser.add_argument("queues", nargs="*", help="queues to supervise (default: all in WORKER_SCALING)")
+    args = parser.parse_args()
+
+    policies = parse_scaling()
+    if args.queues:
+        unknown = set(args.queues) - set(policies)
+        if unknown:
+            parser.error(f"No WORKER_SCALING entry for: {', '.join(sorted(unknown))}")
+        policies = {name: policies[name] for name in args.queues}
+
+    redis_conn.ping()
+    for name, policy in policies.items():
+        print(f"{name}: {policy.min_workers}-{policy.max_workers} workers ({policy.worker_class})")
+    supervisor = Supervisor(policies)
+    # Turn SIGTERM into a clean shutdown of the workers
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        supervisor.run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
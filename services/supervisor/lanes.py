@@ -0,0 +1,199 @@
+"""
+Deadline-aware scheduling across the priority lanes.
+
+Every pipeline queue has an interactive, a scheduled and a backfill lane
+(see config/redis_config.py). A job's deadline is the optional absolute
+`deadline` in its meta, otherwise the time it was enqueued plus the maximum
+wait of its class (INTERACTIVE_MAX_WAIT_SEC, ...). Before each dequeue,
+LaneWorker orders its queues by the deadline of the job at the head of
+each, so it always takes the most urgent job it can serve. A backfill job
+that has waited long enough therefore still beats fresh scheduled work.
+
+Workers record how long each job waited, per class, in Redis;
+lane_wait_stats() reads them back (count, mean, p50, p95, max and missed
+deadlines).
+
+Both worker classes also dead-letter jobs that fail for good
+(utils/dead_letter.py), record how long each job ran (utils/metrics.py) and
+continue the trace of each job (utils/tracing.py).
+
+Usage:
+    queue.enqueue(fn, *args, meta=lane_meta(PRIORITY_INTERACTIVE))
+    rq worker -w services.supervisor.lanes.LaneWorker normalize_interactive normalize normalize_backfill
+"""
+
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from rq import Queue, SimpleWorker, Worker
+from rq.job import Job
+
+from config.redis_config import PRIORITY_CLASSES, DEFAULT_PRIORITY, redis_conn
+from config.settings import (
+    INTERACTIVE_MAX_WAIT_SEC,
+    SCHEDULED_MAX_WAIT_SEC,
+    BACKFILL_MAX_WAIT_SEC,
+    LANE_WAIT_SAMPLES,
+)
+from utils.dead_letter import DeadLetterMixin
+from utils.metrics import StageMetricsMixin
+from utils.tracing import TracingMixin
+
+MAX_WAIT_SEC = dict(zip(PRIORITY_CLASSES, [INTERACTIVE_MAX_WAIT_SEC, SCHEDULED_MAX_WAIT_SEC, BACKFILL_MAX_WAIT_SEC]))
+_RANK = {priority: rank for rank, priority in enumerate(PRIORITY_CLASSES)}
+
+WAIT_STATS_KEY = "pipeline:lane_wait:{}"
+WAIT_SAMPLES_KEY = "pipeline:lane_wait:{}:recent"
+
+
+def lane_meta(priority: str = DEFAULT_PRIORITY, deadline: Optional[datetime] = None) -> Dict:
+    """Job meta carrying a job's priority class and optional deadline."""
+    if priority not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority: {priority}. Available priorities: {PRIORITY_CLASSES}")
+    meta = {"priority": priority}
+    if deadline is not None:
+        # Naive deadlines are local time, like the datetime.now() values stored elsewhere
+        meta["deadline"] = deadline.timestamp()
+    return meta
+
+
+def queue_priority(queue_name: str) -> str:
+    """Priority class served by a queue, from its lane suffix."""
+    for priority in PRIORITY_CLASSES:
+        if queue_name.endswith(f"_{priority}"):
+            return priority
+    return DEFAULT_PRIORITY
+
+
+def job_priority(job: Job, queue_name: str) -> str:
+    return job.meta.get("priority") or queue_priority(queue_name)
+
+
+def _rq_timestamp(value: Optional[datetime]) -> float:
+    if value is None:
+        return time.time()
+    if value.tzinfo is None:
+        # RQ stores naive UTC datetimes
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def job_deadline(job: Job, queue_name: str) -> float:
+    """Epoch seconds by which a job should have started."""
+    if job.meta.get("deadline") is not None:
+        return float(job.meta["deadline"])
+    return _rq_timestamp(job.enqueued_at) + MAX_WAIT_SEC[job_priority(job, queue_name)]
+
+
+def order_by_urgency(queues: List[Queue], connection=None, serializer=None) -> List[Queue]:
+    """
+    Order queues by the deadline of their head job, then by class.
+
+    Empty queues go last, most urgent class first, which is the order a
+    blocking dequeue listens in.
+    """
+    connection = connection if connection is not None else redis_conn
+    with connection.pipeline() as pipe:
+        for queue in queues:
+            pipe.lindex(queue.key, 0)
+        heads = [head.decode() if isinstance(head, bytes) else head for head in pipe.execute()]
+    jobs = Job.fetch_many([head for head in heads if head], connection=connection, serializer=serializer)
+    by_id = {job.id: job for job in jobs if job is not None}
+
+    def urgency(item):
+        index, queue = item
+        rank = _RANK[queue_priority(queue.name)]
+        job = by_id.get(heads[index])
+        if job is None:
+            return (1, rank, index)
+        return (0, job_deadline(job, queue.name), rank, index)
+
+    return [queue for _, queue in sorted(enumerate(queues), key=urgency)]
+
+
+def record_wait(job: Job, queue_name: str, connection=None) -> float:
+    """Record how long a job waited in its queue, under its priority class."""
+    connection = connection if connection is not None else redis_conn
+    now = time.time()
+    wait = max(0.0, now - _rq_timestamp(job.enqueued_at))
+    priority = job_priority(job, queue_name)
+    stats_key = WAIT_STATS_KEY.format(priority)
+    samples_key = WAIT_SAMPLES_KEY.format(priority)
+    with connection.pipeline() as pipe:
+        pipe.hincrby(stats_key, "count", 1)
+        pipe.hincrbyfloat(stats_key, "total_sec", wait)
+        if now > job_deadline(job, queue_name):
+            pipe.hincrby(stats_key, "missed_deadlines", 1)
+        pipe.lpush(samples_key, f"{wait:.3f}")
+        pipe.ltrim(samples_key, 0, LANE_WAIT_SAMPLES - 1)
+        pipe.execute()
+    return wait
+
+
+def _percentile(ordered: List[float], fraction: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def lane_wait_stats(connection=None) -> Dict[str, Dict]:
+    """
+    Queue wait times per priority class.
+
+    count, mean_sec and missed_deadlines cover every recorded job; p50, p95
+    and max cover the last LANE_WAIT_SAMPLES jobs.
+    """
+    connection = connection if connection is not None else redis_conn
+    with connection.pipeline() as pipe:
+        for priority in PRIORITY_CLASSES:
+            pipe.hgetall(WAIT_STATS_KEY.format(priority))
+            pipe.lrange(WAIT_SAMPLES_KEY.format(priority), 0, -1)
+        results = pipe.execute()
+
+    stats = {}
+    for i, priority in enumerate(PRIORITY_CLASSES):
+        totals = {key.decode() if isinstance(key, bytes) else key: float(value)
+                  for key, value in results[2 * i].items()}
+        samples = sorted(float(value) for value in results[2 * i + 1])
+        count = int(totals.get("count", 0))
+        stats[priority] = {
+            "count": count,
+            "mean_sec": totals.get("total_sec", 0.0) / count if count else None,
+            "p50_sec": _percentile(samples, 0.50),
+            "p95_sec": _percentile(samples, 0.95),
+            "max_sec": samples[-1] if samples else None,
+            "missed_deadlines": int(totals.get("missed_deadlines", 0)),
+        }
+    return stats
+
+
+class DeadlineOrderingMixin:
+    """Dequeue the most urgent job across the worker's lanes and record wait times."""
+
+    def reorder_queues(self, reference_queue=None):
+        try:
+            self._ordered_queues = order_by_urgency(self.queues, self.connection, self.serializer)
+        except Exception as e:
+            # Fall back to the previous order rather than stop working
+            self.log.warning("Could not order queues by deadline: %s", e)
+
+    def dequeue_job_and_maintain_ttl(self, *args, **kwargs):
+        # Order right before dequeuing: the last order may be a whole job old
+        self.reorder_queues()
+        return super().dequeue_job_and_maintain_ttl(*args, **kwargs)
+
+    def execute_job(self, job, queue):
+        try:
+            record_wait(job, queue.name, self.connection)
+        except Exception as e:
+            self.log.warning("Could not record wait time of job %s: %s", job.id, e)
+        return super().execute_job(job, queue)
+
+
+class LaneWorker(TracingMixin, StageMetricsMixin, DeadLetterMixin, DeadlineOrderingMixin, Worker):
+    pass
+
+
+class LaneSimpleWorker(TracingMixin, StageMetricsMixin, DeadLetterMixin, DeadlineOrderingMixin, SimpleWorker):
+    pass
@@ -0,0 +1,90 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import fakeredis
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.routes import ingest
+from services.supervisor import admission
+from utils.metrics import observe_stage
+
+
+class AdmissionTests(unittest.TestCase):
+
+    def setUp(self):
+        self.server = fakeredis.FakeServer()
+        self.redis = fakeredis.FakeStrictRedis(server=self.server)
+        admission.reset()
+        self.addCleanup(admission.reset)
+
+    def backlog(self):
+        client = fakeredis.aioredis.FakeRedis(server=self.server, decode_responses=True)
+        return asyncio.run(admission.read_backlog(client))
+
+    def fill(self, queue_name, jobs, job_seconds):
+        self.redis.rpush(f'rq:queue:{queue_name}', *[f'job{i}' for i in range(jobs)])
+        observe_stage(queue_name.replace('_interactive', '').replace('_backfill', ''), 'finished', job_seconds,
+                      self.redis)
+
+    def test_backlog_is_read_per_stage_and_lane(self):
+        self.fill('normalize_interactive', 3, 2.0)
+        self.fill('summarize_chunks_backfill', 4, 30.0)
+        self.redis.sadd('rq:workers:summarize_chunks', 'w1', 'w2')
+
+        backlog = self.backlog()
+        self.assertEqual(backlog.depth['normalize']['interactive'], 3)
+        self.assertEqual(backlog.depth['summarize']['backfill'], 4)
+        self.assertEqual((backlog.workers['summarize'], backlog.job_seconds['summarize']), (2, 30.0))
+        self.assertEqual(backlog.pending, 7)
+        # Backfill jobs are not ahead of interactive ones
+        self.assertEqual(admission.estimated_latency(backlog, 'interactive'), 2.0 * 4 + 30.0)
+        self.assertEqual(admission.estimated_latency(backlog, 'backfill'), 2.0 * 4 + 30.0 * 3)
+
+    def test_over_budget_rejects_interactive_and_routes_scheduled_to_backfill(self):
+        self.fill('normalize', 100, 60.0)
+        backlog = self.backlog()
+        with patch.dict(admission.LATENCY_BUDGETS, {'interactive': 600, 'scheduled': 600}):
+            self.assertTrue(admission.decide(backlog, 'interactive').admitted)
+            scheduled = admission.decide(backlog, 'scheduled')
+            self.assertEqual((scheduled.admitted, scheduled.priority), (True, 'backfill'))
+            self.fill('normalize_interactive', 20, 60.0)
+            rejected = admission.decide(self.backlog(), 'interactive')
+        self.assertEqual((rejected.admitted, rejected.status_code), (False, 429))
+        self.assertGreater(rejected.retry_after, 0)
+
+    def post(self, path, body, articles):
+        with patch.object(admission, 'get_async_redis_conn',
+                          lambda: fakeredis.aioredis.FakeRedis(server=self.server, decode_responses=True)), \
+                patch.object(ingest, 'get_async_db', lambda: MagicMock(articles=articles)):
+            return TestClient(app).post(path, json=body)
+
+    def test_ingest_is_refused_with_retry_after_once_the_backlog_is_full(self):
+        self.fill('normalize', 8, 1.0)
+        existing = {'_id': ObjectId(), 'pipeline_status': {'normalize': 'completed'}}
+        articles = MagicMock(find_one=AsyncMock(side_effect=[None, existing]))
+        with patch.object(admission, 'ADMISSION_MAX_PENDING_JOBS', 10):
+            response = self.post('/ingest', {'raw_text': 'text'}, articles)
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response.headers['Retry-After'], '1')
+            # A resubmission adds no work, so it is answered whatever the backlog
+            response = self.post('/ingest', {'raw_text': 'text'}, articles)
+        self.assertEqual((response.status_code, response.json()['status']), (200, 'duplicate'))
+
+    def test_batch_admissions_count_only_once_the_whole_batch_is_admitted(self):
+        observe_stage('normalize', 'finished', 1.0, self.redis)
+        articles = MagicMock(find=MagicMock(return_value=MagicMock(to_list=AsyncMock(return_value=[]))))
+        batch = {'articles': [{'raw_text': 'one', 'priority': 'interactive'},
+                              {'raw_text': 'two', 'priority': 'backfill'}]}
+        with patch.dict(admission.LATENCY_BUDGETS, {'backfill': 0}):
+            response = self.post('/ingest/batch', batch, articles)
+        self.assertEqual(response.status_code, 429)
+        articles.insert_many.assert_not_called()
+        # The interactive article admitted before the refusal is not counted
+        self.assertEqual(admission._sample[2], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
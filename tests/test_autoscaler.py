@@ -0,0 +1,100 @@
+import signal
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import fakeredis
+from rq import Queue
+
+from services.supervisor.autoscaler import (
+    QueuePolicy,
+    QueueSample,
+    Supervisor,
+    desired_workers,
+    parse_scaling,
+    sample_queue,
+)
+
+
+class FakeProcess:
+    _next_pid = 1000
+
+    def __init__(self):
+        FakeProcess._next_pid += 1
+        self.pid = FakeProcess._next_pid
+        self.returncode = None
+
+    def poll(self):
+        return self.returncode
+
+    def send_signal(self, sig):
+        if sig == signal.SIGTERM:
+            self.returncode = 0
+
+    def wait(self):
+        return self.returncode
+
+
+class AutoscalerTests(unittest.TestCase):
+
+    def test_parse_scaling(self):
+        policies = parse_scaling('normalize=1:4, summarize_chunks=0:2, assemble_summary=1:1')
+        self.assertEqual(policies['normalize'], QueuePolicy(1, 4, 'services.supervisor.lanes.LaneWorker'))
+        self.assertEqual(policies['summarize_chunks'],
+                         QueuePolicy(0, 2, 'services.llm_worker.batching.BatchingWorker'))
+        self.assertEqual(policies['assemble_summary'],
+                         QueuePolicy(1, 1, 'services.supervisor.lanes.LaneSimpleWorker'))
+
+    def test_workers_sized_from_job_duration(self):
+        policy = QueuePolicy(1, 10)
+        # 40 queued + 2 running jobs of 10s each, drained within 60s -> 7 workers
+        sample = QueueSample('normalize', depth=40, oldest_age=5, started=2, failed=0, avg_job_seconds=10)
+        self.assertEqual(desired_workers(sample, 1, policy, target_latency=60), 7)
+        self.assertEqual(desired_workers(sample._replace(depth=400), 1, policy, target_latency=60), 10)
+
+    def test_simulated_backlog_scales_up_restarts_and_drains(self):
+        redis = fakeredis.FakeStrictRedis()
+        queue = Queue('normalize', connection=redis)
+        clock = [datetime.now(timezone.utc)]
+        processes = []
+
+        def spawn(queue_name, policy):
+            processes.append(FakeProcess())
+            return processes[-1]
+
+        supervisor = Supervisor({'normalize': QueuePolicy(1, 3)}, spawn=spawn,
+                                sample=lambda name: sample_queue(queue, now=clock[0]),
+                                target_latency=60, scale_down_after=2)
+
+        # Idle queue: only the minimum
+        self.assertEqual(supervisor.tick(), {'normalize': 1})
+
+        # A backlog older than the target adds workers up to the maximum
+        for i in range(5):
+            queue.enqueue('services.pipeline.jobs.normalize_article_job', str(i))
+        clock[0] += timedelta(seconds=120)
+        self.assertEqual([supervisor.tick()['normalize'] for _ in range(3)], [2, 3, 3])
+        self.assertEqual(len(supervisor.workers['normalize']), 3)
+
+        # A crashed worker is replaced
+        supervisor.workers['normalize'][0].returncode = 1
+        supervisor.tick()
+        self.assertEqual(supervisor.restarts['normalize'], 1)
+        self.assertEqual(len(supervisor.workers['normalize']), 3)
+        self.assertEqual(len(processes), 4)
+
+        # Once the queue is empty, workers are drained one at a time after the delay
+        redis.delete(queue.key)
+        supervisor.tick()
+        self.assertEqual(len(supervisor.workers['normalize']), 3)
+        supervisor.tick()
+        self.assertEqual(len(supervisor.workers['normalize']), 2)
+        self.assertEqual(len(supervisor.draining['normalize']), 1)
+        for _ in range(4):
+            supervisor.tick()
+        self.assertEqual(len(supervisor.workers['normalize']), 1)
+        self.assertEqual(supervisor.draining['normalize'], [])  # drained workers exited and were reaped
+        self.assertEqual(supervisor.restarts['normalize'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
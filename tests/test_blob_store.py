@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch
+
+from bson import ObjectId
+
+from db import blob_store
+from db.blob_store import decode_text, encode_text, is_blob
+from db.database import Text
+
+
+class BlobStoreTests(unittest.TestCase):
+
+    def test_small_text_stays_inline(self):
+        self.assertEqual(encode_text('short text'), 'short text')
+        self.assertIsNone(encode_text(None))
+
+    def test_large_text_round_trips_through_compressed_blob(self):
+        text = 'The quick brown fox jumps over the lazy dog. ' * 2000
+        blob = encode_text(text)
+        self.assertTrue(is_blob(blob))
+        self.assertEqual(blob['length'], len(text))
+        self.assertIn('data', blob)
+        self.assertLess(len(blob['data']), len(text) // 10)
+        self.assertEqual(decode_text(blob), text)
+
+    def test_plain_strings_decode_unchanged(self):
+        self.assertEqual(decode_text('legacy value'), 'legacy value')
+
+    def test_async_decode_decompresses_off_the_event_loop(self):
+        text = 'The quick brown fox jumps over the lazy dog. ' * 2000
+        blob = encode_text(text)
+        threads, original = [], blob_store._decompress
+
+        def decompress(data, codec):
+            threads.append(threading.current_thread())
+            return original(data, codec)
+
+        with patch.object(blob_store, '_decompress', decompress):
+            self.assertEqual(asyncio.run(blob_store.decode_text_async(blob, None)), text)
+            self.assertEqual(asyncio.run(blob_store.decode_text_async('plain', None)), 'plain')
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.main_thread())
+
+    def test_model_decodes_lazily_and_passes_unread_blobs_through(self):
+        text = 'lorem ipsum dolor sit amet ' * 1000
+        doc = Text(episode_id=ObjectId(), full_text=text).to_dict()
+        self.assertTrue(is_blob(doc['full_text']))
+
+        with patch.object(blob_store, '_decompress', wraps=blob_store._decompress) as decompress:
+            loaded = Text.from_dict(doc)
+            # Re-serializing an unread field does not decompress it
+            self.assertEqual(loaded.to_dict()['full_text'], doc['full_text'])
+            decompress.assert_not_called()
+
+            self.assertEqual(loaded.full_text, text)
+            self.assertEqual(loaded.full_text, text)
+            decompress.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+from bson import ObjectId
+from rq import Queue
+
+from services.pipeline import dispatcher, stages
+
+
+class DispatcherTests(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        self.queues = {name: Queue(name, connection=self.redis) for name in stages.STAGE_QUEUES.values()}
+        self.article_id = ObjectId()
+        self.pipeline_status = {stage: 'pending' for stage in stages.STAGES}
+        self.db = MagicMock()
+        self.db.articles.find_one.side_effect = lambda query, projection: {
+            '_id': self.article_id, 'pipeline_status': dict(self.pipeline_status)
+        }
+        patchers = [
+            patch.object(dispatcher, 'redis_conn', self.redis),
+            patch.object(dispatcher, 'get_queue', lambda name, priority: self.queues[name]),
+            patch.object(dispatcher, 'db', self.db),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def change(self, operation, **fields):
+        return {'operationType': operation, 'ns': {'coll': 'articles'},
+                'documentKey': {'_id': self.article_id}, **fields}
+
+    def queued(self, stage):
+        return self.queues[stages.STAGE_QUEUES[stage]].job_ids
+
+    def test_inserted_and_replaced_articles_enqueue_their_next_stage(self):
+        self.pipeline_status['normalize'] = 'completed'
+        inserted = self.change('insert', fullDocument={'pipeline_status': dict(self.pipeline_status)})
+        self.assertEqual([job.id for job in dispatcher.handle_change(inserted)],
+                         [f'summarize_{self.article_id}'])
+
+        self.pipeline_status['summarize'] = 'completed'
+        replaced = self.change('replace', fullDocument={'pipeline_status': dict(self.pipeline_status),
+                                                        'priority': 'backfill'})
+        jobs = dispatcher.handle_change(replaced)
+        self.assertEqual([job.id for job in jobs], [f'assemble_{self.article_id}'])
+        self.assertEqual(jobs[0].meta['priority'], 'backfill')
+        # The summarize job already exists: the replace event does not enqueue it again
+        self.assertEqual(self.queued('summarize'), [f'summarize_{self.article_id}'])
+
+    def test_stages_that_already_ran_are_not_enqueued_again(self):
+        for stage in ('normalize', 'summarize'):
+            self.pipeline_status[stage] = 'completed'
+        self.pipeline_status['assemble'] = 'running'
+        # Their RQ jobs expired long ago; only the article remembers them
+        replaced = self.change('replace', fullDocument={'pipeline_status': dict(self.pipeline_status)})
+        updated = self.change('update', updateDescription={'updatedFields': {'pipeline_status.normalize': 'completed'}})
+
+        self.assertEqual(dispatcher.handle_change(replaced), [])
+        self.assertEqual(dispatcher.handle_change(updated), [])
+        self.assertEqual(self.redis.keys('rq:job:*'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
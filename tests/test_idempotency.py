@@ -0,0 +1,68 @@
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+from rq import Queue, SimpleWorker
+from rq.job import JobStatus
+
+from services.ingestion import jobs, scheduler
+from utils.idempotency import enqueue_once, idempotency_key
+
+
+def succeed(*args):
+    return 'done'
+
+
+class IdempotencyTests(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        self.queue = Queue('ingestion', connection=self.redis)
+
+    def test_duplicate_submissions_collapse_into_the_in_flight_job(self):
+        job_id = idempotency_key('normalize', 'article')
+        first = enqueue_once(self.queue, succeed, 'article', job_id=job_id)
+        second = enqueue_once(self.queue, succeed, 'article', job_id=job_id)
+
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(self.queue.count, 1)
+
+        SimpleWorker([self.queue], connection=self.redis).work(burst=True)
+        self.assertEqual(first.get_status(), JobStatus.FINISHED)
+        # Finished work can be submitted again
+        third = enqueue_once(self.queue, succeed, 'article', job_id=job_id)
+        self.assertEqual(third.get_status(), JobStatus.QUEUED)
+
+    def test_ingestion_is_single_flight_per_sender(self):
+        first = scheduler.schedule_ingestion('news@example.com', queue=self.queue)
+        self.assertIsNotNone(first)
+        self.assertIsNone(scheduler.schedule_ingestion('news@example.com', queue=self.queue))
+        self.assertIsNotNone(scheduler.schedule_ingestion('other@example.com', queue=self.queue))
+        self.assertEqual(self.queue.count, 2)
+
+    def test_lock_is_released_when_the_run_ends(self):
+        job = scheduler.schedule_ingestion('news@example.com', queue=self.queue)
+        lock = scheduler.ingestion_lock('news@example.com', self.redis)
+        self.assertEqual(lock.holder(), job.meta['lock_token'])
+
+        # The failure callback frees the lock
+        with patch.object(jobs, 'process_email_ingestion', side_effect=RuntimeError('Gmail unavailable')):
+            SimpleWorker([self.queue], connection=self.redis).work(burst=True)
+        self.assertEqual(job.get_status(), JobStatus.FAILED)
+        self.assertIsNone(lock.holder())
+        self.assertIsNotNone(scheduler.schedule_ingestion('news@example.com', queue=self.queue))
+
+    def test_lock_is_released_when_the_run_collapses_into_an_in_flight_one(self):
+        job = scheduler.schedule_ingestion('news@example.com', queue=self.queue)
+        lock = scheduler.ingestion_lock('news@example.com', self.redis)
+        # The run's lock expired while it waited in the queue
+        lock.release(job.meta['lock_token'])
+
+        collapsed = scheduler.schedule_ingestion('news@example.com', queue=self.queue)
+        self.assertEqual((collapsed.id, self.queue.count), (job.id, 1))
+        self.assertIsNone(lock.holder())
+        self.assertIsNotNone(lock.acquire())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import base64
+import os
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from bson import ObjectId
+
+from services.ingestion import extraction, fetch_emails
+from services.ingestion.extraction import ExtractionExecutor
+from services.ingestion.pipeline import run_newsletter_pipeline
+
+
+def _gmail_service(num_messages, links_per_message):
+    gmail_service = Mock()
+    messages = gmail_service.users.return_value.messages.return_value
+
+    list_request = Mock()
+    list_request.execute.return_value = {'messages': [{'id': f'msg{i}'} for i in range(num_messages)]}
+    messages.list.return_value = list_request
+    messages.list_next.return_value = None
+
+    def get(userId, id):
+        html = ''.join(f'<a href="https://example.com/{id}/{j}">x</a>' for j in range(links_per_message))
+        encoded = base64.urlsafe_b64encode(html.encode()).decode()
+        request = Mock()
+        request.execute.return_value = {'payload': {'mimeType': 'text/html', 'body': {'data': encoded}}}
+        return request
+
+    messages.get.side_effect = get
+    return gmail_service
+
+
+class IngestPipelineTests(unittest.TestCase):
+
+    def test_articles_are_persisted_while_scraping_continues(self):
+        events = []
+        lock = threading.Lock()
+
+        def scrape(article):
+            with lock:
+                events.append(('scrape', article.url))
+            article.full_text = 'text'
+            return article
+
+        def persist(article):
+            with lock:
+                events.append(('persist', article.url))
+            return article._id
+
+        stored = run_newsletter_pipeline(
+            _gmail_service(3, 5), 'dan@tldrnewsletter.com', ObjectId(),
+            scrape=scrape, persist=persist,
+            queue_size=1, scrape_concurrency=1, persist_concurrency=1,
+        )
+
+        self.assertEqual(stored, 15)
+        kinds = [kind for kind, _ in events]
+        self.assertEqual(kinds.count('persist'), 15)
+        # The first article is stored before the last one has been scraped
+        last_scrape = len(kinds) - 1 - kinds[::-1].index('scrape')
+        self.assertLess(kinds.index('persist'), last_scrape)
+
+    def test_gmail_calls_never_overlap(self):
+        gmail_service = _gmail_service(4, 2)
+        messages = gmail_service.users.return_value.messages.return_value
+        in_call, overlaps = [0], []
+        lock = threading.Lock()
+
+        def exclusive(execute):
+            def call():
+                with lock:
+                    in_call[0] += 1
+                    if in_call[0] > 1:
+                        overlaps.append(threading.current_thread().name)
+                time.sleep(0.01)
+                with lock:
+                    in_call[0] -= 1
+                return execute()
+            return call
+
+        # Three pages of messages, listed while the first ones are fetched
+        pages = [{'messages': [{'id': f'msg{page}_{i}'} for i in range(4)]} for page in range(3)]
+        list_requests = []
+        for page in pages:
+            request = Mock()
+            request.execute.side_effect = exclusive(lambda page=page: page)
+            list_requests.append(request)
+        messages.list.return_value = list_requests[0]
+        messages.list_next.side_effect = list_requests[1:] + [None]
+        get = messages.get.side_effect
+
+        def exclusive_get(userId, id):
+            request = get(userId, id)
+            request.execute.side_effect = exclusive(request.execute.return_value.copy)
+            return request
+
+        messages.get.side_effect = exclusive_get
+
+        stored = run_newsletter_pipeline(
+            gmail_service, 'dan@tldrnewsletter.com', ObjectId(),
+            scrape=lambda article: article, persist=lambda article: article._id,
+        )
+        self.assertEqual(stored, 24)
+        self.assertEqual(overlaps, [])
+
+    def test_failed_scrape_does_not_stop_the_issue(self):
+        def scrape(article):
+            if article.url.endswith('/1'):
+                raise Exception('boom')
+            return article
+
+        stored = run_newsletter_pipeline(
+            _gmail_service(2, 3), 'dan@tldrnewsletter.com', ObjectId(),
+            scrape=scrape, persist=lambda article: article._id,
+        )
+        self.assertEqual(stored, 4)
+
+    def test_malformed_newsletter_body_does_not_drop_the_others(self):
+        extract = fetch_emails._extract_link_from_html
+
+        def extract_links(html):
+            if 'msg1/' in html:
+                raise ValueError('malformed')
+            return extract(html)
+
+        with patch.object(fetch_emails, 'get_extraction_executor', lambda: ExtractionExecutor(max_workers=0)), \
+                patch.object(fetch_emails, '_extract_link_from_html', extract_links):
+            links = fetch_emails.get_latest_newsletter_links(_gmail_service(3, 2), 'dan@tldrnewsletter.com')
+
+        self.assertEqual(len(links), 4)
+        self.assertFalse(any('/msg1/' in link for link in links))
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'needs fork()')
+    def test_forked_work_horses_extract_inline(self):
+        read, write = os.pipe()
+        with patch.object(extraction, '_executor', ExtractionExecutor(max_workers=2)):
+            pid = os.fork()
+            if pid == 0:
+                # An RQ work horse: no pool of its own, nor the parent's
+                os.write(write, str(extraction.get_extraction_executor().max_workers).encode())
+                os._exit(0)
+            os.waitpid(pid, 0)
+            self.assertEqual(extraction.get_extraction_executor().max_workers, 2)
+            extraction._executor.shutdown()
+        self.assertEqual(os.read(read, 16), b'0')
+        os.close(read)
+        os.close(write)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from rq import Queue
+
+from services.ingestion import jobs
+
+
+class FakeArticles:
+    """The articles collection as the fan-out uses it, with message_id unique."""
+
+    def __init__(self):
+        self.docs = []
+        # A concurrent run inserts between our lookup and our insert
+        self.racing = []
+
+    def find(self, query, projection):
+        wanted = query["message_id"]["$in"]
+        return [doc for doc in self.docs if doc["message_id"] in wanted]
+
+    def insert_many(self, docs, ordered=True):
+        self.docs.extend(self.racing)
+        self.racing = []
+        known = {doc["message_id"] for doc in self.docs}
+        errors = []
+        for index, doc in enumerate(docs):
+            if doc["message_id"] in known:
+                errors.append({"index": index, "code": 11000, "errmsg": "duplicate key"})
+                continue
+            doc["_id"] = ObjectId()
+            self.docs.append(doc)
+            known.add(doc["message_id"])
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+
+class EmailIngestionFanOutTests(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        self.queue = Queue('ingest_article_backfill', connection=self.redis)
+        self.articles = FakeArticles()
+        self.messages = []
+        patchers = [
+            patch.object(jobs, 'db', MagicMock(articles=self.articles)),
+            patch.object(jobs, 'get_queue', lambda name, priority: self.queue),
+            patch.object(jobs, 'get_gmail_service', MagicMock()),
+            patch.object(jobs, '_iter_messages', lambda service, sender, start: iter(self.messages)),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def ingest(self, *message_ids):
+        self.messages = [{'id': message_id} for message_id in message_ids]
+        jobs.process_email_ingestion('dan@tldrnewsletter.com', priority='backfill')
+
+    def test_each_new_message_gets_one_stub_and_one_job(self):
+        self.ingest('m1', 'm2', 'm3')
+
+        self.assertEqual([doc['message_id'] for doc in self.articles.docs], ['m1', 'm2', 'm3'])
+        self.assertEqual(self.queue.job_ids, [f"ingest_{doc['_id']}" for doc in self.articles.docs])
+        job = self.queue.fetch_job(self.queue.job_ids[0])
+        self.assertEqual(job.args, (str(self.articles.docs[0]['_id']), 'backfill'))
+        self.assertEqual(job.meta['priority'], 'backfill')
+
+    def test_messages_already_ingested_get_no_second_job(self):
+        self.ingest('m1', 'm2')
+        # m3 is inserted by another run after our lookup
+        self.articles.racing = [{'_id': ObjectId(), 'message_id': 'm3'}]
+        self.ingest('m1', 'm2', 'm3', 'm4')
+
+        self.assertEqual(sorted(doc['message_id'] for doc in self.articles.docs), ['m1', 'm2', 'm3', 'm4'])
+        self.assertEqual(len(self.queue.job_ids), 3)
+        m4 = next(doc for doc in self.articles.docs if doc['message_id'] == 'm4')
+        self.assertEqual(self.queue.job_ids[-1], f"ingest_{m4['_id']}")
+
+
+if __name__ == '__main__':
+    unittest.main()
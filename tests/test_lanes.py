@@ -0,0 +1,52 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import fakeredis
+from rq import Queue
+from rq.job import JobStatus
+
+from services.supervisor.lanes import LaneSimpleWorker, lane_meta, lane_wait_stats, order_by_urgency
+
+
+class LaneTests(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        self.interactive, self.scheduled, self.backfill = (
+            Queue(name, connection=self.redis)
+            for name in ('normalize_interactive', 'normalize', 'normalize_backfill')
+        )
+        self.queues = [self.backfill, self.scheduled, self.interactive]
+
+    def test_empty_queues_listen_most_urgent_class_first(self):
+        self.assertEqual(order_by_urgency(self.queues, self.redis), [self.interactive, self.scheduled, self.backfill])
+
+    def test_job_past_its_deadline_beats_fresh_work(self):
+        self.scheduled.enqueue(len, 'fresh', meta=lane_meta('scheduled'))
+        overdue = datetime.now(timezone.utc) - timedelta(minutes=5)
+        self.backfill.enqueue(len, 'overdue', meta=lane_meta('backfill', deadline=overdue))
+        self.assertEqual(order_by_urgency(self.queues, self.redis), [self.backfill, self.scheduled, self.interactive])
+
+    def test_interactive_job_served_before_earlier_backfill(self):
+        backfill_jobs = [self.backfill.enqueue(len, 'x' * i, meta=lane_meta('backfill')) for i in range(5)]
+        interactive_job = self.interactive.enqueue(len, 'urgent', meta=lane_meta('interactive'))
+
+        worker = LaneSimpleWorker(self.queues, connection=self.redis)
+        worker.work(burst=True, max_jobs=1)
+
+        self.assertEqual(interactive_job.get_status(), JobStatus.FINISHED)
+        self.assertTrue(all(job.get_status() == JobStatus.QUEUED for job in backfill_jobs))
+        stats = lane_wait_stats(self.redis)
+        self.assertEqual(stats['interactive']['count'], 1)
+        self.assertLess(stats['interactive']['max_sec'], 5)
+        self.assertEqual(stats['backfill']['count'], 0)
+
+    def test_missed_deadlines_are_counted(self):
+        self.scheduled.enqueue(len, 'late', meta=lane_meta('scheduled', deadline=datetime.now() - timedelta(seconds=1)))
+        LaneSimpleWorker(self.queues, connection=self.redis).work(burst=True)
+        stats = lane_wait_stats(self.redis)['scheduled']
+        self.assertEqual((stats['count'], stats['missed_deadlines']), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from pymongo import DESCENDING
+
+from api.main import app
+from api.routes import lists
+from db.indexes import INDEXES, KNOWN_QUERIES
+
+
+class FakeCursor:
+    """The find().sort().limit().to_list() chain over documents in memory."""
+
+    def __init__(self, docs, query, projection):
+        bound = query.get('_id', {}).get('$lt')
+        self.docs = [
+            {key: value for key, value in doc.items() if key == '_id' or key in projection}
+            for doc in docs
+            if all(doc.get(key) == value for key, value in query.items() if key != '_id')
+            and (bound is None or doc['_id'] < bound)
+        ]
+
+    def sort(self, key, direction):
+        self.docs.sort(key=lambda doc: doc[key], reverse=direction == DESCENDING)
+        return self
+
+    def limit(self, limit):
+        self.docs = self.docs[:limit]
+        return self
+
+    async def to_list(self, length):
+        return self.docs
+
+
+class ListTests(unittest.TestCase):
+
+    def setUp(self):
+        self.jobs = [{'_id': ObjectId(), 'job_id': str(i), 'status': 'failed' if i % 2 else 'completed',
+                      'input': {'source_text': 'x' * 1000}} for i in range(7)]
+        jobs = MagicMock()
+        jobs.find.side_effect = lambda query, projection: FakeCursor(self.jobs, query, projection)
+        patcher = patch.object(lists, 'get_async_db', lambda: {'jobs': jobs})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = TestClient(app)
+
+    def test_pages_follow_the_cursor_newest_first(self):
+        pages, cursor = [], None
+        while True:
+            params = {'status': 'failed', 'limit': 2, **({'cursor': cursor} if cursor else {})}
+            body = self.client.get('/jobs', params=params).json()
+            pages.append([item['job_id'] for item in body['items']])
+            cursor = body['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(pages, [['5', '3'], ['1']])
+
+    def test_projection_and_page_size_cap(self):
+        with patch.object(lists, 'LIST_PAGE_SIZE_MAX', 3):
+            body = self.client.get('/jobs', params={'limit': 100, 'fields': 'job_id'}).json()
+        self.assertEqual(body['limit'], 3)
+        self.assertEqual(set(body['items'][0]), {'id', 'job_id'})
+        self.assertEqual(self.client.get('/jobs', params={'fields': 'input'}).status_code, 400)
+
+    def test_every_list_filter_is_backed_by_an_index(self):
+        keys = {(collection, tuple(model.document['key'].items()))
+                for collection, models in INDEXES.items() for model in models}
+        for description, collection, query, sort in KNOWN_QUERIES:
+            if sort is None or len(query) == 1:
+                continue
+            fields = [(field, 1) for field in query if field != '_id']
+            self.assertIn((collection, tuple(fields + [('_id', DESCENDING)])), keys, description)
+
+
+if __name__ == '__main__':
+    unittest.main()
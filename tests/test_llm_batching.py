@@ -0,0 +1,103 @@
+import time
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+from rq import Queue
+from rq.job import JobStatus
+
+from services.llm_worker import batching
+
+BATCH_SIZES = []
+
+
+def shout_all(texts):
+    BATCH_SIZES.append(len(texts))
+    return [text.upper() for text in texts]
+
+
+def shout(text):
+    return batching.batched_result(shout_all, text)
+
+
+def slow_shout_all(texts):
+    BATCH_SIZES.append(len(texts))
+    time.sleep(SECONDS_PER_TEXT * len(texts) + (BATCH_STALL_SEC if len(texts) > 1 else 0))
+    return [text.upper() for text in texts]
+
+
+def slow_shout(text):
+    return batching.batched_result(slow_shout_all, text)
+
+
+SECONDS_PER_TEXT = 0.4
+BATCH_STALL_SEC = 0
+
+
+class MicroBatchingTests(unittest.TestCase):
+
+    def setUp(self):
+        BATCH_SIZES.clear()
+        self.redis = fakeredis.FakeStrictRedis()
+        self.queue = Queue('summarize_chunks', connection=self.redis)
+        jobs = {f'{shout.__module__}.shout': 'test', f'{shout.__module__}.slow_shout': 'test'}
+        patcher = patch.dict(batching.BATCHABLE_JOBS, jobs)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def worker(self, batch_size):
+        worker = batching.BatchingWorker([self.queue], connection=self.redis)
+        worker.batch_size, worker.batch_wait_ms = batch_size, 0
+        return worker
+
+    def test_compatible_jobs_run_as_one_batch(self):
+        jobs = [self.queue.enqueue(shout, f'text {i}') for i in range(5)]
+        other_model = self.queue.enqueue(shout, 'other', meta={'model': 'another-model'})
+
+        self.worker(batch_size=4).work(burst=True)
+
+        self.assertEqual(BATCH_SIZES, [4, 1, 1])
+        self.assertEqual([job.return_value() for job in jobs], [f'TEXT {i}' for i in range(5)])
+        self.assertEqual(other_model.get_status(), JobStatus.FINISHED)
+        self.assertEqual(self.redis.keys(batching.CLAIMED_KEY.format('*')), [])
+
+    def test_the_batch_leader_gets_the_timeout_of_every_job_in_its_batch(self):
+        # 1.2s for the batch: more than one job's timeout, less than three
+        jobs = [self.queue.enqueue(slow_shout, f'text {i}', job_timeout=1) for i in range(3)]
+
+        self.worker(batch_size=3).work(burst=True)
+
+        self.assertEqual(BATCH_SIZES, [3])
+        self.assertEqual([job.get_status() for job in jobs], [JobStatus.FINISHED] * 3)
+        self.assertEqual([job.return_value() for job in jobs], [f'TEXT {i}' for i in range(3)])
+        # The batch's timeout is not saved with the leader
+        jobs[0].refresh()
+        self.assertEqual(jobs[0].timeout, 1)
+
+    def test_a_batch_that_times_out_falls_back_to_one_job_at_a_time(self):
+        jobs = [self.queue.enqueue(slow_shout, f'text {i}', job_timeout=1) for i in range(2)]
+
+        # 2.2s for the batch, over the timeout of both jobs
+        with patch(f'{__name__}.BATCH_STALL_SEC', 1.4), patch('utils.dead_letter.record_dead_letter'):
+            self.worker(batch_size=2).work(burst=True)
+
+        self.assertEqual(BATCH_SIZES, [2, 1])
+        self.assertEqual(jobs[0].get_status(), JobStatus.FAILED)
+        self.assertIn('JobTimeoutException', jobs[0].latest_result().exc_string)
+        self.assertEqual(jobs[0].timeout, 1)
+        self.assertEqual(jobs[1].get_status(), JobStatus.FINISHED)
+        self.assertEqual(jobs[1].return_value(), 'TEXT 1')
+
+    def test_jobs_claimed_by_a_dead_worker_are_requeued(self):
+        jobs = [self.queue.enqueue(shout, f'text {i}') for i in range(3)]
+        claimed = batching.claim_compatible([self.queue], (batching.LLM_MODEL_NAME, 'test'), 2,
+                                            batching.CLAIMED_KEY.format('dead-worker'), self.redis)
+        self.assertEqual([job.id for job, _ in claimed], [jobs[0].id, jobs[1].id])
+        self.assertEqual(self.queue.job_ids, [jobs[2].id])
+
+        self.assertEqual(batching.requeue_orphaned_batches(self.redis), 2)
+        self.assertEqual(sorted(self.queue.job_ids), sorted(job.id for job in jobs))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+from rq import Queue
+
+from services.supervisor.lanes import LaneSimpleWorker
+from utils import dead_letter, metrics
+
+
+def work():
+    return 'ok'
+
+
+def fail():
+    raise RuntimeError('model unavailable')
+
+
+class MetricsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        self.queues = [Queue(name, connection=self.redis) for name in ('normalize', 'normalize_interactive')]
+
+    def scrape(self):
+        return metrics.render(metrics.collect(self.redis, self.queues)).splitlines()
+
+    def test_queue_depth_age_and_registries(self):
+        normalize, interactive = self.queues
+        normalize.enqueue(work)
+        normalize.enqueue(work)
+        interactive.enqueue(work)
+        interactive.enqueue(fail)
+        with patch.object(dead_letter, 'db', MagicMock()):
+            LaneSimpleWorker([interactive], connection=self.redis).work(burst=True)
+
+        lines = self.scrape()
+        self.assertIn('pipeline_queue_depth{queue="normalize"} 2', lines)
+        self.assertIn('pipeline_queue_depth{queue="normalize_interactive"} 0', lines)
+        self.assertIn('pipeline_queue_oldest_job_age_seconds{queue="normalize_interactive"} 0', lines)
+        age = next(line for line in lines if line.startswith('pipeline_queue_oldest_job_age_seconds{queue="normalize"}'))
+        self.assertGreater(float(age.split()[-1]), 0)
+        self.assertIn('pipeline_queue_jobs{queue="normalize_interactive",state="finished"} 1', lines)
+        self.assertIn('pipeline_queue_jobs{queue="normalize_interactive",state="failed"} 1', lines)
+
+        # Both lanes report under their stage, by outcome
+        self.assertIn('pipeline_stage_duration_seconds_count{stage="normalize",status="finished"} 1', lines)
+        self.assertIn('pipeline_stage_duration_seconds_count{stage="normalize",status="failed"} 1', lines)
+        self.assertIn('pipeline_stage_duration_seconds_bucket{stage="normalize",status="finished",le="+Inf"} 1',
+                      lines)
+        self.assertIn('# TYPE pipeline_stage_duration_seconds histogram', lines)
+
+    def test_histogram_buckets_are_cumulative(self):
+        for seconds in (0.05, 3, 3, 7200):
+            metrics.observe_stage('summarize_chunks', 'finished', seconds, self.redis)
+
+        lines = self.scrape()
+        bucket = 'pipeline_stage_duration_seconds_bucket{stage="summarize_chunks",status="finished",le="%s"} %d'
+        self.assertIn(bucket % ('0.1', 1), lines)
+        self.assertIn(bucket % ('1', 1), lines)
+        self.assertIn(bucket % ('5', 3), lines)
+        self.assertIn(bucket % ('3600', 3), lines)
+        self.assertIn(bucket % ('+Inf', 4), lines)
+        self.assertIn('pipeline_stage_duration_seconds_sum{stage="summarize_chunks",status="finished"} 7206.05',
+                      lines)
+
+    def test_llm_throughput(self):
+        metrics.record_generation('meta-llama/Llama-3.1-8B', 400, 10.0, self.redis)
+        metrics.record_generation('meta-llama/Llama-3.1-8B', 300, 5.0, self.redis)
+
+        lines = self.scrape()
+        self.assertIn('pipeline_llm_generated_tokens_total{model="meta-llama/Llama-3.1-8B"} 700', lines)
+        self.assertIn('pipeline_llm_generation_seconds_total{model="meta-llama/Llama-3.1-8B"} 15', lines)
+        self.assertIn('pipeline_llm_tokens_per_second{model="meta-llama/Llama-3.1-8B"} 60', lines)
+
+
+if __name__ == '__main__':
+    unittest.main()
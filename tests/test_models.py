@@ -0,0 +1,42 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from bson import ObjectId
+
+from db.database import Article, Chunk
+
+
+class ModelTests(unittest.TestCase):
+
+    def test_models_have_no_instance_dict(self):
+        chunk = Chunk(article_id=ObjectId(), chunk_text='text')
+        self.assertFalse(hasattr(chunk, '__dict__'))
+        with self.assertRaises(AttributeError):
+            chunk.unknown_field = 1
+
+    def test_from_mongo_filters_by_id(self):
+        article_id = ObjectId()
+        collection = MagicMock()
+        collection.find_one.return_value = {'_id': article_id, 'episode_id': ObjectId(), 'url': 'https://a.b'}
+        with patch('db.database.db', {'articles': collection}):
+            article = Article.from_mongo(article_id)
+        collection.find_one.assert_called_once_with({'_id': article_id})
+        self.assertEqual(article.url, 'https://a.b')
+
+    def test_iter_from_cursor_hydrates_projected_documents(self):
+        article_id = ObjectId()
+        docs = [{'_id': ObjectId(), 'article_id': article_id, 'status': 'recombined'} for _ in range(3)]
+        collection = MagicMock()
+        collection.find.return_value = MagicMock(__iter__=lambda self: iter(docs))
+        with patch('db.database.db', {'chunks': collection}):
+            chunks = list(Chunk.iter_from_cursor({'article_id': article_id}, batch_size=2,
+                                                 projection={'chunk_text': 0}))
+        collection.find.assert_called_once_with({'article_id': article_id}, {'chunk_text': 0}, batch_size=2,
+                                                sort=None)
+        collection.find.return_value.close.assert_called_once()
+        self.assertEqual([chunk._id for chunk in chunks], [doc['_id'] for doc in docs])
+        self.assertIsNone(chunks[0].chunk_text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+from bson import ObjectId
+from rq import Queue, SimpleWorker
+from rq.job import JobStatus
+
+from services.pipeline import jobs, stages, status_cache
+
+
+class PipelineStageTests(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        self.queues = {name: Queue(name, connection=self.redis) for name in stages.STAGE_QUEUES.values()}
+
+    def test_later_stages_wait_for_the_previous_one(self):
+        article_id = str(ObjectId())
+        with patch.object(stages, 'get_queue', lambda name, priority: self.queues[name]):
+            normalize, summarize, *rest = stages.enqueue_pipeline(article_id)
+
+        self.assertEqual(normalize.id, f'normalize_{article_id}')
+        self.assertEqual(normalize.get_status(), JobStatus.QUEUED)
+        self.assertEqual(summarize.get_status(), JobStatus.DEFERRED)
+        self.assertEqual(summarize.dependency_ids, [normalize.id])
+        self.assertEqual([job.id for job in rest],
+                         [f'{stage}_{article_id}' for stage in ('assemble', 'text_to_speech', 'publish')])
+
+        with patch.object(jobs, 'normalize_article_job', return_value=1):
+            SimpleWorker([self.queues['normalize']], connection=self.redis).work(burst=True)
+        self.assertEqual(normalize.get_status(), JobStatus.FINISHED)
+        self.assertEqual(summarize.get_status(), JobStatus.QUEUED)
+
+    def test_bulk_enqueue_chains_every_article_in_one_transaction(self):
+        article_ids = [str(ObjectId()) for _ in range(3)]
+        with patch.object(stages, 'get_queue', lambda name, priority: self.queues[name]):
+            pipelines = stages.enqueue_pipelines([(article_id, 'scheduled', None) for article_id in article_ids])
+
+        self.assertEqual(self.queues['normalize'].job_ids, [f'normalize_{article_id}' for article_id in article_ids])
+        for article_id, (normalize, summarize, *rest) in zip(article_ids, pipelines):
+            self.assertEqual(summarize.get_status(), JobStatus.DEFERRED)
+            self.assertEqual(summarize.dependency_ids, [normalize.id])
+            self.assertEqual(rest[-1].dependency_ids, [rest[-2].id])
+        # Claimed, so a resubmission does not enqueue the jobs again
+        with patch.object(stages, 'get_queue', lambda name, priority: self.queues[name]):
+            stages.enqueue_pipeline(article_ids[0])
+        self.assertEqual(self.queues['normalize'].count, 3)
+
+        with patch.object(jobs, 'normalize_article_job', return_value=1):
+            SimpleWorker([self.queues['normalize']], connection=self.redis).work(burst=True)
+        self.assertEqual([pipeline[1].get_status() for pipeline in pipelines], [JobStatus.QUEUED] * 3)
+
+    def test_stage_status_is_recorded_with_timestamps(self):
+        article_id = ObjectId()
+        articles = MagicMock()
+        with patch.object(jobs, 'db', MagicMock(articles=articles)), \
+                patch.object(status_cache, 'redis_conn', self.redis):
+            with self.assertRaises(ValueError):
+                with jobs._stage('summarize', str(article_id)):
+                    raise ValueError('model unavailable')
+
+        running, failed = [call.args for call in articles.update_one.call_args_list]
+        self.assertEqual(running[0], {'_id': article_id})
+        self.assertEqual(running[1]['$set']['pipeline_status.summarize'], 'running')
+        self.assertEqual(failed[1]['$set']['pipeline_status.summarize'], 'failed')
+        self.assertIn('pipeline_status.summarize_updated_at', failed[1]['$set'])
+        self.assertEqual(failed[1]['$set']['error'], 'summarize: model unavailable')
+        # Written through to the status cache
+        cached = self.redis.hgetall(status_cache.STATUS_KEY.format(article_id))
+        self.assertEqual(cached[b'summarize'], b'failed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+from rq import Queue, Retry
+from rq.job import Job, JobStatus
+
+from services.supervisor.lanes import LaneSimpleWorker
+from utils import dead_letter
+from utils.resilience import CircuitBreaker, CircuitOpenError, backoff_intervals
+
+
+class Unavailable(Exception):
+    code = 503
+
+
+class BadRequest(Exception):
+    code = 400
+
+
+def fail():
+    raise RuntimeError('TTS unavailable')
+
+
+class CircuitBreakerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = 0
+        self.breaker = CircuitBreaker('tts', failure_threshold=3, failure_window=60, reset_timeout=0.2,
+                                      connection=fakeredis.FakeStrictRedis())
+
+    def call(self, error=None):
+        def dependency():
+            self.calls += 1
+            if error:
+                raise error
+            return 'ok'
+        return self.breaker.call(dependency)
+
+    def test_opens_after_repeated_outages_and_recovers_after_a_trial(self):
+        for _ in range(3):
+            with self.assertRaises(Unavailable):
+                self.call(Unavailable())
+        with self.assertRaises(CircuitOpenError):
+            self.call()
+        self.assertEqual((self.calls, self.breaker.state()), (3, 'open'))
+
+        time.sleep(0.25)
+        self.assertEqual(self.breaker.state(), 'half-open')
+        self.assertEqual(self.call(), 'ok')
+        self.assertEqual(self.breaker.state(), 'closed')
+
+    def test_failed_trial_opens_the_circuit_again(self):
+        self.breaker.trip()
+        time.sleep(0.25)
+        with self.assertRaises(Unavailable):
+            self.call(Unavailable())
+        self.assertEqual(self.breaker.state(), 'open')
+
+    def test_bad_requests_do_not_count_as_outages(self):
+        for _ in range(5):
+            with self.assertRaises(BadRequest):
+                self.call(BadRequest())
+        self.assertEqual(self.breaker.state(), 'closed')
+
+
+class RetryTests(unittest.TestCase):
+
+    def test_backoff_doubles_with_jitter_up_to_the_cap(self):
+        for _ in range(20):
+            intervals = backoff_intervals(5, base=10, cap=100)
+            for interval, step in zip(intervals, [10, 20, 40, 80, 100]):
+                self.assertTrue(step / 2 <= interval <= step, intervals)
+
+    def test_only_the_final_failure_is_dead_lettered(self):
+        redis = fakeredis.FakeStrictRedis()
+        queue = Queue('text_to_speech', connection=redis)
+        job = queue.enqueue(fail, retry=Retry(max=1))
+        dead_letters = MagicMock()
+
+        # The immediate retry runs in the same burst
+        with patch.object(dead_letter, 'db', MagicMock(dead_letters=dead_letters)):
+            LaneSimpleWorker([queue], connection=redis).work(burst=True)
+
+        job.refresh()
+        self.assertEqual(job.retries_left, 0)
+        self.assertEqual(dead_letters.update_one.call_count, 1)
+        self.assertEqual(job.get_status(), JobStatus.FAILED)
+        (query, update), _ = dead_letters.update_one.call_args
+        self.assertEqual(query, {'job_id': job.id})
+        self.assertEqual(update['$set']['queue'], 'text_to_speech')
+        self.assertIn('TTS unavailable', update['$set']['exc_info'])
+
+    def test_expired_dead_job_is_recreated_with_its_stage_settings(self):
+        redis = fakeredis.FakeStrictRedis()
+        record = {'job_id': 'summarize_abc', 'queue': 'summarize_chunks',
+                  'func_name': 'services.pipeline.jobs.summarize_article_job', 'args': ['abc'],
+                  'meta': {'priority': 'backfill', 'traceparent': '00-' + '1' * 32 + '-' + '2' * 16 + '-01'}}
+
+        dead_letter.replay_job(record, redis)
+
+        job = Job.fetch('summarize_abc', connection=redis)
+        self.assertEqual(job.timeout, 3600)
+        self.assertEqual(job.retries_left, 2)
+        self.assertEqual(job.meta['priority'], 'backfill')
+        self.assertIn('traceparent', job.meta)
+        self.assertEqual(job.get_status(), JobStatus.QUEUED)
+
+
+if __name__ == '__main__':
+    unittest.main()
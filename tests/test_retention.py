@@ -0,0 +1,146 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from bson import ObjectId
+
+from db import retention
+
+
+def _get(doc, path):
+    for part in path.split('.'):
+        if not isinstance(doc, dict) or part not in doc:
+            return None, False
+        doc = doc[part]
+    return doc, True
+
+
+def _matches(doc, query):
+    for path, condition in query.items():
+        value, present = _get(doc, path)
+        if not isinstance(condition, dict):
+            condition = {'$eq': condition}
+        for operator, operand in condition.items():
+            if operator == '$eq' and value != operand \
+                    or operator == '$in' and value not in operand \
+                    or operator == '$lt' and not (present and value < operand) \
+                    or operator == '$exists' and present != operand:
+                return False
+    return True
+
+
+def _project(doc, projection):
+    projected = {'_id': doc['_id']}
+    for path in projection:
+        value, present = _get(doc, path)
+        if present:
+            *parents, last = path.split('.')
+            target = projected
+            for part in parents:
+                target = target.setdefault(part, {})
+            target[last] = value
+    return projected
+
+
+class FakeResult:
+    def __init__(self, modified_count):
+        self.modified_count = modified_count
+
+
+class FakeCursor(list):
+    def limit(self, limit):
+        return FakeCursor(self[:limit])
+
+
+class FakeCollection:
+    """The subset of a pymongo collection db/retention.py uses, in memory."""
+
+    def __init__(self, docs=()):
+        self.docs = [dict(doc) for doc in docs]
+
+    def find(self, query, projection):
+        return FakeCursor(_project(doc, projection) for doc in self.docs if _matches(doc, query))
+
+    def count_documents(self, query):
+        return sum(_matches(doc, query) for doc in self.docs)
+
+    def delete_many(self, query):
+        self.docs = [doc for doc in self.docs if not _matches(doc, query)]
+
+    def update_many(self, query, update):
+        matched = [doc for doc in self.docs if _matches(doc, query)]
+        for doc in matched:
+            doc.update(update['$set'])
+        return FakeResult(len(matched))
+
+    def bulk_write(self, requests, ordered=True):
+        for request in requests:
+            self.docs = [doc for doc in self.docs if not _matches(doc, request._filter)]
+            self.docs.append(dict(request._doc))
+
+    def aggregate(self, pipeline):
+        return iter([{'storageStats': {'count': len(self.docs), 'size': 100 * len(self.docs),
+                                       'storageSize': 4096, 'totalIndexSize': 2048}}])
+
+
+class FakeDatabase(dict):
+    def __getattr__(self, name):
+        return self[name]
+
+
+class RetentionTests(unittest.TestCase):
+
+    def setUp(self):
+        now = datetime.now()
+        old, recent = now - timedelta(days=30), now - timedelta(days=1)
+        self.jobs = [
+            {'_id': ObjectId(), 'job_id': 'old-done', 'status': 'completed', 'metrics': {'completed_at': old},
+             'input': {'source_text': 'x' * 1000, 'model': 'm'}, 'output': {'script': 's', 'tokens_generated': 9}},
+            {'_id': ObjectId(), 'job_id': 'old-failed', 'status': 'failed', 'metrics': {'completed_at': old}},
+            {'_id': ObjectId(), 'job_id': 'old-running', 'status': 'running', 'metrics': {'started_at': old}},
+            {'_id': ObjectId(), 'job_id': 'recent-done', 'status': 'completed', 'metrics': {'completed_at': recent}},
+        ]
+        self.db = FakeDatabase({name: FakeCollection() for name in retention.REPORTED_COLLECTIONS})
+        self.db['jobs'] = FakeCollection(self.jobs)
+        patcher = patch.object(retention, 'db', self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def job_ids(self, collection):
+        return sorted(doc['job_id'] for doc in self.db[collection].docs)
+
+    def test_only_jobs_finished_before_the_cutoff_are_archived(self):
+        self.assertEqual(retention.archive_finished_jobs(older_than_days=7, dry_run=True), 2)
+        self.assertEqual(self.job_ids('jobs_archive'), [])
+
+        self.assertEqual(retention.archive_finished_jobs(older_than_days=7, batch_size=1), 2)
+        self.assertEqual(self.job_ids('jobs'), ['old-running', 'recent-done'])
+        self.assertEqual(self.job_ids('jobs_archive'), ['old-done', 'old-failed'])
+        archived = next(doc for doc in self.db['jobs_archive'].docs if doc['job_id'] == 'old-done')
+        # Source text and script are not archived
+        self.assertEqual((archived['input'], archived['output']), ({'model': 'm'}, {'tokens_generated': 9}))
+        self.assertIn('archived_at', archived)
+
+        self.assertEqual(retention.archive_finished_jobs(older_than_days=7), 0)
+
+    def test_ttl_backfill_only_fills_missing_timestamps_and_is_idempotent(self):
+        created = datetime(2024, 1, 1)
+        self.db['chunks'] = FakeCollection([{'_id': 1, 'created_at': created}, {'_id': 2}])
+        self.db['summaries'] = FakeCollection([{'_id': 3}])
+        now = datetime(2024, 6, 1)
+
+        self.assertEqual(retention.backfill_ttl_fields(now), {'chunks': 1, 'summaries': 1})
+        self.assertEqual([doc['created_at'] for doc in self.db['chunks'].docs], [created, now])
+        self.assertEqual(retention.backfill_ttl_fields(datetime.now()), {'chunks': 0, 'summaries': 0})
+        self.assertEqual([doc['created_at'] for doc in self.db['chunks'].docs], [created, now])
+
+    def test_collection_sizes_report_every_collection(self):
+        sizes = retention.collection_sizes()
+        self.assertEqual(list(sizes), retention.REPORTED_COLLECTIONS)
+        self.assertEqual(sizes['jobs'], {'count': 4, 'size': 400, 'storage_size': 4096, 'index_size': 2048})
+        for size in sizes.values():
+            self.assertEqual(set(size), {'count', 'size', 'storage_size', 'index_size'})
+
+
+if __name__ == '__main__':
+    unittest.main()
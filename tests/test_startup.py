@@ -0,0 +1,66 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import fakeredis
+from fastapi.testclient import TestClient
+from rq import Queue
+
+import main
+from config import redis_config
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+# The HTTP processes must start in under a second and leave inference to the
+# workers. A slow or busy machine can raise the budget with IMPORT_BUDGET_SEC
+IMPORT_BUDGET_SEC = float(os.getenv('IMPORT_BUDGET_SEC', 1.0))
+WORKER_ONLY_MODULES = ['torch', 'transformers', 'nltk', 'googleapiclient', 'google.cloud.texttospeech',
+                       'bs4', 'playwright', 'newspaper']
+
+PROFILE = '''
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - start, "modules": sorted(sys.modules)}}))
+'''
+
+
+def profile_import(module):
+    """Import time and loaded modules of a module, in a fresh interpreter."""
+    output = subprocess.run([sys.executable, '-c', PROFILE.format(module=module)], cwd=PROJECT_ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+class StartupTests(unittest.TestCase):
+
+    def test_http_entry_points_import_fast_without_worker_dependencies(self):
+        for module in ('api.main', 'main'):
+            with self.subTest(module=module):
+                profile = profile_import(module)
+                loaded = [name for name in WORKER_ONLY_MODULES if name in profile['modules']]
+                self.assertEqual(loaded, [])
+                self.assertLess(profile['seconds'], IMPORT_BUDGET_SEC)
+
+    def test_script_generation_is_delegated_to_the_llm_queue(self):
+        redis = fakeredis.FakeStrictRedis()
+        queue = Queue(redis_config.LLM_QUEUE_NAME, connection=redis)
+        with patch.object(redis_config, 'get_queue', lambda name: queue), \
+                patch.object(redis_config, 'redis_conn', redis):
+            client = TestClient(main.app)
+            response = client.post('/generate_script', json={'source_text': 'text', 'episode_id': 'e1'})
+            self.assertEqual(response.status_code, 202)
+            job_id = response.json()['job_id']
+            self.assertEqual(queue.job_ids, [job_id])
+            self.assertEqual(queue.fetch_job(job_id).func_name, main.GENERATE_SCRIPT_JOB)
+
+            pending = client.get(f'/generate_script/{job_id}')
+            self.assertEqual((pending.status_code, pending.json()['status']), (202, 'queued'))
+            self.assertEqual(client.get('/generate_script/unknown').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
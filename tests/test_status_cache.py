@@ -0,0 +1,96 @@
+import asyncio
+import json
+import unittest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import fakeredis
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.routes import status
+from services.pipeline import status_cache
+from services.pipeline.stages import STAGES
+
+
+class StatusCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.server = fakeredis.FakeServer()
+        self.redis = fakeredis.FakeStrictRedis(server=self.server)
+        self.article_id = str(ObjectId())
+        self.articles = MagicMock(find_one=AsyncMock(return_value={
+            "_id": ObjectId(self.article_id),
+            "pipeline_status": {"normalize": "completed", "normalize_updated_at": datetime(2024, 1, 15, 10, 30)},
+            "created_at": datetime(2024, 1, 15, 10, 25),
+        }))
+        patchers = [
+            patch.object(status, 'get_async_redis_conn',
+                         lambda: fakeredis.aioredis.FakeRedis(server=self.server, decode_responses=True)),
+            patch.object(status, 'get_async_db', lambda: MagicMock(articles=self.articles)),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = TestClient(app)
+
+    def get_status(self):
+        response = self.client.get(f'/status/{self.article_id}')
+        self.assertEqual(response.status_code, 200)
+        return {stage['stage']: stage['status'] for stage in response.json()['stages']}
+
+    def test_first_read_seeds_the_cache_and_transitions_write_through(self):
+        self.assertEqual(self.get_status()['normalize'], 'completed')
+        status_cache.write_status(self.article_id, 'summarize', 'running', datetime.now(), self.redis)
+
+        stages = self.get_status()
+        self.assertEqual(self.articles.find_one.await_count, 1)
+        self.assertEqual((stages['normalize'], stages['summarize'], stages['publish']),
+                         ('completed', 'running', 'pending'))
+
+    def test_transitions_on_an_expired_cache_are_not_served_alone(self):
+        status_cache.write_status(self.article_id, 'summarize', 'running', datetime.now(), self.redis)
+
+        self.get_status()
+        stages = self.get_status()
+        self.assertEqual(self.articles.find_one.await_count, 1)
+        # Seeding from MongoDB kept the newer transition
+        self.assertEqual((stages['normalize'], stages['summarize']), ('completed', 'running'))
+
+    def stream(self, transitions):
+        async def stream():
+            redis = fakeredis.aioredis.FakeRedis(server=self.server, decode_responses=True)
+            pubsub = redis.pubsub()
+            await pubsub.subscribe(status_cache.STATUS_CHANNEL.format(self.article_id))
+            article = await status._load_status(self.article_id)
+            for stage, stage_status, final in transitions:
+                status_cache.write_status(self.article_id, stage, stage_status, datetime.now(), self.redis,
+                                          final=final)
+            request = MagicMock(is_disconnected=AsyncMock(return_value=False))
+            return [event async for event in status._status_events(request, pubsub, self.article_id, article)]
+
+        events = asyncio.run(stream())
+        final_status = json.loads(events[-1].split('data: ')[1])
+        return [event.split('\n')[0] for event in events], final_status
+
+    def test_stage_changes_are_pushed_until_the_pipeline_completes(self):
+        names, final_status = self.stream([(stage, 'completed', False) for stage in STAGES[1:]])
+        self.assertEqual(names, ['event: status'] + ['event: stage'] * 4 + ['event: status'])
+        self.assertEqual(final_status['overall_status'], 'completed')
+
+    def test_stream_ends_when_a_stage_fails_for_good_or_runs_too_long(self):
+        # A failure with retries left does not end the stream, the final one does
+        names, final_status = self.stream([('summarize', 'failed', False), ('summarize', 'running', False),
+                                           ('summarize', 'failed', True)])
+        self.assertEqual(names, ['event: status'] + ['event: stage'] * 3 + ['event: status'])
+        self.assertEqual(final_status['overall_status'], 'failed')
+
+        with patch.object(status, 'STATUS_EVENTS_MAX_SEC', 0.1):
+            names, final_status = self.stream([('summarize', 'running', False)])
+        self.assertEqual(names, ['event: status', 'event: stage', 'event: status'])
+        self.assertEqual(final_status['overall_status'], 'in_progress')
+
+
+if __name__ == '__main__':
+    unittest.main()
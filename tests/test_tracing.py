@@ -0,0 +1,70 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+
+import fakeredis
+from rq import Queue
+
+from services.supervisor.lanes import LaneSimpleWorker
+from utils import tracing
+from utils.idempotency import enqueue_once
+
+
+def synthesize():
+    with tracing.span('tts.synthesize'):
+        time.sleep(0.01)
+    return tracing.current_span().trace_id
+
+
+class TracingTests(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+        tracing.set_exporter(tracing.FileSpanExporter(self.path))
+        self.addCleanup(tracing.set_exporter, None)
+
+    def spans(self):
+        with open(self.path) as f:
+            return {span['name']: span for span in map(json.loads, f)}
+
+    def test_trace_continues_in_the_worker_with_timings_on_the_job(self):
+        redis = fakeredis.FakeStrictRedis()
+        queue = Queue('text_to_speech', connection=redis)
+        with tracing.start_trace('ingest_article') as root:
+            job = enqueue_once(queue, synthesize, job_id='text_to_speech_1')
+        self.assertEqual(job.meta['traceparent'], root.traceparent)
+
+        LaneSimpleWorker([queue], connection=redis).work(burst=True)
+
+        job.refresh()
+        self.assertEqual(job.return_value(), root.trace_id)
+        spans = self.spans()
+        stage, tts = spans['job.synthesize'], spans['tts.synthesize']
+        self.assertEqual((stage['trace_id'], stage['parent_id']), (root.trace_id, root.span_id))
+        self.assertEqual((tts['trace_id'], tts['parent_id']), (root.trace_id, stage['span_id']))
+        self.assertGreaterEqual(job.meta['timings']['tts.synthesize'], 0.01)
+        self.assertGreaterEqual(job.meta['timings']['total'], job.meta['timings']['tts.synthesize'])
+
+    def test_mongo_commands_are_spans_only_within_a_trace(self):
+        listener = tracing.MongoTracingListener()
+        event = SimpleNamespace(command_name='find', command={'find': 'articles'}, database_name='podcast',
+                                connection_id=('localhost', 27017), request_id=1)
+        listener.started(event)
+        listener.succeeded(event)
+        with tracing.start_trace('ingest_article'):
+            listener.started(event)
+            listener.succeeded(event)
+
+        spans = self.spans()
+        self.assertEqual(sorted(spans), ['ingest_article', 'mongo.find'])
+        self.assertEqual(spans['mongo.find']['attributes'], {'db': 'podcast', 'collection': 'articles'})
+        self.assertEqual(spans['mongo.find']['parent_id'], spans['ingest_article']['span_id'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+"""
+Dead-letter queue for jobs that failed for good.
+
+When a job fails with no retries left, DeadLetterMixin (part of every
+pipeline worker class) records it in the `dead_letters` collection: queue,
+function, arguments, meta, timeout and retry intervals, the traceback and
+when it died. The RQ job itself
+stays in its queue's failed job registry.
+
+replay() puts dead jobs back on their queue under the same job id, with a
+fresh retry budget, so the pipeline stages deferred behind them resume once
+they succeed. A job that expired from Redis is recreated from its record
+with the same timeout, retries and meta (lane, deadline, trace).
+
+Usage:
+    python -m utils.dead_letter list [--queue normalize]
+    python -m utils.dead_letter replay <job_id> [<job_id> ...]
+    python -m utils.dead_letter replay --all [--queue normalize]
+"""
+
+import argparse
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from rq import Queue, Retry
+from rq.exceptions import NoSuchJobError
+from rq.job import Job
+
+from db import db
+
+# Tracebacks are cut to this many characters
+MAX_TRACEBACK_CHARS = 8000
+
+
+def _bson_safe(value):
+    """Arguments as stored: plain values as they are, anything else as its repr."""
+    if value is None or isinstance(value, (str, int, float, bool, datetime)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_bson_safe(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _bson_safe(item) for key, item in value.items()}
+    return repr(value)
+
+
+def record_dead_letter(job: Job, exc_string: str = "") -> None:
+    """Upsert the dead-letter record of a job that failed for good."""
+    now = datetime.now()
+    db.dead_letters.update_one(
+        {"job_id": job.id},
+        {
+            "$set": {
+                "queue": job.origin,
+                "func_name": job.func_name,
+                "args": _bson_safe(list(job.args)),
+                "kwargs": _bson_safe(job.kwargs),
+                "meta": _bson_safe(job.meta),
+                "timeout": job.timeout,
+                "retry_intervals": list(job.retry_intervals or []),
+                "exc_info": exc_string[-MAX_TRACEBACK_CHARS:],
+                "status": "dead",
+                "failed_at": now,
+            },
+            "$inc": {"deaths": 1},
+            "$setOnInsert": {"first_failed_at": now},
+        },
+        upsert=True
+    )
+
+
+class DeadLetterMixin:
+    """Record jobs that fail with no retries left in the dead-letter queue."""
+
+    def handle_job_failure(self, job, queue, started_job_registry=None, exc_string=''):
+        if not job.retries_left and self._stopped_job_id != job.id:
+            try:
+                record_dead_letter(job, exc_string)
+            except Exception as e:
+                # The job is still in the failed job registry
+                self.log.warning("Could not dead-letter job %s: %s", job.id, e)
+        return super().handle_job_failure(job, queue, started_job_registry=started_job_registry,
+                                          exc_string=exc_string)
+
+
+def list_dead_letters(queue_name: Optional[str] = None, limit: int = 100) -> List[Dict]:
+    query = {"status": "dead"}
+    if queue_name:
+        query["queue"] = queue_name
+    projection = {"job_id": 1, "queue": 1, "func_name": 1, "args": 1, "failed_at": 1, "deaths": 1, "exc_info": 1}
+    return list(db.dead_letters.find(query, projection).sort("failed_at", -1).limit(limit))
+
+
+def _job_options(record: Dict) -> Dict:
+    """Timeout, retry policy and meta to recreate a dead job with."""
+    timeout, intervals = record.get("timeout"), record.get("retry_intervals")
+    if timeout is None or intervals is None:
+        # Recorded before these were stored: use the settings of the job's stage
+        from services.pipeline.stages import STAGE_JOBS, STAGE_RETRIES, STAGE_TIMEOUTS
+        from utils.resilience import backoff_intervals
+        stage = next((stage for stage, func_name in STAGE_JOBS.items() if func_name == record["func_name"]), None)
+        if stage is not None:
+            timeout = STAGE_TIMEOUTS[stage] if timeout is None else timeout
+            intervals = backoff_intervals(STAGE_RETRIES[stage]) if intervals is None else intervals
+    return {
+        "timeout": timeout,
+        "retry": Retry(max=len(intervals), interval=intervals) if intervals else None,
+        "meta": record.get("meta") or {},
+    }
+
+
+def replay_job(record: Dict, connection=None) -> Job:
+    """Requeue a dead job under its own id, with its retry budget restored."""
+    if connection is None:
+        from config.redis_config import redis_conn
+        connection = redis_conn
+    try:
+        job = Job.fetch(record["job_id"], connection=connection)
+    except NoSuchJobError:
+        # The RQ job expired: recreate it from the record
+        return Queue(record["queue"], connection=connection).enqueue_call(
+            record["func_name"], args=record.get("args", []), kwargs=record.get("kwargs", {}),
+            job_id=record["job_id"], **_job_options(record)
+        )
+    if job.retry_intervals:
+        job.retries_left = len(job.retry_intervals)
+        job.save()
+    return job.requeue()
+
+
+def replay(job_ids: Iterable[str] = (), queue_name: Optional[str] = None, replay_all: bool = False,
+           connection=None) -> List[str]:
+    """
+    Replay dead jobs by id, or every dead job (of a queue) with replay_all.
+
+    Returns:
+        IDs of the replayed jobs
+    """
+    query = {"status": "dead"}
+    if not replay_all:
+        query["job_id"] = {"$in": list(job_ids)}
+    if queue_name:
+        query["queue"] = queue_name
+
+    replayed = []
+    for record in db.dead_letters.find(query):
+        try:
+            replay_job(record, connection)
+        except Exception as e:
+            print(f"Could not replay {record['job_id']}: {type(e).__name__}: {e}")
+            continue
+        db.dead_letters.update_one(
+            {"_id": record["_id"]},
+            {"$set": {"status": "replayed", "replayed_at": datetime.now()}}
+        )
+        replayed.append(record["job_id"])
+    return replayed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and replay dead-lettered jobs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    list_parser = commands.add_parser("list", help="list dead jobs, most recent first")
+    list_parser.add_argument("--queue")
+    list_parser.add_argument("--limit", type=int, default=100)
+    replay_parser = commands.add_parser("replay", help="requeue dead jobs")
+    replay_parser.add_argument("job_ids", nargs="*")
+    replay_parser.add_argument("--queue")
+    replay_parser.add_argument("--all", action="store_true", help="replay every dead job (of --queue)")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for record in list_dead_letters(args.queue, args.limit):
+            last_line = (record.get("exc_info") or "").strip().splitlines()[-1:] or [""]
+            print(f"{record['failed_at']:%Y-%m-%d %H:%M:%S}  {record['queue']:<20} {record['job_id']}"
+                  f"  ({record.get('deaths', 1)}x) {last_line[0]}")
+        return
+
+    if not args.job_ids and not args.all:
+        parser.error("give job ids or --all")
+    replayed = replay(args.job_ids, args.queue, args.all)
+    print(f"Replayed {len(replayed)} job(s)")
+    for job_id in replayed:
+        print(f"  {job_id}")
+
+
+if __name__ == "__main__":
+    main()
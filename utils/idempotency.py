@@ -0,0 +1,155 @@
+"""
+Idempotent enqueueing and single-flight locks on Redis.
+
+Job ids double as idempotency keys. They are derived from what a job works
+on (an article id, a Gmail sender, the content of a request) rather than
+from the time it was submitted, so resubmitting the same work produces the
+same id. enqueue_once() claims the id with SET NX before enqueueing: a
+duplicate submission while the job is queued, deferred or running gets the
+in-flight job back instead of a second copy. Once the job has finished or
+failed, the same id can be enqueued again.
+
+SingleFlightLock keeps a recurring task (one ingestion run per sender) from
+overlapping with itself.
+
+Usage:
+    job = enqueue_once(queue, fn, article_id, job_id=f"normalize_{article_id}")
+    job_id = idempotency_key("ingestion", sender, subject)
+"""
+
+import hashlib
+import json
+import time
+import uuid
+from typing import Optional
+
+import redis
+from rq import Queue
+from rq.exceptions import NoSuchJobError
+from rq.job import Job, JobStatus
+
+from config.settings import IDEMPOTENCY_TTL_SEC
+from utils.tracing import inject
+
+IN_FLIGHT = {JobStatus.QUEUED, JobStatus.STARTED, JobStatus.DEFERRED, JobStatus.SCHEDULED}
+CLAIM_KEY = "pipeline:idempotency:{}"
+LOCK_KEY = "pipeline:single_flight:{}"
+
+# How long to wait for a job whose id another process has just claimed
+_CLAIM_SETTLE_SEC = 1.0
+
+
+def content_hash(*parts) -> str:
+    """Stable sha256 of JSON-serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def idempotency_key(prefix: str, *parts) -> str:
+    """Job id derived from the content of the work, e.g. ingestion_<hash>."""
+    return f"{prefix}_{content_hash(*parts)[:32]}"
+
+
+def _delete_if_equals(connection, key: str, value: bytes) -> bool:
+    """Delete key only if it still holds value (compare-and-delete)."""
+    with connection.pipeline() as pipe:
+        try:
+            pipe.watch(key)
+            if pipe.get(key) != value:
+                pipe.unwatch()
+                return False
+            pipe.multi()
+            pipe.delete(key)
+            pipe.execute()
+            return True
+        except redis.WatchError:
+            return False
+
+
+def _in_flight_job(job_id: str, connection) -> Optional[Job]:
+    try:
+        job = Job.fetch(job_id, connection=connection)
+    except NoSuchJobError:
+        return None
+    return job if job.get_status() in IN_FLIGHT else None
+
+
+def claim(pipe, job_id: str, ttl: int = IDEMPOTENCY_TTL_SEC) -> None:
+    """Claim a new job id in a pipeline that enqueues it, as enqueue_once() would."""
+    pipe.set(CLAIM_KEY.format(job_id), uuid.uuid4().hex, nx=True, ex=ttl)
+
+
+def enqueue_once(queue: Queue, func, *args, job_id: str, ttl: int = IDEMPOTENCY_TTL_SEC, **kwargs) -> Job:
+    """
+    Enqueue func under job_id unless a job with that id is already in flight.
+
+    Args:
+        queue: Queue to enqueue on
+        func: Job function (or its dotted path)
+        *args: Job arguments
+        job_id: Idempotency key, used as the RQ job id
+        ttl: Seconds the claim on job_id outlives the enqueue
+        **kwargs: Passed to Queue.enqueue
+
+    Returns:
+        The new job, or the in-flight job a duplicate submission collapsed into
+    """
+    connection = queue.connection
+    claim = CLAIM_KEY.format(job_id)
+    for _ in range(3):
+        token = uuid.uuid4().hex.encode()
+        if connection.set(claim, token, nx=True, ex=ttl):
+            try:
+                # The job continues the enqueuer's trace
+                kwargs["meta"] = inject(kwargs.get("meta"))
+                return queue.enqueue(func, *args, job_id=job_id, **kwargs)
+            except Exception:
+                _delete_if_equals(connection, claim, token)
+                raise
+
+        held_by = connection.get(claim)
+        job = _in_flight_job(job_id, connection)
+        deadline = time.monotonic() + _CLAIM_SETTLE_SEC
+        while job is None and time.monotonic() < deadline:
+            # The claim may belong to an enqueue that has not landed yet
+            try:
+                Job.fetch(job_id, connection=connection)
+                break
+            except NoSuchJobError:
+                time.sleep(0.05)
+        job = job or _in_flight_job(job_id, connection)
+        if job is not None:
+            return job
+        # The claimed job is done: take the claim over (unless someone else just did)
+        if held_by is not None:
+            _delete_if_equals(connection, claim, held_by)
+    raise Exception(f"Could not enqueue {job_id}: its claim kept changing hands")
+
+
+class SingleFlightLock:
+    """
+    Redis lock allowing one run of a task at a time.
+
+    acquire() returns a token (or None if a run is in flight); release(token)
+    only frees the lock if it is still held with that token, so a run that
+    outlived its TTL cannot free the lock of the next one.
+    """
+
+    def __init__(self, name: str, ttl: int, connection=None):
+        if connection is None:
+            from config.redis_config import redis_conn
+            connection = redis_conn
+        self.key = LOCK_KEY.format(name)
+        self.ttl = ttl
+        self.connection = connection
+
+    def acquire(self) -> Optional[str]:
+        token = uuid.uuid4().hex
+        return token if self.connection.set(self.key, token, nx=True, ex=self.ttl) else None
+
+    def release(self, token: str) -> bool:
+        return _delete_if_equals(self.connection, self.key, token.encode())
+
+    def holder(self) -> Optional[str]:
+        value = self.connection.get(self.key)
+        return value.decode() if value is not None else None
@@ -0,0 +1,288 @@
+"""
+Prometheus metrics for the pipeline queues, stages, workers and the LLM.
+
+Workers record what only they see in Redis: every pipeline worker class
+(StageMetricsMixin) adds each job's run time to a per-stage histogram, and
+the generation functions count the tokens they produce. collect() reads
+those back together with the state of every queue, in a few pipelined round
+trips however many queues there are:
+
+    pipeline_queue_depth                    jobs waiting, per queue
+    pipeline_queue_oldest_job_age_seconds   how long the head job has waited
+    pipeline_queue_jobs                     started/failed/finished/deferred/scheduled
+                                            jobs in each queue's registries
+    pipeline_stage_duration_seconds         histogram of job run times, per stage
+                                            (queue without its lane) and outcome
+    pipeline_workers                        registered workers, per state
+    pipeline_llm_generated_tokens_total     tokens generated, per model
+    pipeline_llm_generation_seconds_total   time spent generating them
+    pipeline_llm_tokens_per_second          throughput of the last generate call
+
+The API serves them at GET /metrics. Deployments without the API (or
+scraping worker hosts directly) can run the standalone exporter instead.
+
+Usage:
+    python -m utils.metrics [--port 9108]
+"""
+
+import argparse
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from rq.job import JobStatus
+from rq.worker_registration import REDIS_WORKER_KEYS
+
+from config.redis_config import PRIORITY_CLASSES
+from config.settings import METRICS_EXPORTER_PORT
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+STAGE_DURATION_KEY = "pipeline:metrics:stage:{}:{}"
+LLM_KEY = "pipeline:metrics:llm:{}"
+# Sets of the histogram and LLM keys written so far, so collecting never scans
+STAGE_INDEX_KEY = "pipeline:metrics:stages"
+LLM_INDEX_KEY = "pipeline:metrics:models"
+# Upper bounds (seconds) of the stage duration buckets; +Inf is implied
+STAGE_BUCKETS = (0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+REGISTRY_STATES = ("started", "failed", "finished", "deferred", "scheduled")
+
+# (name, type, help, [(sample suffix, labels, value)])
+Family = Tuple[str, str, str, List[Tuple[str, Dict[str, str], float]]]
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _connection(connection):
+    if connection is None:
+        from config.redis_config import redis_conn
+        connection = redis_conn
+    return connection
+
+
+def stage_name(queue_name: str) -> str:
+    """A queue's name without its priority lane suffix."""
+    for priority in PRIORITY_CLASSES:
+        if queue_name.endswith(f"_{priority}"):
+            return queue_name[:-len(priority) - 1]
+    return queue_name
+
+
+def observe_stage(stage: str, status: str, seconds: float, connection=None) -> None:
+    """Add one job run time to the stage duration histogram."""
+    bucket = next((str(bound) for bound in STAGE_BUCKETS if seconds <= bound), "+Inf")
+    key = STAGE_DURATION_KEY.format(stage, status)
+    with _connection(connection).pipeline() as pipe:
+        pipe.hincrby(key, bucket, 1)
+        pipe.hincrby(key, "count", 1)
+        pipe.hincrbyfloat(key, "sum", seconds)
+        pipe.sadd(STAGE_INDEX_KEY, key)
+        pipe.execute()
+
+
+def observe_job(job, queue_name: str, connection=None) -> None:
+    """Record the run time of a job that just ended."""
+    if job.started_at is None:
+        return
+    ended_at = job.ended_at or datetime.now(timezone.utc)
+    started_at = job.started_at
+    if started_at.tzinfo is None:
+        started_at = started_at.replace(tzinfo=timezone.utc)
+    if ended_at.tzinfo is None:
+        ended_at = ended_at.replace(tzinfo=timezone.utc)
+    # Called before the worker marks a successful job finished
+    status = "failed" if job.get_status(refresh=False) == JobStatus.FAILED else "finished"
+    observe_stage(stage_name(queue_name), status, max(0.0, (ended_at - started_at).total_seconds()), connection)
+
+
+def record_generation(model_name: str, tokens: int, seconds: float, connection=None) -> None:
+    """Count the tokens of one generate call and its throughput."""
+    key = LLM_KEY.format(model_name)
+    with _connection(connection).pipeline() as pipe:
+        pipe.hincrby(key, "tokens", tokens)
+        pipe.hincrbyfloat(key, "seconds", seconds)
+        pipe.hset(key, "last_tokens_per_second", tokens / seconds if seconds > 0 else 0)
+        pipe.sadd(LLM_INDEX_KEY, key)
+        pipe.execute()
+
+
+class StageMetricsMixin:
+    """Record the run time of every job the worker executes."""
+
+    def handle_execution_ended(self, job, queue, heartbeat_ttl):
+        super().handle_execution_ended(job, queue, heartbeat_ttl)
+        try:
+            observe_job(job, queue.name, self.connection)
+        except Exception as e:
+            self.log.warning("Could not record run time of job %s: %s", job.id, e)
+
+
+def _rq_time(value) -> Optional[float]:
+    if not value:
+        return None
+    # RQ stores naive UTC timestamps
+    parsed = datetime.strptime(_decode(value), "%Y-%m-%dT%H:%M:%S.%fZ")
+    return parsed.replace(tzinfo=timezone.utc).timestamp()
+
+
+def collect(connection=None, queues=None) -> List[Family]:
+    """
+    Read every metric from Redis.
+
+    Args:
+        connection: Redis connection (the pipeline's by default)
+        queues: Queues to report on (all pipeline queues by default)
+    """
+    connection = _connection(connection)
+    if queues is None:
+        from config.redis_config import ALL_QUEUES
+        queues = list(ALL_QUEUES.values())
+    now = time.time()
+
+    # 1. Queue lengths, head jobs, registry sizes, metric keys, workers
+    with connection.pipeline(transaction=False) as pipe:
+        for queue in queues:
+            pipe.llen(queue.key)
+            pipe.lindex(queue.key, 0)
+            for registry in (queue.started_job_registry, queue.failed_job_registry, queue.finished_job_registry,
+                             queue.deferred_job_registry, queue.scheduled_job_registry):
+                pipe.zcard(registry.key)
+        pipe.smembers(STAGE_INDEX_KEY)
+        pipe.smembers(LLM_INDEX_KEY)
+        pipe.smembers(REDIS_WORKER_KEYS)
+        queue_results = pipe.execute()
+    worker_keys = sorted(_decode(key) for key in queue_results.pop())
+    llm_keys = sorted(_decode(key) for key in queue_results.pop())
+    stage_keys = sorted(_decode(key) for key in queue_results.pop())
+
+    # 2. When the head jobs were enqueued, histogram and LLM counters, worker states
+    stride = 2 + len(REGISTRY_STATES)
+    heads = [_decode(queue_results[i * stride + 1]) for i in range(len(queues))]
+    with connection.pipeline(transaction=False) as pipe:
+        for head in heads:
+            pipe.hget(f"rq:job:{head}", "enqueued_at")
+        for key in stage_keys + llm_keys:
+            pipe.hgetall(key)
+        for key in worker_keys:
+            pipe.hget(key, "state")
+        results = pipe.execute()
+    enqueued = results[:len(heads)]
+    hashes = [{_decode(field): float(value) for field, value in fields.items()}
+              for fields in results[len(heads):len(heads) + len(stage_keys) + len(llm_keys)]]
+    worker_states = results[len(heads) + len(stage_keys) + len(llm_keys):]
+
+    depth, age, registries = [], [], []
+    for i, queue in enumerate(queues):
+        labels = {"queue": queue.name}
+        depth.append(("", labels, queue_results[i * stride]))
+        enqueued_at = _rq_time(enqueued[i]) if heads[i] else None
+        age.append(("", labels, max(0.0, now - enqueued_at) if enqueued_at else 0.0))
+        for state, count in zip(REGISTRY_STATES, queue_results[i * stride + 2:(i + 1) * stride]):
+            registries.append(("", {"queue": queue.name, "state": state}, count))
+
+    durations = []
+    for key, fields in zip(stage_keys, hashes):
+        stage, status = key.split(":")[-2:]
+        cumulative = 0
+        for bound in [str(bound) for bound in STAGE_BUCKETS] + ["+Inf"]:
+            cumulative += fields.get(bound, 0)
+            durations.append(("_bucket", {"stage": stage, "status": status, "le": bound}, cumulative))
+        durations.append(("_sum", {"stage": stage, "status": status}, fields.get("sum", 0.0)))
+        durations.append(("_count", {"stage": stage, "status": status}, fields.get("count", 0)))
+
+    tokens, seconds, throughput = [], [], []
+    for key, fields in zip(llm_keys, hashes[len(stage_keys):]):
+        labels = {"model": key[len(LLM_KEY.format("")):]}
+        tokens.append(("", labels, fields.get("tokens", 0)))
+        seconds.append(("", labels, fields.get("seconds", 0.0)))
+        throughput.append(("", labels, fields.get("last_tokens_per_second", 0.0)))
+
+    workers: Dict[str, int] = {}
+    for state in worker_states:
+        state = _decode(state) or "unknown"
+        workers[state] = workers.get(state, 0) + 1
+
+    return [
+        ("pipeline_queue_depth", "gauge", "Jobs waiting in the queue.", depth),
+        ("pipeline_queue_oldest_job_age_seconds", "gauge",
+         "Time the job at the head of the queue has waited.", age),
+        ("pipeline_queue_jobs", "gauge", "Jobs in the queue's registries, by state.", registries),
+        ("pipeline_stage_duration_seconds", "histogram", "Run time of pipeline jobs, by stage and outcome.",
+         durations),
+        ("pipeline_workers", "gauge", "Registered RQ workers, by state.",
+         [("", {"state": state}, count) for state, count in sorted(workers.items())]),
+        ("pipeline_llm_generated_tokens_total", "counter", "Tokens generated by the LLM.", tokens),
+        ("pipeline_llm_generation_seconds_total", "counter", "Time spent generating tokens.", seconds),
+        ("pipeline_llm_tokens_per_second", "gauge", "Generation throughput of the last generate call.",
+         throughput),
+    ]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def render(families: List[Family]) -> str:
+    """Metrics in the Prometheus text exposition format."""
+    lines = []
+    for name, metric_type, help_text, samples in families:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for suffix, labels, value in samples:
+            label_text = ",".join(f'{key}="{_escape(str(label))}"' for key, label in labels.items())
+            lines.append(f"{name}{suffix}{{{label_text}}} {_format_value(value)}" if label_text
+                         else f"{name}{suffix} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_text(connection=None) -> str:
+    return render(collect(connection))
+
+
+class _ExporterHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        try:
+            body = metrics_text().encode()
+        except Exception as e:
+            self.send_error(503, f"Could not collect metrics: {e}")
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would drown the worker logs
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve pipeline metrics for Prometheus.")
+    parser.add_argument("--port", type=int, default=METRICS_EXPORTER_PORT)
+    parser.add_argument("--host", default="0.0.0.0")
+    args = parser.parse_args()
+    server = ThreadingHTTPServer((args.host, args.port), _ExporterHandler)
+    print(f"Serving metrics on http://{args.host}:{args.port}/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ from config.redis_config import (
     test_redis_connection,
     ALL_QUEUES
 )
+from services.supervisor.lanes import lane_wait_stats
 
 
 def print_queue_status():
@@ -55,6 +56,22 @@ def print_queue_status():
         except Exception as e:
             print(f"   ✗ Error getting queue status: {e}")
     
+    # Wait times per priority class
+    print("\n3. Queue Wait Times by Priority:")
+    print("-" * 60)
+    try:
+        for priority, stats in lane_wait_stats().items():
+            if not stats["count"]:
+                print(f"\n   {priority}: no jobs recorded")
+                continue
+            print(f"\n   {priority}: {stats['count']} jobs")
+            print(f"   - Mean wait: {stats['mean_sec']:.1f}s")
+            print(f"   - p50 / p95 / max (recent): "
+                  f"{stats['p50_sec']:.1f}s / {stats['p95_sec']:.1f}s / {stats['max_sec']:.1f}s")
+            print(f"   - Missed deadlines: {stats['missed_deadlines']}")
+    except Exception as e:
+        print(f"   ✗ Error getting wait times: {e}")
+    
     print("\n" + "=" * 60)
     print("\nTo start workers, run:")
     print("  ./run_workers.sh")
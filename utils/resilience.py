@@ -0,0 +1,201 @@
+"""
+Retries with backoff and circuit breakers for calls to external services.
+
+retry_policy() builds the RQ Retry of a job: each retry waits twice as long
+as the one before (from RETRY_BACKOFF_BASE_SEC up to RETRY_BACKOFF_MAX_SEC),
+with jitter so that jobs failing together do not retry together. Delayed
+retries are run by the RQ scheduler (`rq worker --with-scheduler`).
+
+A CircuitBreaker guards one dependency (Gmail, Text-to-Speech, a scraped
+site). Its state lives in Redis, so every worker shares it:
+
+    closed     calls go through; CIRCUIT_FAILURE_THRESHOLD failures within
+               CIRCUIT_FAILURE_WINDOW_SEC open the circuit
+    open       calls fail at once with CircuitOpenError, for
+               CIRCUIT_RESET_TIMEOUT_SEC
+    half-open  one trial call goes through; success closes the circuit,
+               failure opens it again
+
+While a dependency is down, jobs fail fast and are retried later instead of
+waiting on calls that are certain to fail. If Redis itself is unreachable,
+breakers let every call through.
+
+Usage:
+    queue.enqueue(fn, *args, retry=retry_policy(3))
+    html = circuit_breaker("gmail").call(request.execute)
+"""
+
+import random
+import time
+from typing import Callable, Dict, List, Optional
+
+import redis
+from rq import Retry
+
+from config.settings import (
+    RETRY_BACKOFF_BASE_SEC,
+    RETRY_BACKOFF_MAX_SEC,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_FAILURE_WINDOW_SEC,
+    CIRCUIT_RESET_TIMEOUT_SEC,
+)
+
+CIRCUIT_KEY = "pipeline:circuit:{}"
+# After a Redis error, breakers stop consulting Redis for this long
+STATE_UNAVAILABLE_SEC = 30
+
+# id(connection) -> monotonic time until which its breakers let calls through
+_state_unavailable_until: Dict[int, float] = {}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"Circuit '{name}' is open; retry in {retry_after:.0f}s")
+
+
+def backoff_intervals(max_retries: int, base: int = RETRY_BACKOFF_BASE_SEC,
+                      cap: int = RETRY_BACKOFF_MAX_SEC) -> List[int]:
+    """Exponential delays in seconds, each drawn from the upper half of its step (equal jitter)."""
+    intervals = []
+    for attempt in range(max_retries):
+        delay = min(cap, base * 2 ** attempt)
+        intervals.append(max(1, round(random.uniform(delay / 2, delay))))
+    return intervals
+
+
+def retry_policy(max_retries: int, base: int = RETRY_BACKOFF_BASE_SEC,
+                 cap: int = RETRY_BACKOFF_MAX_SEC) -> Optional[Retry]:
+    """RQ Retry with jittered exponential backoff, or None for no retries."""
+    if max_retries <= 0:
+        return None
+    return Retry(max=max_retries, interval=backoff_intervals(max_retries, base, cap))
+
+
+def _is_outage(error: Exception) -> bool:
+    """Whether an error says the dependency is unavailable, rather than the request is bad."""
+    status = getattr(getattr(error, "resp", None), "status", None)  # googleapiclient HttpError
+    if status is None:
+        status = getattr(error, "code", None)  # google.api_core errors
+    try:
+        status = int(status)
+    except (TypeError, ValueError):
+        # Timeouts, refused connections and the like
+        return True
+    return status >= 500 or status == 429
+
+
+class CircuitBreaker:
+    """Redis-backed circuit breaker shared by every worker (see module docstring)."""
+
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 failure_window: float = CIRCUIT_FAILURE_WINDOW_SEC,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT_SEC, connection=None,
+                 is_failure: Callable[[Exception], bool] = _is_outage):
+        if connection is None:
+            from config.redis_config import redis_conn
+            connection = redis_conn
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.failure_window = failure_window
+        self.reset_timeout = reset_timeout
+        self.connection = connection
+        self.is_failure = is_failure
+        key = CIRCUIT_KEY.format(name)
+        self.failures_key = f"{key}:failures"
+        self.open_key = f"{key}:open"
+        self.tripped_key = f"{key}:tripped"
+        self.trial_key = f"{key}:trial"
+
+    def state(self) -> str:
+        """closed, open or half-open."""
+        if self.connection.exists(self.open_key):
+            return "open"
+        return "half-open" if self.connection.exists(self.tripped_key) else "closed"
+
+    def allow(self) -> bool:
+        """Whether a call may go through now (taking the trial call when half-open)."""
+        if self.connection.exists(self.open_key):
+            return False
+        if not self.connection.exists(self.tripped_key):
+            return True
+        # Half-open: one trial at a time; a trial that never reports back expires
+        return bool(self.connection.set(self.trial_key, 1, nx=True, px=self._ms(self.reset_timeout)))
+
+    def retry_after(self) -> float:
+        ttl = self.connection.pttl(self.open_key)
+        return max(ttl, 0) / 1000 if ttl and ttl > 0 else self.reset_timeout
+
+    def record_success(self) -> None:
+        self.connection.delete(self.failures_key, self.tripped_key, self.trial_key)
+
+    def record_failure(self) -> None:
+        with self.connection.pipeline() as pipe:
+            pipe.incr(self.failures_key)
+            pipe.exists(self.tripped_key)
+            failures, half_open = pipe.execute()
+        if failures == 1:
+            # The window starts at the first failure
+            self.connection.pexpire(self.failures_key, self._ms(self.failure_window))
+        if half_open or failures >= self.failure_threshold:
+            self.trip()
+
+    def trip(self) -> None:
+        with self.connection.pipeline() as pipe:
+            pipe.set(self.open_key, 1, px=self._ms(self.reset_timeout))
+            pipe.set(self.tripped_key, 1)
+            pipe.delete(self.failures_key, self.trial_key)
+            pipe.execute()
+        print(f"Circuit '{self.name}' opened for {self.reset_timeout:.0f}s")
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """Call fn through the breaker; raises CircuitOpenError while the circuit is open."""
+        if time.monotonic() < _state_unavailable_until.get(id(self.connection), 0.0):
+            return fn(*args, **kwargs)
+        try:
+            allowed = self.allow()
+        except redis.RedisError:
+            # Breaker state unavailable: do not take the dependency down with Redis
+            _state_unavailable(self.connection)
+            return fn(*args, **kwargs)
+        if not allowed:
+            raise CircuitOpenError(self.name, self.retry_after())
+
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._record(failed=self.is_failure(e))
+            raise
+        self._record(failed=False)
+        return result
+
+    def _record(self, failed: bool) -> None:
+        try:
+            if failed:
+                self.record_failure()
+            else:
+                self.record_success()
+        except redis.RedisError:
+            _state_unavailable(self.connection)
+
+    @staticmethod
+    def _ms(seconds: float) -> int:
+        return max(1, int(seconds * 1000))
+
+
+def _state_unavailable(connection) -> None:
+    _state_unavailable_until[id(connection)] = time.monotonic() + STATE_UNAVAILABLE_SEC
+    print(f"Circuit breaker state unavailable; calling dependencies unguarded for {STATE_UNAVAILABLE_SEC}s")
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def circuit_breaker(name: str) -> CircuitBreaker:
+    """Shared breaker for a dependency, configured from settings."""
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name)
+    return _breakers[name]
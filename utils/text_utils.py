@@ -1,8 +1,15 @@
 import nltk
 from typing import List
 
-# Ensure the punkt tokenizer is available
-nltk.download('punkt', quiet=True)
+_punkt_checked = False
+
+
+def _ensure_punkt() -> None:
+    """Download the punkt tokenizer on first use, not at import."""
+    global _punkt_checked
+    if not _punkt_checked:
+        nltk.download('punkt', quiet=True)
+        _punkt_checked = True
 
 def chunk_by_sentence(text: str, target: int=200) -> List[str]:
     """
@@ -17,6 +24,7 @@ def chunk_by_sentence(text: str, target: int=200) -> List[str]:
         text = str(text)
 
     try:
+        _ensure_punkt()
         sentences = nltk.sent_tokenize(text)
     except Exception:
         return []
@@ -0,0 +1,236 @@
+"""
+Trace context carried from the API through the queues into the workers.
+
+A trace starts where an article enters the pipeline (POST /ingest, or the
+ingest_article job of a newsletter) and follows it through every stage:
+
+- enqueue_once() (utils/idempotency.py) copies the active span into the
+  job's meta as a W3C `traceparent`;
+- TracingMixin (part of every pipeline worker class) continues the trace
+  in a span around each job. Spans recorded while the job runs (MongoDB
+  commands, Gmail requests, page loads, tokenization, prefill, decode, TTS)
+  become its children, and the time spent per span name is stored on the
+  job as `meta["timings"]`.
+
+Finished spans go to the exporter given to set_exporter(); setting
+TRACE_FILE exports them with a FileSpanExporter, one JSON object per line.
+Outside a trace, span() records nothing.
+
+Usage:
+    with start_trace("ingest_article", source=source):
+        enqueue_pipeline(article_id)
+
+    with span("tts.synthesize", characters=len(text)):
+        ...
+"""
+
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
+
+from pymongo import monitoring
+
+from config.settings import TRACE_FILE
+
+TRACEPARENT_META = "traceparent"
+TIMINGS_META = "timings"
+
+
+class Span:
+    """One timed operation of a trace. Times are epoch seconds."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "end", "attributes")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None,
+                 start: Optional[float] = None, attributes: Optional[Dict] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time() if start is None else start
+        self.end: Optional[float] = None
+        self.attributes = attributes or {}
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.time()) - self.start
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "end": self.end,
+            "duration": self.duration,
+            "attributes": self.attributes,
+        }
+
+
+class FileSpanExporter:
+    """Appends finished spans to a file as JSON lines."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+# Time per span name within the job being run (see TracingMixin)
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("job_timings", default=None)
+_exporter = FileSpanExporter(TRACE_FILE) if TRACE_FILE else None
+
+
+def set_exporter(exporter) -> None:
+    """Send finished spans to exporter (any object with export(span)), or nowhere with None."""
+    global _exporter
+    _exporter = exporter
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def _parse_traceparent(traceparent: Optional[str]) -> Optional[Tuple[str, str]]:
+    parts = (traceparent or "").split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2]
+
+
+def _finish(span: Span, end: Optional[float] = None) -> None:
+    span.end = time.time() if end is None else end
+    timings = _timings.get()
+    if timings is not None:
+        timings[span.name] = timings.get(span.name, 0.0) + span.duration
+    if _exporter is not None:
+        try:
+            _exporter.export(span)
+        except Exception as e:
+            print(f"Could not export span {span.name}: {e}")
+
+
+@contextmanager
+def _activate(span: Span) -> Iterator[Span]:
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.attributes["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        _finish(span)
+
+
+def start_trace(name: str, traceparent: Optional[str] = None, **attributes):
+    """
+    Context manager running its body in a new span that is always recorded.
+
+    The span continues the trace of `traceparent` when given, else the
+    active trace, else it starts a new trace.
+    """
+    parent = _parse_traceparent(traceparent)
+    if parent is None and _current.get() is not None:
+        parent = _current.get().trace_id, _current.get().span_id
+    trace_id, parent_id = parent if parent else (uuid.uuid4().hex, None)
+    return _activate(Span(name, trace_id, parent_id, attributes=attributes))
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Context manager running its body in a child span of the active one, if any."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    with _activate(Span(name, parent.trace_id, parent.span_id, attributes=attributes)) as child:
+        yield child
+
+
+def record_span(name: str, start: float, end: float, **attributes) -> None:
+    """Record a child span of the active one that was timed by the caller."""
+    parent = _current.get()
+    if parent is not None:
+        _finish(Span(name, parent.trace_id, parent.span_id, start=start, attributes=attributes), end)
+
+
+def inject(meta: Optional[Dict] = None) -> Dict:
+    """Job meta carrying the active span as its traceparent."""
+    meta = dict(meta or {})
+    parent = _current.get()
+    if parent is not None:
+        meta[TRACEPARENT_META] = parent.traceparent
+    return meta
+
+
+class MongoTracingListener(monitoring.CommandListener):
+    """Records a span per MongoDB command run within a trace."""
+
+    def __init__(self):
+        self._spans: Dict[Tuple, Span] = {}
+
+    def started(self, event):
+        parent = _current.get()
+        if parent is None:
+            return
+        attributes = {"db": event.database_name}
+        collection = event.command.get(event.command_name)
+        if isinstance(collection, str):
+            attributes["collection"] = collection
+        self._spans[(event.connection_id, event.request_id)] = Span(
+            f"mongo.{event.command_name}", parent.trace_id, parent.span_id, attributes=attributes
+        )
+
+    def succeeded(self, event):
+        span = self._spans.pop((event.connection_id, event.request_id), None)
+        if span is not None:
+            _finish(span)
+
+    def failed(self, event):
+        span = self._spans.pop((event.connection_id, event.request_id), None)
+        if span is not None:
+            span.attributes["error"] = str(event.failure)
+            _finish(span)
+
+
+class TracingMixin:
+    """Run each job in a span continuing its enqueuer's trace, and store its timings on it."""
+
+    def perform_job(self, job, queue):
+        token = _timings.set({})
+        try:
+            with start_trace(f"job.{job.func_name.rsplit('.', 1)[-1]}", job.meta.get(TRACEPARENT_META),
+                             job_id=job.id, queue=queue.name):
+                return super().perform_job(job, queue)
+        finally:
+            _timings.reset(token)
+
+    def handle_execution_ended(self, job, queue, heartbeat_ttl):
+        super().handle_execution_ended(job, queue, heartbeat_ttl)
+        timings = _timings.get()
+        if timings is None:
+            return
+        try:
+            job.meta[TIMINGS_META] = {
+                "total": round(_current.get().duration, 3),
+                **{name: round(seconds, 3) for name, seconds in sorted(timings.items())},
+            }
+            job.save_meta()
+        except Exception as e:
+            self.log.warning("Could not store timings of job %s: %s", job.id, e)